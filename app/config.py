@@ -7,6 +7,13 @@ class Settings:
     # Data backend: "file" (default) or "sql"
     DATA_BACKEND: str = os.getenv("DATA_BACKEND", "file").lower()
 
+    # Per-user state kept resident between requests: user count, idle time and memory budget
+    USER_CACHE_MAX_USERS: int = int(os.getenv("USER_CACHE_MAX_USERS", "32"))
+    USER_CACHE_IDLE_MINUTES: float = float(os.getenv("USER_CACHE_IDLE_MINUTES", "30"))
+    USER_CACHE_MEMORY_MB: float = float(os.getenv("USER_CACHE_MEMORY_MB", "1024"))
+    # Memory budget of each session's memoized analysis tables
+    SESSION_MEMO_MB: float = float(os.getenv("SESSION_MEMO_MB", "64"))
+
     # Auth backend: "local" (default) or "google"
     AUTH_BACKEND: str = os.getenv("AUTH_BACKEND", "local").lower()
 
@@ -1,8 +1,11 @@
 import contextlib
-from typing import Generator, Optional
+import io
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence
 
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker
+import pandas as pd
 
 from app.config import settings
 
@@ -10,6 +13,12 @@ from app.config import settings
 _engine = None
 _SessionLocal = None
 
+# Rows per upsert statement; keeps bound parameters under SQLite's/pg8000's limits
+UPSERT_CHUNK_SIZE = 1000
+_ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# Rows per executemany batch for plain appends
+INSERT_CHUNK_SIZE = 5000
+
 
 def _build_sqlalchemy_url() -> str:
     """Build a SQLAlchemy URL.
@@ -83,3 +92,86 @@ def session_scope() -> Generator:
         raise
 
 
+def _chunks(rows: List[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bulk_upsert(session, model, rows: Iterable[Dict[str, Any]], key_columns: Sequence[str],
+                chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """Insert or update ``rows`` of ``model`` keyed by the unique ``key_columns``.
+
+    Postgres and SQLite get one ``INSERT ... ON CONFLICT DO UPDATE`` per chunk; other
+    dialects fall back to a key lookup plus chunked ``executemany`` inserts/updates.
+    Later rows win over earlier ones with the same key. Returns the number of rows.
+    """
+    table = getattr(model, "__table__", model)
+    # One statement must not touch the same key twice
+    unique = list({tuple(row[c] for c in key_columns): row for row in rows}.values())
+    if not unique:
+        return 0
+    insert = _ON_CONFLICT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        _executemany_upsert(session, table, unique, key_columns, chunk_size)
+        return len(unique)
+    update_columns = [c for c in unique[0] if c not in key_columns]
+    for chunk in _chunks(unique, chunk_size):
+        stmt = insert(table).values(chunk)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+        session.execute(stmt)
+    return len(unique)
+
+
+def _executemany_upsert(session, table, rows: List[Dict[str, Any]], key_columns: Sequence[str],
+                        chunk_size: int) -> None:
+    """Portable upsert: find existing keys per chunk, then batch updates and inserts."""
+    keys = [table.c[c] for c in key_columns]
+    update_columns = [c for c in rows[0] if c not in key_columns]
+    for chunk in _chunks(rows, chunk_size):
+        wanted = [tuple(row[c] for c in key_columns) for row in chunk]
+        existing = set(session.execute(select(*keys).where(tuple_(*keys).in_(wanted))).all())
+        updates = [row for key, row in zip(wanted, chunk) if key in existing]
+        inserts = [row for key, row in zip(wanted, chunk) if key not in existing]
+        if updates and update_columns:
+            # Bind key values under other names so they do not clash with the SET columns
+            stmt = table.update().where(*[table.c[c] == bindparam("key_" + c) for c in key_columns])
+            session.execute(stmt, [
+                {**{c: row[c] for c in update_columns}, **{"key_" + c: row[c] for c in key_columns}}
+                for row in updates
+            ])
+        if inserts:
+            session.execute(table.insert(), inserts)
+
+
+def bulk_insert_frame(session, model, frame: pd.DataFrame, chunk_size: int = INSERT_CHUNK_SIZE) -> int:
+    """Append the rows of ``frame`` (columns named after table columns) to ``model``.
+
+    Postgres over pg8000 streams the rows with ``COPY``; other databases get Core
+    ``executemany`` inserts of at most ``chunk_size`` rows. NaN/None become NULL.
+    Returns the number of rows written.
+    """
+    if frame.empty:
+        return 0
+    table = getattr(model, "__table__", model)
+    dialect = session.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "pg8000":
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        columns = ", ".join(f'"{c}"' for c in frame.columns)
+        cursor = session.connection().connection.cursor()
+        cursor.execute(f'COPY "{table.name}" ({columns}) FROM STDIN WITH (FORMAT csv)', stream=buffer)
+        return len(frame)
+    stmt = table.insert()
+    names = frame.columns.tolist()
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        columns = [chunk[c].to_numpy(dtype=object, na_value=None).tolist() for c in names]
+        session.execute(stmt, [dict(zip(names, values)) for values in zip(*columns)])
+    return len(frame)
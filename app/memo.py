@@ -0,0 +1,84 @@
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.user_cache import resident_bytes
+
+# Process-wide, so a version is never reused by a reloaded service instance
+_versions = itertools.count(1)
+
+
+def next_version() -> int:
+    """A new version stamp, greater than every stamp handed out before."""
+    return next(_versions)
+
+
+class VersionedMemo:
+    """Bounded LRU of derived values keyed by a name and the version stamps of their inputs.
+
+    Inputs (universe, prices, mining units, filters) expose monotonically
+    increasing versions; a value is recomputed only when one of its stamps
+    changed. Hits and misses are counted per name. Entries are evicted least
+    recently used first beyond ``max_entries`` or ``max_bytes`` (the newest
+    entry is always kept).
+    """
+
+    # Full-universe tables run to tens of MB, so only a few are kept
+    MAX_ENTRIES = 8
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, Hashable], int] = {}
+        self.resident_bytes = 0
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+
+    def get(self, name: str, stamps: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached ``compute()`` for ``(name, stamps)``; callers must not mutate the result."""
+        key = (name, stamps)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                return self._entries[key]
+        value = compute()
+        size = resident_bytes(value)
+        with self._lock:
+            self.misses[name] = self.misses.get(name, 0) + 1
+            self._drop(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.resident_bytes += size
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries
+                    or (self.max_bytes is not None and self.resident_bytes > self.max_bytes)):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _drop(self, key: Tuple[str, Hashable]) -> None:
+        self._entries.pop(key, None)
+        self.resident_bytes -= self._sizes.pop(key, 0)
+
+    def invalidate(self, name: str = None) -> None:
+        """Drop the entries of ``name`` (all entries if None)."""
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, resident bytes, evictions and hit/miss counters per name."""
+        with self._lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            return {
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+                'names': {name: {'hits': self.hits.get(name, 0), 'misses': self.misses.get(name, 0)} for name in names},
+            }
@@ -0,0 +1,142 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from app.models.leaderboard import top_n
+
+# Planets above which the exact solver refuses a scope
+EXACT_MAX_PLANETS = 2000
+# Planet x (budget + 1) cells of the exact solver's pick table (4 bytes each) above which it refuses
+EXACT_MAX_CELLS = 20_000_000
+# Slack for float volume sums compared against a planet's volume cap
+_VOLUME_EPS = 1e-9
+
+
+def greedy_allocation(values: np.ndarray, volumes: np.ndarray, starts: np.ndarray, budget: int,
+                      max_per_planet: int, volume_cap: float) -> np.ndarray:
+    """Units per row maximizing value, by merging per-planet marginal-gain queues.
+
+    Rows are grouped by planet (``starts`` are the group offsets). Each unit on a
+    row earns ``values`` and fills ``volumes`` of the planet's ``volume_cap``.
+    Every planet's queue places units one at a time on its best row that still
+    fits, so its gains never increase; the ``budget`` largest gains over all
+    queues are then a consistent allocation. Without a binding volume cap this
+    is optimal.
+    """
+    n_planets = len(starts)
+    units = np.zeros(len(values), dtype=np.int64)
+    steps = min(max_per_planet, budget)
+    if n_planets == 0 or steps <= 0:
+        return units
+    planet_of_row = np.repeat(np.arange(n_planets), np.diff(np.append(starts, len(values))))
+    remaining = np.full(n_planets, float(volume_cap))
+    gains = np.zeros((n_planets, steps))
+    choices = np.full((n_planets, steps), -1, dtype=np.int64)
+    for step in range(steps):
+        fits = volumes <= remaining[planet_of_row] + _VOLUME_EPS
+        key = np.where(fits & (values > 0), values, -np.inf)
+        best = np.maximum.reduceat(key, starts)
+        open_planets = np.isfinite(best)
+        if not open_planets.any():
+            break
+        # First row of each planet reaching its best value
+        hits = np.flatnonzero((key == best[planet_of_row]) & np.isfinite(key))
+        hit_planets, first = np.unique(planet_of_row[hits], return_index=True)
+        rows = hits[first]
+        gains[hit_planets, step] = values[rows]
+        choices[hit_planets, step] = rows
+        remaining[hit_planets] -= volumes[rows]
+
+    # Flattened planet-major, so equal gains of one planet are taken in step order
+    taken = top_n(gains.ravel(), budget)
+    taken = taken[gains.ravel()[taken] > 0]
+    np.add.at(units, choices.ravel()[taken], 1)
+    return units
+
+
+def _planet_frontier(values: np.ndarray, volumes: np.ndarray, max_units: int,
+                     volume_cap: float) -> Tuple[np.ndarray, List[Tuple[int, ...]]]:
+    """Best value and row units of one planet for every unit count 0..max_units."""
+    # Per unit count: Pareto-optimal (volume, value, units per row) states
+    states = {0: [(0.0, 0.0, ())]}
+    for value, volume in zip(values.tolist(), volumes.tolist()):
+        extended = {}
+        for count, entries in states.items():
+            for used, total, alloc in entries:
+                for extra in range(max_units - count + 1):
+                    new_used = used + extra * volume
+                    if new_used > volume_cap + _VOLUME_EPS:
+                        break
+                    extended.setdefault(count + extra, []).append((new_used, total + extra * value, alloc + (extra,)))
+        states = {}
+        for count, entries in extended.items():
+            entries.sort(key=lambda e: (e[0], -e[1]))
+            kept, best = [], -np.inf
+            for entry in entries:
+                if entry[1] > best:
+                    kept.append(entry)
+                    best = entry[1]
+            states[count] = kept
+
+    best_values = np.full(max_units + 1, -np.inf)
+    best_allocs: List[Tuple[int, ...]] = [()] * (max_units + 1)
+    for count, entries in states.items():
+        used, total, alloc = max(entries, key=lambda e: e[1])
+        best_values[count], best_allocs[count] = total, alloc
+    # At most k units: carry the best smaller allocation forward
+    for count in range(1, max_units + 1):
+        if best_values[count] < best_values[count - 1]:
+            best_values[count], best_allocs[count] = best_values[count - 1], best_allocs[count - 1]
+    return best_values, best_allocs
+
+
+def exact_allocation(values: np.ndarray, volumes: np.ndarray, starts: np.ndarray, budget: int,
+                     max_per_planet: int, volume_cap: float) -> np.ndarray:
+    """Optimal integer units per row for the same problem as ``greedy_allocation``.
+
+    Each planet's best value per unit count is found by a Pareto dynamic program
+    over its rows, then the budget is split across planets by a multiple-choice
+    knapsack over unit counts. Meant for small scopes and budgets
+    (``EXACT_MAX_PLANETS``, ``EXACT_MAX_CELLS``).
+    """
+    n_planets = len(starts)
+    if n_planets > EXACT_MAX_PLANETS:
+        raise ValueError(f"Exact allocation supports at most {EXACT_MAX_PLANETS} planets, got {n_planets}")
+    if n_planets * (budget + 1) > EXACT_MAX_CELLS:
+        raise ValueError(f"Exact allocation supports at most {EXACT_MAX_CELLS:,} planet x budget cells, "
+                         f"got {n_planets} planets x {budget + 1}")
+    units = np.zeros(len(values), dtype=np.int64)
+    steps = min(max_per_planet, budget)
+    if n_planets == 0 or steps <= 0:
+        return units
+    ends = np.append(starts[1:], len(values))
+
+    frontiers = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        useful = np.flatnonzero(values[start:end] > 0)
+        best_values, best_allocs = _planet_frontier(values[start:end][useful], volumes[start:end][useful],
+                                                    steps, volume_cap)
+        frontiers.append((start + useful, best_values, best_allocs))
+
+    # best[b]: best value using at most b units over the planets so far
+    best = np.zeros(budget + 1)
+    picks = np.zeros((n_planets, budget + 1), dtype=np.int32)
+    for index, (_, best_values, _) in enumerate(frontiers):
+        updated = best.copy()
+        for count in range(1, steps + 1):
+            if not np.isfinite(best_values[count]) or best_values[count] <= best_values[count - 1]:
+                continue
+            candidate = best[:budget + 1 - count] + best_values[count]
+            improved = candidate > updated[count:]
+            updated[count:][improved] = candidate[improved]
+            picks[index, count:][improved] = count
+        best = updated
+
+    remaining = budget
+    for index in range(n_planets - 1, -1, -1):
+        count = int(picks[index, remaining])
+        if count:
+            rows, _, best_allocs = frontiers[index]
+            units[rows] = best_allocs[count]
+            remaining -= count
+    return units
@@ -0,0 +1,77 @@
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+
+def tour_jumps(tour: Sequence[int], dist: np.ndarray) -> int:
+    """Jumps of a round trip from node 0 through ``tour`` and back."""
+    path = [0, *tour, 0]
+    return int(sum(dist[a, b] for a, b in zip(path[:-1], path[1:])))
+
+
+def savings_tours(dist: np.ndarray, loads: np.ndarray, capacity: float) -> List[List[int]]:
+    """Clarke-Wright savings construction of capacitated round trips from node 0.
+
+    ``dist`` is a node x node jump matrix and ``loads[i]`` (each at most
+    ``capacity``) the volume picked up at node ``i``; ``loads[0]`` is ignored.
+    Routes are merged end to end in order of the jumps saved, as long as the
+    merged load still fits.
+    """
+    n = len(loads)
+    tours = {i: [i] for i in range(1, n)}
+    tour_of = list(range(n))
+    tour_load = {i: float(loads[i]) for i in range(1, n)}
+    if n <= 2:
+        return list(tours.values())
+
+    first, second = np.triu_indices(n - 1, k=1)
+    first, second = first + 1, second + 1
+    savings = dist[0, first] + dist[0, second] - dist[first, second]
+    order = np.argsort(-savings, kind='stable')
+    for i, j in zip(first[order].tolist(), second[order].tolist()):
+        a, b = tour_of[i], tour_of[j]
+        if a == b or tour_load[a] + tour_load[b] > capacity:
+            continue
+        left, right = tours[a], tours[b]
+        # Only tour ends can be joined
+        if left[-1] == i and right[0] == j:
+            merged = left + right
+        elif left[0] == i and right[-1] == j:
+            merged = right + left
+        elif left[-1] == i and right[-1] == j:
+            merged = left + right[::-1]
+        elif left[0] == i and right[0] == j:
+            merged = left[::-1] + right
+        else:
+            continue
+        tours[a] = merged
+        tour_load[a] += tour_load.pop(b)
+        del tours[b]
+        for node in right:
+            tour_of[node] = a
+    return list(tours.values())
+
+
+def two_opt(tour: List[int], dist: np.ndarray, deadline: float) -> List[int]:
+    """Improve a round trip from node 0 by segment reversals until none helps or time runs out."""
+    path = [0, *tour, 0]
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(path) - 2):
+            for j in range(i + 1, len(path) - 1):
+                delta = (dist[path[i - 1], path[j]] + dist[path[i], path[j + 1]]
+                         - dist[path[i - 1], path[i]] - dist[path[j], path[j + 1]])
+                if delta < 0:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return path[1:-1]
+
+
+def plan_tours(dist: np.ndarray, loads: np.ndarray, capacity: float, deadline: float) -> List[List[int]]:
+    """Capacitated round trips from node 0 covering every other node, fewest jumps first."""
+    tours = savings_tours(dist, loads, capacity)
+    return [two_opt(tour, dist, deadline) for tour in tours]
@@ -0,0 +1,138 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.models.universe import CONSTELLATION, REGION, SYSTEM, Universe
+
+LEVELS = (REGION, CONSTELLATION, SYSTEM)
+
+
+def _gather(values: np.ndarray, starts: np.ndarray, counts: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Concatenate ``values[starts[c]:starts[c] + counts[c]]`` for every code, in O(output)."""
+    starts = starts[codes]
+    counts = counts[codes]
+    total = int(counts.sum())
+    if total == 0:
+        return values[:0]
+    offsets = np.cumsum(counts) - counts
+    return values[np.arange(total) + np.repeat(starts - offsets, counts)]
+
+
+def _spans(ordered_codes: np.ndarray, n_codes: int, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(start, length) of each code's contiguous run in ``ordered_codes``.
+
+    With ``weights`` the positions are measured in summed weights instead of entries.
+    """
+    if weights is None:
+        weights = np.ones(len(ordered_codes), dtype=np.int64)
+    positions = np.concatenate([[0], np.cumsum(weights)[:-1]]).astype(np.int64)
+    starts = np.zeros(n_codes, dtype=np.int64)
+    # Entries of one code are contiguous, so the last write per code is its first entry
+    starts[ordered_codes[::-1]] = positions[::-1]
+    lengths = np.bincount(ordered_codes, weights=weights, minlength=n_codes).astype(np.int64)
+    return starts, lengths
+
+
+@dataclass
+class GeoHierarchy:
+    """Precomputed region -> constellation -> system -> planet -> row index.
+
+    Planets and rows are permuted into geographic order (region, constellation,
+    system), so every region, constellation and system owns one contiguous range of
+    ``planets`` and ``rows``. Child lists are stored in CSR form. All lookups cost
+    O(output) instead of a scan over the whole universe.
+    """
+
+    planets: np.ndarray
+    rows: np.ndarray
+    # level -> (start, length) of each code's range in ``planets`` / ``rows``
+    planet_spans: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    row_spans: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    # level -> CSR (pointers, child codes) for the next level down
+    child_ptr: Dict[str, np.ndarray]
+    children: Dict[str, np.ndarray]
+    # level -> parent code of each code of that level
+    parent: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_universe(cls, universe: Universe) -> "GeoHierarchy":
+        planet_codes = {level: universe.planet_codes(level).astype(np.int64) for level in LEVELS}
+        sizes = {level: len(universe.dictionaries[level]) for level in LEVELS}
+
+        # Stable sort keeps universe order within each system
+        planets = np.lexsort((planet_codes[SYSTEM], planet_codes[CONSTELLATION], planet_codes[REGION]))
+        rows, _ = universe.planet_rows(planets)
+
+        planet_spans = {}
+        row_spans = {}
+        counts = np.diff(universe.planet_offsets)[planets]
+        for level in LEVELS:
+            ordered = planet_codes[level][planets]
+            planet_spans[level] = _spans(ordered, sizes[level])
+            row_spans[level] = _spans(ordered, sizes[level], weights=counts)
+
+        child_ptr = {}
+        children = {}
+        parent = {}
+        for upper, lower in ((REGION, CONSTELLATION), (CONSTELLATION, SYSTEM)):
+            # Sorted by parent code, so each parent's children form one CSR slice
+            pairs = np.unique(np.stack([planet_codes[upper], planet_codes[lower]], axis=1), axis=0)
+            child_ptr[upper] = np.zeros(sizes[upper] + 1, dtype=np.int64)
+            np.cumsum(np.bincount(pairs[:, 0], minlength=sizes[upper]), out=child_ptr[upper][1:])
+            children[upper] = pairs[:, 1]
+            parent[lower] = np.full(sizes[lower], -1, dtype=np.int64)
+            parent[lower][pairs[:, 1]] = pairs[:, 0]
+
+        return cls(
+            planets=planets,
+            rows=rows,
+            planet_spans=planet_spans,
+            row_spans=row_spans,
+            child_ptr=child_ptr,
+            children=children,
+            parent=parent,
+        )
+
+    def children_of(self, level: str, codes: Iterable[int]) -> np.ndarray:
+        """Sorted codes of the next level below ``level`` for the union of ``codes``."""
+        codes = self._valid(level, codes)
+        # Children of distinct parents are disjoint, so a sort is enough for the union
+        ptr = self.child_ptr[level]
+        return np.sort(_gather(self.children[level], ptr[:-1], np.diff(ptr), codes))
+
+    def planets_of(self, level: str, codes: Iterable[int]) -> np.ndarray:
+        """Universe planet indices under the union of ``codes``, in universe order."""
+        codes = self._valid(level, codes)
+        return np.sort(_gather(self.planets, *self.planet_spans[level], codes))
+
+    def rows_of(self, level: str, codes: Iterable[int]) -> np.ndarray:
+        """Universe row ids under the union of ``codes``, in universe order."""
+        codes = self._valid(level, codes)
+        return np.sort(_gather(self.rows, *self.row_spans[level], codes))
+
+    def select(self, regions: Optional[Iterable[int]] = None,
+               constellations: Optional[Iterable[int]] = None,
+               systems: Optional[Iterable[int]] = None) -> Optional[Tuple[str, np.ndarray]]:
+        """Codes of the finest selected level that satisfy every coarser selection.
+
+        Returns ``(level, codes)``, or None when nothing is selected.
+        """
+        selections = [(level, self._valid(level, codes)) for level, codes in
+                      ((REGION, regions), (CONSTELLATION, constellations), (SYSTEM, systems))
+                      if codes is not None and len(codes) > 0]
+        if not selections:
+            return None
+        level, codes = selections[-1]
+        for upper, upper_codes in selections[:-1]:
+            ancestors = codes
+            current = level
+            while current != upper:
+                ancestors = self.parent[current][ancestors]
+                current = LEVELS[LEVELS.index(current) - 1]
+            codes = codes[np.isin(ancestors, upper_codes)]
+        return level, codes
+
+    def _valid(self, level: str, codes: Iterable[int]) -> np.ndarray:
+        codes = np.unique(np.asarray(list(codes) if not isinstance(codes, np.ndarray) else codes, dtype=np.int64))
+        return codes[(codes >= 0) & (codes < len(self.planet_spans[level][0]))]
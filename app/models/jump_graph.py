@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from app.models.universe import SYSTEM, Universe
+
+# Jump counts fit comfortably; -1 marks unreachable systems
+DISTANCE_DTYPE = np.int16
+UNREACHABLE = -1
+
+
+class JumpGraph:
+    """Undirected stargate graph over the universe's system codes in CSR form.
+
+    System ``s`` is adjacent to ``indices[indptr[s]:indptr[s + 1]]``. Distances
+    come from a frontier-at-a-time BFS; results per source set are kept in a
+    small LRU cache, since route queries keep starting from the same systems.
+    """
+
+    # Distance tables kept per source set (each is one int16 per system)
+    CACHE_SIZE = 256
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self._cache: "OrderedDict[Tuple[int, ...], np.ndarray]" = OrderedDict()
+
+    @classmethod
+    def from_edges(cls, n_systems: int, sources: np.ndarray, targets: np.ndarray) -> "JumpGraph":
+        """Build from system code pairs; edges are made symmetric and deduplicated."""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = (sources >= 0) & (targets >= 0) & (sources != targets)
+        pairs = np.unique(np.concatenate([
+            np.stack([sources[keep], targets[keep]], axis=1),
+            np.stack([targets[keep], sources[keep]], axis=1),
+        ]), axis=0) if keep.any() else np.empty((0, 2), dtype=np.int64)
+        indptr = np.zeros(n_systems + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=n_systems), out=indptr[1:])
+        # np.unique sorted the pairs by source, so targets are already in CSR order
+        return cls(indptr, pairs[:, 1].astype(np.int32))
+
+    @classmethod
+    def from_names(cls, universe: Universe, sources: Iterable[str], targets: Iterable[str]) -> "JumpGraph":
+        """Build from system name pairs; systems missing from the universe are skipped."""
+        return cls.from_edges(len(universe.dictionaries[SYSTEM]),
+                              universe.encode(SYSTEM, list(sources)), universe.encode(SYSTEM, list(targets)))
+
+    @property
+    def n_systems(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        """Number of (undirected) stargate connections."""
+        return len(self.indices) // 2
+
+    def neighbors(self, system: int) -> np.ndarray:
+        return self.indices[self.indptr[system]:self.indptr[system + 1]]
+
+    def _expand(self, frontier: np.ndarray) -> np.ndarray:
+        """All neighbours of the ``frontier`` systems (with repeats)."""
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return self.indices[np.arange(counts.sum()) + offsets]
+
+    def distances(self, sources) -> np.ndarray:
+        """Jumps from the nearest of ``sources`` to every system (``UNREACHABLE`` if none).
+
+        The returned array is shared with the cache; do not modify it.
+        """
+        key = tuple(np.unique(np.asarray(sources, dtype=np.int64)).tolist())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        table = self._bfs(np.array(key, dtype=np.int64))
+        self._cache[key] = table
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return table
+
+    def _bfs(self, sources: np.ndarray) -> np.ndarray:
+        dist = np.full(self.n_systems, UNREACHABLE, dtype=DISTANCE_DTYPE)
+        frontier = sources[(sources >= 0) & (sources < self.n_systems)]
+        dist[frontier] = 0
+        jumps = 0
+        while len(frontier):
+            jumps += 1
+            reached = self._expand(frontier)
+            dist[reached[dist[reached] == UNREACHABLE]] = jumps
+            # Scanning the (small) table dedupes the new frontier faster than np.unique
+            frontier = np.flatnonzero(dist == jumps)
+        return dist
+
+    def within(self, sources, max_jumps: int) -> np.ndarray:
+        """Sorted system codes at most ``max_jumps`` jumps from any of ``sources``."""
+        dist = self.distances(sources)
+        return np.flatnonzero((dist != UNREACHABLE) & (dist <= max_jumps))
+
+    def distance(self, source: int, target: int) -> int:
+        """Jumps between two systems (``UNREACHABLE`` if not connected)."""
+        return int(self.distances([source])[target])
+
+    def distance_table(self, systems: np.ndarray) -> np.ndarray:
+        """Pairwise jumps between ``systems`` (len x len), one BFS per system.
+
+        Tables already cached are reused, but new ones are not added so a large
+        table does not evict the route query cache.
+        """
+        systems = np.asarray(systems, dtype=np.int64)
+        table = np.empty((len(systems), len(systems)), dtype=DISTANCE_DTYPE)
+        for i, system in enumerate(systems.tolist()):
+            dist = self._cache.get((system,))
+            if dist is None:
+                dist = self._bfs(np.array([system], dtype=np.int64))
+            table[i] = dist[systems]
+        return table
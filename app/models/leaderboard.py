@@ -0,0 +1,94 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _ranked(values: np.ndarray, indices: np.ndarray, tiebreak: Optional[np.ndarray]) -> np.ndarray:
+    """``indices`` ordered by value descending, then tiebreak (or index) ascending."""
+    secondary = indices if tiebreak is None else tiebreak[indices]
+    return indices[np.lexsort((secondary, -values[indices]))]
+
+
+def top_n(values: np.ndarray, n: Optional[int], tiebreak: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the ``n`` largest values, best first, by partial selection.
+
+    Equal values are ordered by ``tiebreak`` (default: index), so the result equals
+    the first ``n`` entries of a full stable descending sort.
+    """
+    size = len(values)
+    if n is None or n >= size:
+        return _ranked(values, np.arange(size), tiebreak)
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    # Everything tied with the n-th largest value is a candidate, so ties resolve exactly
+    threshold = values[np.argpartition(-values, n - 1)[n - 1]]
+    candidates = np.flatnonzero(values >= threshold)
+    return _ranked(values, candidates, tiebreak)[:n]
+
+
+def descending_order(values: np.ndarray) -> np.ndarray:
+    """Positions sorting ``values`` descending, sorting only the positive entries.
+
+    Zero (and other non-positive) entries, usually the bulk of a value table, keep
+    their relative order after the positive ones.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    positive = np.flatnonzero(values > 0)
+    rest = np.flatnonzero(~(values > 0))
+    if (values[rest] != 0).any():
+        # Negative or NaN entries still need ordering among themselves
+        rest = rest[np.argsort(-values[rest], kind='stable')]
+    return np.concatenate([positive[np.argsort(-values[positive], kind='stable')], rest])
+
+
+class Leaderboard:
+    """The best ``capacity`` entries of a value vector, kept ranked under updates.
+
+    The vector is owned by the caller, who changes some entries in place and
+    passes their indices to ``update``. Only the current members and the changed
+    entries are re-ranked; a full partial selection runs again only when an
+    entry outside the board might now outrank a member.
+    """
+
+    def __init__(self, values: np.ndarray, capacity: int, tiebreak: Optional[np.ndarray] = None):
+        self.values = values
+        self.capacity = capacity
+        self.tiebreak = tiebreak
+        self.members = np.empty(0, dtype=np.int64)
+        # Rank key (-value, tiebreak) no entry outside the board can beat
+        self._bound: Optional[Tuple[float, int]] = None
+        self.rebuilds = 0
+        self.rebuild()
+
+    def _key(self, index: int) -> Tuple[float, int]:
+        return (-float(self.values[index]), int(index if self.tiebreak is None else self.tiebreak[index]))
+
+    def rebuild(self) -> None:
+        ranked = top_n(self.values, self.capacity + 1, self.tiebreak)
+        self.members = ranked[:self.capacity]
+        self._bound = self._key(ranked[self.capacity]) if len(ranked) > self.capacity else None
+        self.rebuilds += 1
+
+    def update(self, indices: np.ndarray) -> None:
+        """Re-rank after ``values[indices]`` changed."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+        candidates = _ranked(self.values, np.union1d(self.members, indices), self.tiebreak)
+        members = candidates[:self.capacity]
+        bound = self._bound
+        if len(candidates) > self.capacity:
+            leftover = self._key(candidates[self.capacity])
+            bound = leftover if bound is None else min(bound, leftover)
+        if bound is not None and len(members) and self._key(members[-1]) > bound:
+            # An entry that left the board, or one we no longer track, may rank higher
+            self.rebuild()
+            return
+        self.members = members
+        self._bound = bound
+
+    def top(self, n: Optional[int]) -> np.ndarray:
+        """Indices of the best ``n`` entries, best first."""
+        if n is not None and n <= self.capacity:
+            return self.members[:n]
+        return top_n(self.values, n, self.tiebreak)
@@ -0,0 +1,48 @@
+import struct
+import zlib
+from typing import Optional
+
+import numpy as np
+
+# Mining units per planet/resource row; a few dozen at most in practice
+UNITS_DTYPE = np.int16
+UNITS_MAX = int(np.iinfo(UNITS_DTYPE).max)
+# Hauled volume per unit of mined output (m3)
+RESOURCE_UNIT_VOLUME = 0.01
+
+MAGIC = b"EVMU"
+FORMAT_VERSION = 1
+# magic, format version, universe fingerprint (sha1 digest), number of rows
+_HEADER = struct.Struct("<4sH20sI")
+
+
+def clip_units(values: np.ndarray) -> np.ndarray:
+    """Clamp unit counts into the range the units vector can hold."""
+    return np.clip(values, 0, UNITS_MAX).astype(UNITS_DTYPE)
+
+
+def pack_units(units: np.ndarray, fingerprint: str) -> bytes:
+    """Serialize a dense units vector into the compact binary format.
+
+    The vector is stored little-endian and zlib-compressed, so a layout that is
+    mostly zeros takes a few hundred bytes.
+    """
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(fingerprint), len(units))
+    payload = np.ascontiguousarray(units, dtype=np.dtype(UNITS_DTYPE).newbyteorder('<')).tobytes()
+    return header + zlib.compress(payload)
+
+
+def unpack_units(data: bytes, fingerprint: str) -> Optional[np.ndarray]:
+    """Deserialize a units vector; returns None if it was written for another universe."""
+    if len(data) < _HEADER.size:
+        raise ValueError("Mining units data is truncated")
+    magic, version, digest, n_rows = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a mining units file")
+    if version != FORMAT_VERSION or digest != bytes.fromhex(fingerprint):
+        return None
+    payload = zlib.decompress(data[_HEADER.size:])
+    units = np.frombuffer(payload, dtype=np.dtype(UNITS_DTYPE).newbyteorder('<'))
+    if len(units) != n_rows:
+        raise ValueError("Mining units data is corrupt")
+    return units.astype(UNITS_DTYPE)
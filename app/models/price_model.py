@@ -1,6 +1,22 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 @dataclass
 class ResourcePrice:
     name: str
-    price: float 
\ No newline at end of file
+    price: float 
+
+
+@dataclass(frozen=True)
+class VersionedPrices:
+    """Immutable set of current prices with a process-wide unique version.
+
+    ``source`` names where it came from ('default', a history date, a CSV);
+    derived sets remember the version of the default set they were based on.
+    """
+
+    version: int
+    prices: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    source: str = "default"
+    base_version: Optional[int] = None
@@ -0,0 +1,38 @@
+import struct
+import zlib
+from typing import Dict
+
+import numpy as np
+
+MAGIC = b"EVPS"
+FORMAT_VERSION = 1
+# magic, format version, number of resources
+_HEADER = struct.Struct("<4sHI")
+_PRICE_DTYPE = np.dtype('<f8')
+
+
+def pack_prices(prices: Dict[str, float]) -> bytes:
+    """Serialize a ``{resource: price}`` dict into a compact price vector.
+
+    Prices are stored as little-endian float64 followed by the newline-joined
+    resource names (normalized names never contain newlines), zlib-compressed.
+    """
+    values = np.fromiter(prices.values(), dtype=_PRICE_DTYPE, count=len(prices))
+    names = "\n".join(prices).encode("utf-8")
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(prices)) + zlib.compress(values.tobytes() + names)
+
+
+def unpack_prices(data: bytes) -> Dict[str, float]:
+    """Deserialize a price vector written by ``pack_prices``."""
+    if len(data) < _HEADER.size:
+        raise ValueError("Price snapshot data is truncated")
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a price snapshot")
+    payload = zlib.decompress(data[_HEADER.size:])
+    split = count * _PRICE_DTYPE.itemsize
+    values = np.frombuffer(payload[:split], dtype=_PRICE_DTYPE)
+    names = payload[split:].decode("utf-8").split("\n") if count else []
+    if len(values) != count or len(names) != count:
+        raise ValueError("Price snapshot data is corrupt")
+    return dict(zip(names, values.tolist()))
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.models.universe import CONSTELLATION, REGION, SYSTEM, Universe
+
+SEARCH_LEVELS = (SYSTEM, CONSTELLATION, REGION)
+# Grams of length 1..GRAM so every query length can be served from postings
+GRAM = 3
+
+
+def _grams(text: str, size: int) -> set:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+@dataclass
+class NameSearchIndex:
+    """N-gram and sorted-prefix index over the distinct system/constellation/region names.
+
+    Every distinct name is an entry; entry ids map back to (level, code). Substring
+    queries intersect the postings of the query's n-grams and verify the few
+    remaining candidates; prefix queries binary-search the sorted lowercase names.
+    """
+
+    names: np.ndarray
+    levels: np.ndarray
+    codes: np.ndarray
+    postings: Dict[str, np.ndarray]
+    sorted_names: np.ndarray
+    sorted_entries: np.ndarray
+
+    @classmethod
+    def from_universe(cls, universe: Universe) -> "NameSearchIndex":
+        names: List[str] = []
+        levels: List[int] = []
+        codes: List[int] = []
+        for level_index, level in enumerate(SEARCH_LEVELS):
+            dictionary = universe.dictionaries[level]
+            names.extend(name.lower() for name in dictionary.tolist())
+            levels.extend([level_index] * len(dictionary))
+            codes.extend(range(len(dictionary)))
+
+        postings = defaultdict(list)
+        for entry, name in enumerate(names):
+            for size in range(1, GRAM + 1):
+                for gram in _grams(name, size):
+                    postings[gram].append(entry)
+
+        lowered = np.array(names, dtype=object)
+        order = np.argsort(lowered, kind='stable')
+        return cls(
+            names=lowered,
+            levels=np.array(levels, dtype=np.int8),
+            codes=np.array(codes, dtype=np.int64),
+            postings={gram: np.array(entries, dtype=np.int32) for gram, entries in postings.items()},
+            sorted_names=lowered[order].astype(str),
+            sorted_entries=order,
+        )
+
+    def substring(self, query: str) -> np.ndarray:
+        """Entry ids whose name contains ``query`` (case-insensitive)."""
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.names))
+        grams = sorted(_grams(query, min(GRAM, len(query))), key=lambda g: len(self.postings.get(g, ())))
+        candidates = self.postings.get(grams[0])
+        if candidates is None:
+            return np.empty(0, dtype=np.int32)
+        for gram in grams[1:]:
+            candidates = np.intersect1d(candidates, self.postings.get(gram, candidates[:0]), assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        if len(query) <= GRAM:
+            return candidates
+        # Grams can match out of order, so confirm the full substring
+        names = self.names[candidates]
+        return candidates[[query in name for name in names]]
+
+    def prefix(self, query: str) -> np.ndarray:
+        """Entry ids whose name starts with ``query`` (case-insensitive)."""
+        query = query.lower()
+        start = np.searchsorted(self.sorted_names, query, side='left')
+        end = np.searchsorted(self.sorted_names, query + "\uffff", side='left')
+        return self.sorted_entries[start:end]
+
+    def matches(self, query: str) -> Dict[str, np.ndarray]:
+        """Codes per level (system/constellation/region) whose name contains ``query``."""
+        entries = self.substring(query)
+        return {level: self.codes[entries[self.levels[entries] == i]] for i, level in enumerate(SEARCH_LEVELS)}
+
+    def rows(self, query: str, universe: Universe) -> np.ndarray:
+        """Sorted universe row ids in any system/constellation/region matching ``query``."""
+        hierarchy = universe.hierarchy()
+        parts = [hierarchy.rows_of(level, codes) for level, codes in self.matches(query).items() if len(codes)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+    def autocomplete(self, query: str, universe: Universe, limit: int = 10,
+                     levels: Sequence[str] = (SYSTEM, CONSTELLATION)) -> List[Tuple[str, str]]:
+        """Best ``(level, name)`` suggestions for a partially typed name.
+
+        Prefix matches rank before other substring matches, then shorter names first.
+        """
+        query = query.lower()
+        if not query:
+            return []
+        wanted = np.isin(self.levels, [SEARCH_LEVELS.index(level) for level in levels])
+        prefix = self.prefix(query)
+        prefix = prefix[wanted[prefix]]
+        ranked = sorted(prefix.tolist(), key=lambda e: (len(self.names[e]), self.names[e]))
+        if len(ranked) < limit:
+            seen = set(ranked)
+            others = [e for e in self.substring(query).tolist() if wanted[e] and e not in seen]
+            ranked.extend(sorted(others, key=lambda e: (len(self.names[e]), self.names[e])))
+        return [
+            (SEARCH_LEVELS[self.levels[e]], universe.decode(SEARCH_LEVELS[self.levels[e]], self.codes[e]))
+            for e in ranked[:limit]
+        ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 
 
@@ -49,6 +49,22 @@ class PriceHistory(Base):
     price_avg = Column(Float, nullable=True)
     date = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # History reads filter by user, then resource list, then date range
+    __table_args__ = (Index("ix_price_history_user_resource_date", "user_id", "resource", "date"),)
+
+
+class PriceSnapshot(Base):
+    __tablename__ = "price_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    # Matches the PriceHistory.date of the rows it was built from
+    taken_at = Column(DateTime, nullable=False)
+    # Packed {resource: price} vector (see app/models/price_snapshot.py)
+    data = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (Index("ix_price_snapshots_user_taken_at", "user_id", "taken_at"),)
+
 
 class MiningUnit(Base):
     __tablename__ = "mining_units"
@@ -59,3 +75,12 @@ class MiningUnit(Base):
     units = Column(Integer, nullable=False, default=0)
 
 
+class MiningUnitVector(Base):
+    __tablename__ = "mining_unit_vectors"
+
+    id = Column(Integer, primary_key=True)
+    # Units vector is aligned to the universe row ids identified by this fingerprint
+    universe_fingerprint = Column(String(40), unique=True, index=True, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
@@ -0,0 +1,408 @@
+import gc
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.models.data_model import Planet, PlanetaryResource, PlanetType, Richness
+from app.models.mining_units import UNITS_DTYPE, clip_units
+
+if TYPE_CHECKING:
+    from app.models.hierarchy import GeoHierarchy
+    from app.models.search_index import NameSearchIndex
+
+# Dictionary-encoded dimensions; names match the resource frame columns
+REGION = "Region"
+CONSTELLATION = "Constellation"
+SYSTEM = "System"
+PLANET = "Planet"
+TYPE = "Type"
+RESOURCE = "Resource"
+RICHNESS = "Richness"
+
+PLANET_DIMENSIONS = (REGION, CONSTELLATION, SYSTEM, PLANET, TYPE)
+ROW_DIMENSIONS = (RESOURCE, RICHNESS)
+
+
+def _enum_members(values: np.ndarray, enum_cls) -> np.ndarray:
+    """Validate distinct string values against an Enum and return the matching members."""
+    allowed = {member.value for member in enum_cls}
+    for value in values:
+        if value not in allowed:
+            raise ValueError(f"{value!r} is not a valid {enum_cls.__name__}")
+    members = np.empty(len(values), dtype=object)
+    members[:] = [enum_cls(value) for value in values]
+    return members
+
+
+def _encode(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode a string column into (codes, sorted dictionary)."""
+    categorical = pd.Categorical(values)
+    if (categorical.codes < 0).any():
+        raise ValueError("Missing values are not allowed in the planets dataset")
+    return categorical.codes, categorical.categories.to_numpy(dtype=object)
+
+
+@dataclass
+class Universe:
+    """Columnar planet/resource dataset grouped by planet.
+
+    Rows are ordered so that every planet's resources are contiguous; planet ``i``
+    owns rows ``planet_offsets[i]:planet_offsets[i + 1]``. Planets keep the order in
+    which they first appear in the source data and resources keep their source order.
+
+    String dimensions (region, constellation, system, planet, type, resource,
+    richness) are stored as integer codes into one sorted dictionary per dimension,
+    shared by every frame built from the universe.
+    """
+
+    # Per-row columns
+    planet_id: np.ndarray
+    resource_code: np.ndarray
+    richness_code: np.ndarray
+    output: np.ndarray
+    row_planet: np.ndarray
+    keys: np.ndarray
+    # Per-planet columns
+    planet_ids: np.ndarray
+    planet_offsets: np.ndarray
+    region_code: np.ndarray
+    constellation_code: np.ndarray
+    system_code: np.ndarray
+    planet_name_code: np.ndarray
+    planet_type_code: np.ndarray
+    # Sorted distinct values per dimension
+    dictionaries: Dict[str, np.ndarray]
+    _frame: Optional[pd.DataFrame] = field(default=None, init=False, repr=False, compare=False)
+    _key_index: Optional[pd.Index] = field(default=None, init=False, repr=False, compare=False)
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _dtypes: Dict[str, pd.CategoricalDtype] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _row_codes: Dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _hierarchy: Optional["GeoHierarchy"] = field(default=None, init=False, repr=False, compare=False)
+    _search_index: Optional["NameSearchIndex"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Validate enum dimensions up front so bad data fails at load time
+        self._planet_types = _enum_members(self.dictionaries[TYPE], PlanetType)
+        self._richnesses = _enum_members(self.dictionaries[RICHNESS], Richness)
+        # The universe is shared between all sessions of the process
+        arrays = list(vars(self).values()) + list(self.dictionaries.values())
+        for value in arrays:
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Universe":
+        """Build the columnar universe from the raw planets DataFrame."""
+        planet_id_col = df['Planet ID'].to_numpy(dtype=np.int64)
+        codes, planet_ids = pd.factorize(planet_id_col)
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes, minlength=len(planet_ids))
+        planet_offsets = np.zeros(len(planet_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=planet_offsets[1:])
+        # First row of every planet in the grouped order carries its attributes
+        first_rows = order[planet_offsets[:-1]]
+
+        def column(name: str) -> np.ndarray:
+            return df[name].to_numpy(dtype=object)
+
+        dictionaries = {}
+        encoded = {}
+        for dim, source, rows in (
+            (RESOURCE, 'Resource', order),
+            (RICHNESS, 'Richness', order),
+            (REGION, 'Region', first_rows),
+            (CONSTELLATION, 'Constellation', first_rows),
+            (SYSTEM, 'System', first_rows),
+            (PLANET, 'Planet Name', first_rows),
+            (TYPE, 'Planet Type', first_rows),
+        ):
+            encoded[dim], dictionaries[dim] = _encode(column(source)[rows])
+
+        planet_id = planet_id_col[order]
+        resource = dictionaries[RESOURCE][encoded[RESOURCE]]
+        keys = (pd.Series(planet_id).astype(str) + "_" + pd.Series(resource, dtype=object)).to_numpy(dtype=object)
+
+        return cls(
+            planet_id=planet_id,
+            resource_code=encoded[RESOURCE],
+            richness_code=encoded[RICHNESS],
+            output=df['Output'].to_numpy(dtype=np.float64)[order],
+            row_planet=np.repeat(np.arange(len(planet_ids), dtype=np.int32), counts),
+            keys=keys,
+            planet_ids=np.asarray(planet_ids, dtype=np.int64),
+            planet_offsets=planet_offsets,
+            region_code=encoded[REGION],
+            constellation_code=encoded[CONSTELLATION],
+            system_code=encoded[SYSTEM],
+            planet_name_code=encoded[PLANET],
+            planet_type_code=encoded[TYPE],
+            dictionaries=dictionaries,
+        )
+
+    def to_arrow(self) -> Tuple[pa.Table, pa.Table]:
+        """Encode the universe as (rows, planets) Arrow tables for the on-disk snapshot.
+
+        Dimensions are written as Arrow dictionary arrays carrying the universe's own
+        codes and dictionaries; numeric columns are stored as-is so they can be
+        memory-mapped without copying.
+        """
+        def encoded(dim: str, codes: np.ndarray) -> pa.DictionaryArray:
+            return pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(self.dictionaries[dim], type=pa.string()))
+
+        rows = pa.table({
+            "planet_id": pa.array(self.planet_id),
+            "resource": encoded(RESOURCE, self.resource_code),
+            "richness": encoded(RICHNESS, self.richness_code),
+            "output": pa.array(self.output),
+            "row_planet": pa.array(self.row_planet),
+            "key": pa.array(self.keys, type=pa.string()),
+        })
+        planets = pa.table({
+            "planet_id": pa.array(self.planet_ids),
+            "row_start": pa.array(self.planet_offsets[:-1]),
+            "region": encoded(REGION, self.region_code),
+            "constellation": encoded(CONSTELLATION, self.constellation_code),
+            "system": encoded(SYSTEM, self.system_code),
+            "name": encoded(PLANET, self.planet_name_code),
+            "type": encoded(TYPE, self.planet_type_code),
+        })
+        return rows, planets
+
+    @classmethod
+    def from_arrow(cls, rows: pa.Table, planets: pa.Table) -> "Universe":
+        """Rebuild the universe from snapshot tables, sharing numeric and code buffers."""
+        dictionaries = {}
+
+        def numeric(table: pa.Table, name: str) -> np.ndarray:
+            return table.column(name).combine_chunks().to_numpy(zero_copy_only=True)
+
+        def codes(table: pa.Table, name: str, dim: str) -> np.ndarray:
+            column = table.column(name).combine_chunks()
+            dictionaries[dim] = column.dictionary.to_numpy(zero_copy_only=False).astype(object)
+            return column.indices.to_numpy(zero_copy_only=True)
+
+        planet_offsets = np.append(numeric(planets, "row_start"), rows.num_rows).astype(np.int64)
+        return cls(
+            planet_id=numeric(rows, "planet_id"),
+            resource_code=codes(rows, "resource", RESOURCE),
+            richness_code=codes(rows, "richness", RICHNESS),
+            output=numeric(rows, "output"),
+            row_planet=numeric(rows, "row_planet"),
+            keys=rows.column("key").combine_chunks().to_numpy(zero_copy_only=False).astype(object),
+            planet_ids=numeric(planets, "planet_id"),
+            planet_offsets=planet_offsets,
+            region_code=codes(planets, "region", REGION),
+            constellation_code=codes(planets, "constellation", CONSTELLATION),
+            system_code=codes(planets, "system", SYSTEM),
+            planet_name_code=codes(planets, "name", PLANET),
+            planet_type_code=codes(planets, "type", TYPE),
+            dictionaries=dictionaries,
+        )
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.planet_id)
+
+    @property
+    def n_planets(self) -> int:
+        return len(self.planet_ids)
+
+    # --- Dictionary encoding ---
+    def dtype(self, dim: str) -> pd.CategoricalDtype:
+        """Shared categorical dtype of a dimension (categories are its dictionary)."""
+        dtype = self._dtypes.get(dim)
+        if dtype is None:
+            dtype = pd.CategoricalDtype(pd.Index(self.dictionaries[dim]), ordered=True)
+            self._dtypes[dim] = dtype
+        return dtype
+
+    def planet_codes(self, dim: str) -> np.ndarray:
+        """Per-planet codes of a planet-level dimension."""
+        return {
+            REGION: self.region_code,
+            CONSTELLATION: self.constellation_code,
+            SYSTEM: self.system_code,
+            PLANET: self.planet_name_code,
+            TYPE: self.planet_type_code,
+        }[dim]
+
+    def row_codes(self, dim: str) -> np.ndarray:
+        """Per-row codes of any dimension (planet-level ones are broadcast to rows)."""
+        if dim == RESOURCE:
+            return self.resource_code
+        if dim == RICHNESS:
+            return self.richness_code
+        codes = self._row_codes.get(dim)
+        if codes is None:
+            codes = self.planet_codes(dim)[self.row_planet]
+            codes.flags.writeable = False
+            self._row_codes[dim] = codes
+        return codes
+
+    def encode(self, dim: str, values: Iterable[str]) -> np.ndarray:
+        """Codes for the given values of a dimension (-1 for unknown values)."""
+        return self.dtype(dim).categories.get_indexer(list(values))
+
+    def decode(self, dim: str, codes) -> np.ndarray:
+        """Values for the given codes of a dimension."""
+        return self.dictionaries[dim][codes]
+
+    def categorical(self, dim: str, codes: np.ndarray) -> pd.Categorical:
+        """Wrap codes into a Categorical sharing the dimension's dictionary."""
+        return pd.Categorical.from_codes(codes, dtype=self.dtype(dim))
+
+    def hierarchy(self) -> "GeoHierarchy":
+        """Region -> constellation -> system -> planet -> row index, built on first use."""
+        if self._hierarchy is None:
+            from app.models.hierarchy import GeoHierarchy
+            self._hierarchy = GeoHierarchy.from_universe(self)
+        return self._hierarchy
+
+    def search_index(self) -> "NameSearchIndex":
+        """Substring/prefix index over system, constellation and region names."""
+        if self._search_index is None:
+            from app.models.search_index import NameSearchIndex
+            self._search_index = NameSearchIndex.from_universe(self)
+        return self._search_index
+
+    def price_vector(self, prices: Dict[str, float]) -> np.ndarray:
+        """Prices indexed by resource code (0 for resources without a price)."""
+        return np.array([float(prices.get(name, 0.0) or 0.0) for name in self.dictionaries[RESOURCE]],
+                        dtype=np.float64)
+
+    def resource_frame(self) -> pd.DataFrame:
+        """Static per-resource table (one row per planet/resource) used by the master table.
+
+        Dimension columns are categoricals over the universe dictionaries and the
+        index is the universe row id. Built once and shared; callers must copy
+        before adding per-user columns.
+        """
+        if self._frame is None:
+            self._frame = pd.DataFrame({
+                "id": self.keys,
+                SYSTEM: self.categorical(SYSTEM, self.row_codes(SYSTEM)),
+                CONSTELLATION: self.categorical(CONSTELLATION, self.row_codes(CONSTELLATION)),
+                REGION: self.categorical(REGION, self.row_codes(REGION)),
+                PLANET: self.categorical(PLANET, self.row_codes(PLANET)),
+                TYPE: self.categorical(TYPE, self.row_codes(TYPE)),
+                RESOURCE: self.categorical(RESOURCE, self.resource_code),
+                RICHNESS: self.categorical(RICHNESS, self.richness_code),
+                "Output/h/unit": self.output,
+            })
+        return self._frame
+
+    # --- Row ids and mining units ---
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the ordered row keys; row ids are only valid for a matching fingerprint."""
+        if self._fingerprint is None:
+            joined = "\n".join(self.keys.tolist()).encode('utf-8')
+            self._fingerprint = hashlib.sha1(joined).hexdigest()
+        return self._fingerprint
+
+    def row_ids(self, keys) -> np.ndarray:
+        """Row ids for ``{planet_id}_{resource}`` keys (-1 for unknown keys)."""
+        if self._key_index is None:
+            self._key_index = pd.Index(self.keys)
+        return self._key_index.get_indexer(list(keys))
+
+    def row_id(self, key: str) -> int:
+        """Row id for a single ``{planet_id}_{resource}`` key (-1 if unknown)."""
+        return int(self.row_ids([key])[0])
+
+    def units_vector(self, mining_units: Dict[str, int]) -> np.ndarray:
+        """Convert a legacy ``{planet_id}_{resource}`` units map into a dense row vector."""
+        units = np.zeros(self.n_rows, dtype=UNITS_DTYPE)
+        if not mining_units:
+            return units
+        positions = self.row_ids(mining_units.keys())
+        found = positions >= 0
+        values = np.fromiter(mining_units.values(), dtype=np.int64, count=len(mining_units))
+        units[positions[found]] = clip_units(values[found])
+        return units
+
+    def units_map(self, units: np.ndarray) -> Dict[str, int]:
+        """Convert a dense row vector back into the legacy map (non-zero entries only)."""
+        rows = np.flatnonzero(units)
+        return dict(zip(self.keys[rows].tolist(), units[rows].tolist()))
+
+    # --- Object views ---
+    def planet_rows(self, planet_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids of the given planets (in order) and their offsets within that selection."""
+        planet_indices = np.asarray(planet_indices, dtype=np.int64)
+        starts = self.planet_offsets[planet_indices]
+        counts = self.planet_offsets[planet_indices + 1] - starts
+        offsets = np.zeros(len(planet_indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        rows = np.arange(offsets[-1]) + np.repeat(starts - offsets[:-1], counts)
+        return rows, offsets
+
+    def build_planets(self, units: Optional[np.ndarray] = None,
+                      planet_indices: Optional[np.ndarray] = None) -> Dict[int, Planet]:
+        """Materialize Planet/PlanetaryResource objects from the columns.
+
+        ``planet_indices`` restricts (and orders) the planets that are built.
+        """
+        if units is None:
+            units = np.zeros(self.n_rows, dtype=UNITS_DTYPE)
+        if planet_indices is None:
+            planet_indices = np.arange(self.n_planets)
+            rows, offsets = slice(None), self.planet_offsets
+        else:
+            rows, offsets = self.planet_rows(planet_indices)
+        # Allocating ~150k dataclasses back to back triggers repeated full GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._build_planets(units, planet_indices, rows, offsets)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _build_planets(self, units: np.ndarray, planet_indices: np.ndarray, rows, offsets: np.ndarray) -> Dict[int, Planet]:
+        region = self.decode(REGION, self.region_code[planet_indices])
+        constellation = self.decode(CONSTELLATION, self.constellation_code[planet_indices])
+        system = self.decode(SYSTEM, self.system_code[planet_indices])
+        name = self.decode(PLANET, self.planet_name_code[planet_indices])
+        planet_type = self._planet_types[self.planet_type_code[planet_indices]]
+
+        # Position of every selected row's planet within the selection
+        row_planet = np.repeat(np.arange(len(planet_indices)), np.diff(offsets))
+        resources: List[PlanetaryResource] = list(map(
+            PlanetaryResource,
+            self.planet_id[rows].tolist(),
+            region[row_planet].tolist(),
+            constellation[row_planet].tolist(),
+            system[row_planet].tolist(),
+            name[row_planet].tolist(),
+            planet_type[row_planet].tolist(),
+            self.decode(RESOURCE, self.resource_code[rows]).tolist(),
+            self._richnesses[self.richness_code[rows]].tolist(),
+            self.output[rows].tolist(),
+            units[rows].tolist(),
+        ))
+
+        planets: Dict[int, Planet] = {}
+        offsets = offsets.tolist()
+        for i, (planet_id, planet_region, planet_constellation, planet_system, planet_name, ptype) in enumerate(zip(
+            self.planet_ids[planet_indices].tolist(),
+            region.tolist(),
+            constellation.tolist(),
+            system.tolist(),
+            name.tolist(),
+            planet_type.tolist(),
+        )):
+            planets[planet_id] = Planet(
+                planet_id=planet_id,
+                region=planet_region,
+                constellation=planet_constellation,
+                system=planet_system,
+                name=planet_name,
+                planet_type=ptype,
+                resources=resources[offsets[i]:offsets[i + 1]],
+            )
+        return planets
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import List, Mapping, Optional
+
+import numpy as np
+
+from app.models.allocation import exact_allocation, greedy_allocation
+from app.models.mining_units import RESOURCE_UNIT_VOLUME, UNITS_DTYPE
+
+
+@dataclass
+class AllocationPlan:
+    """Optimized units layout: the full units vector and its net hourly income."""
+
+    units: np.ndarray
+    net_hourly: float
+    exact: bool
+
+    @property
+    def rows(self) -> np.ndarray:
+        return np.flatnonzero(self.units)
+
+
+class AllocationService:
+    """Places a budget of mining units to maximize net income at current prices.
+
+    Constraints: a total unit budget, at most ``max_units_per_planet`` units on
+    any planet, an optional region/constellation/system scope and, when a
+    storage capacity and haul interval are given, no planet's storage may fill
+    up between hauls.
+    """
+
+    def __init__(self, data_service, price_service):
+        self.data_service = data_service
+        self.price_service = price_service
+
+    def optimize(self, budget: int, max_units_per_planet: int,
+                 regions: Optional[List[str]] = None,
+                 constellations: Optional[List[str]] = None,
+                 systems: Optional[List[str]] = None,
+                 storage_capacity: float = 0.0, haul_hours: Optional[float] = None,
+                 tax_rate: float = 0.0, exact: bool = False,
+                 prices: Optional[Mapping[str, float]] = None) -> AllocationPlan:
+        """Best assignment of ``budget`` units; ``tax_rate`` is a percentage.
+
+        Rows are valued at ``prices`` (default: the current price set).
+
+        The greedy solver is fast enough for the whole universe and optimal when
+        storage does not bind; ``exact=True`` solves the integer program exactly
+        for small scopes and raises ValueError for large ones.
+        """
+        universe = self.data_service.universe
+        rows = self.data_service.select_rows(regions, constellations, systems)
+        if rows is None:
+            rows = np.arange(universe.n_rows)
+        price_vector = universe.price_vector(self.price_service.get_all_prices() if prices is None else prices)
+        values = universe.output[rows] * price_vector[universe.resource_code[rows]] * (1 - tax_rate / 100)
+        if storage_capacity > 0 and haul_hours:
+            volumes = universe.output[rows] * RESOURCE_UNIT_VOLUME * haul_hours
+            volume_cap = float(storage_capacity)
+        else:
+            volumes = np.zeros(len(rows))
+            volume_cap = np.inf
+
+        # Rows come in universe order, so each planet's rows are contiguous
+        planets = universe.row_planet[rows]
+        starts = np.flatnonzero(np.r_[True, planets[1:] != planets[:-1]]) if len(rows) else np.empty(0, dtype=np.int64)
+        solver = exact_allocation if exact else greedy_allocation
+        row_units = solver(values, volumes, starts, int(budget), int(max_units_per_planet), volume_cap)
+
+        units = np.zeros(universe.n_rows, dtype=UNITS_DTYPE)
+        units[rows] = row_units
+        return AllocationPlan(units=units, net_hourly=float(row_units @ values), exact=exact)
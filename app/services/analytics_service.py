@@ -1,78 +1,262 @@
-from typing import Dict, List, Tuple
-from app.models.data_model import Planet, PlanetaryResource
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.data_model import Planet
+from app.models.leaderboard import Leaderboard, descending_order, top_n as top_n_indices
+from app.models.mining_units import RESOURCE_UNIT_VOLUME
+from app.models.universe import CONSTELLATION, REGION, RESOURCE, SYSTEM
+
+# Key of the per-planet values (indexed by universe planet index) next to the group levels
+PLANETS = "planets"
+# Levels rolled up from planet values
+LEVELS = (SYSTEM, CONSTELLATION, REGION)
+
 
 class AnalyticsService:
+    """Profitability analytics over the shared universe and the user's units/prices.
+
+    Row, planet and system/constellation/region values are cached; each call
+    diffs the current units vector and price vector against the cached ones and
+    recomputes only the affected planets and groups. Top-N rankings come from
+    leaderboards that are updated with the changed entries instead of re-sorted.
+
+    One instance serves all of a user's sessions, so syncing the caches and
+    reading from them happen under the instance's lock. Readers take an
+    optional ``prices`` mapping (a session's selected price set); without it
+    they use the price service's current default set.
+    """
+
+    # Entries kept ranked per leaderboard; larger requests use a partial selection
+    LEADERBOARD_SIZE = 500
+
     def __init__(self, data_service, price_service):
         self.data_service = data_service
         self.price_service = price_service
-        
-    def get_most_profitable_planets(self, top_n: int = 10) -> List[Tuple[Planet, float]]:
+        self._universe = None
+        self._units: Optional[np.ndarray] = None
+        self._price_vector: Optional[np.ndarray] = None
+        self._row_values: Optional[np.ndarray] = None
+        # PLANETS or level -> value per planet index / level code
+        self._values: Dict[str, np.ndarray] = {}
+        self._tiebreaks: Dict[str, Optional[np.ndarray]] = {}
+        self._boards: Dict[str, Leaderboard] = {}
+        # Reentrant: public readers hold it around _sync and their reads of the caches
+        self._lock = threading.RLock()
+
+    def _price_mapping(self, prices: Optional[Mapping[str, float]]) -> Mapping[str, float]:
+        return self.price_service.get_all_prices() if prices is None else prices
+
+    def _sync(self, prices: Optional[Mapping[str, float]] = None) -> None:
+        """Bring cached values and leaderboards up to date with units and ``prices`` (lock held)."""
+        universe = self.data_service.universe
+        # Copied before diffing, so an edit landing meanwhile is seen by the next sync
+        units = self.data_service.get_units_vector().copy()
+        price_vector = universe.price_vector(self._price_mapping(prices))
+        if self._universe is not universe:
+            self._full_refresh(universe, units, price_vector)
+            return
+        rows = np.flatnonzero(units != self._units)
+        changed_codes = np.flatnonzero(price_vector != self._price_vector)
+        if len(changed_codes):
+            rows = np.union1d(rows, np.flatnonzero(np.isin(universe.resource_code, changed_codes)))
+        self._units = units
+        self._price_vector = price_vector
+        if len(rows):
+            self._apply_row_changes(universe, rows)
+
+    def _full_refresh(self, universe, units: np.ndarray, price_vector: np.ndarray) -> None:
+        self._universe = universe
+        self._units = units.copy()
+        self._price_vector = price_vector
+        self._row_values = universe.output * price_vector[universe.resource_code] * units
+        planet_values = np.bincount(universe.row_planet, weights=self._row_values, minlength=universe.n_planets)
+        self._values = {PLANETS: planet_values}
+        self._tiebreaks = {PLANETS: None}
+        for level in LEVELS:
+            # Sums planet totals rather than rows, so results match adding up planets
+            codes = universe.planet_codes(level)
+            self._values[level] = np.bincount(codes, weights=planet_values, minlength=len(universe.dictionaries[level]))
+            # Equal values rank in order of first appearance, like the old per-planet loops
+            rank = np.zeros(len(universe.dictionaries[level]), dtype=np.int64)
+            rank[self._first_seen_order(codes)] = np.arange(len(np.unique(codes)))
+            self._tiebreaks[level] = rank
+        self._boards = {}
+
+    def _apply_row_changes(self, universe, rows: np.ndarray) -> None:
+        """Recompute the values of ``rows`` and of every planet and group containing them.
+
+        Affected sums are rebuilt from their members in universe order, so they are
+        bit-identical to a full recomputation.
+        """
+        self._row_values[rows] = universe.output[rows] * self._price_vector[universe.resource_code[rows]] * self._units[rows]
+        planets = np.unique(universe.row_planet[rows])
+        planet_rows, offsets = universe.planet_rows(planets)
+        local = np.repeat(np.arange(len(planets)), np.diff(offsets))
+        planet_values = self._values[PLANETS]
+        planet_values[planets] = np.bincount(local, weights=self._row_values[planet_rows], minlength=len(planets))
+        changed = {PLANETS: planets}
+        hierarchy = universe.hierarchy()
+        for level in LEVELS:
+            level_codes = universe.planet_codes(level)
+            codes = np.unique(level_codes[planets])
+            members = hierarchy.planets_of(level, codes)
+            local = np.searchsorted(codes, level_codes[members])
+            self._values[level][codes] = np.bincount(local, weights=planet_values[members], minlength=len(codes))
+            changed[level] = codes
+        for level, board in self._boards.items():
+            board.update(changed[level])
+
+    def _planet_values(self, prices: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Hourly value of every universe planet, summed over its resources (a copy)."""
+        with self._lock:
+            self._sync(prices)
+            return self._values[PLANETS].copy()
+
+    def _rollup(self, level: str, prices: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Hourly value per code of ``level`` (system, constellation or region), a copy."""
+        with self._lock:
+            self._sync(prices)
+            return self._values[level].copy()
+
+    @staticmethod
+    def _first_seen_order(codes: np.ndarray) -> np.ndarray:
+        """Distinct codes ordered by their first occurrence in ``codes``."""
+        unique_codes, first_index = np.unique(codes, return_index=True)
+        return unique_codes[np.argsort(first_index, kind='stable')]
+
+    def _top(self, level: str, top_n: Optional[int],
+             prices: Optional[Mapping[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Best ``top_n`` indices/codes of ``level`` (PLANETS or a group level), best first, and their values."""
+        with self._lock:
+            self._sync(prices)
+            values = self._values[level]
+            if top_n is not None and top_n <= self.LEADERBOARD_SIZE:
+                board = self._boards.get(level)
+                if board is None:
+                    board = Leaderboard(values, self.LEADERBOARD_SIZE, self._tiebreaks[level])
+                    self._boards[level] = board
+                top = board.top(top_n)
+            else:
+                top = top_n_indices(values, top_n, self._tiebreaks[level])
+            return top, values[top]
+
+    def _top_by_level(self, level: str, top_n: Optional[int],
+                      prices: Optional[Mapping[str, float]] = None) -> List[Tuple[str, float]]:
+        """``(name, value)`` of the most valuable codes of ``level``, ties in order of first appearance."""
+        codes, values = self._top(level, top_n, prices)
+        return list(zip(self.data_service.universe.decode(level, codes).tolist(), values.tolist()))
+
+    def get_most_profitable_planets(self, top_n: int = 10,
+                                    prices: Optional[Mapping[str, float]] = None) -> List[Tuple[Planet, float]]:
         """Get the most profitable planets based on current prices"""
-        planets = self.data_service.get_all_planets()
-        prices = self.price_service.get_all_prices()
-        
-        # Calculate value for each planet
-        planet_values = [(planet, planet.total_value(prices)) for planet in planets]
-        
-        # Sort by value descending
-        planet_values.sort(key=lambda x: x[1], reverse=True)
-        
-        return planet_values[:top_n]
-    
-    def get_most_profitable_systems(self, top_n: int = 10) -> List[Tuple[str, float]]:
+        # Ties keep universe order
+        top, values = self._top(PLANETS, top_n, prices)
+
+        planets = self.data_service.get_planets_at(top)
+        return list(zip(planets, values.tolist()))
+
+    def get_most_profitable_systems(self, top_n: int = 10,
+                                    prices: Optional[Mapping[str, float]] = None) -> List[Tuple[str, float]]:
         """Get the most profitable systems based on current prices"""
-        planets = self.data_service.get_all_planets()
-        prices = self.price_service.get_all_prices()
-        
-        # Group planets by system
-        systems = {}
-        for planet in planets:
-            if planet.system not in systems:
-                systems[planet.system] = 0
-            systems[planet.system] += planet.total_value(prices)
-        
-        # Convert to list and sort
-        system_values = [(system, value) for system, value in systems.items()]
-        system_values.sort(key=lambda x: x[1], reverse=True)
-        
-        return system_values[:top_n]
-    
+        return self._top_by_level(SYSTEM, top_n, prices)
+
+    def get_most_profitable_constellations(self, top_n: int = 10,
+                                           prices: Optional[Mapping[str, float]] = None) -> List[Tuple[str, float]]:
+        """Get the most profitable constellations based on current prices"""
+        return self._top_by_level(CONSTELLATION, top_n, prices)
+
+    def get_most_profitable_regions(self, top_n: int = 10,
+                                    prices: Optional[Mapping[str, float]] = None) -> List[Tuple[str, float]]:
+        """Get the most profitable regions based on current prices"""
+        return self._top_by_level(REGION, top_n, prices)
+
+    def get_value_rollup(self, prices: Optional[Mapping[str, float]] = None) -> Dict[str, Dict[str, float]]:
+        """Hourly value of every region, constellation and system."""
+        universe = self.data_service.universe
+        with self._lock:
+            self._sync(prices)
+            return {level: dict(zip(universe.dictionaries[level].tolist(), self._values[level].tolist()))
+                    for level in (REGION, CONSTELLATION, SYSTEM)}
+
+    def analysis_table(self, regions=(), constellations=(), systems=(), search_query: str = "",
+                       resources=(), prices: Optional[Mapping[str, float]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Filtered per-resource table with the user's units and values, plus its display order.
+
+        The table is indexed by resource id; the display copy lists rows by
+        descending total value.
+        """
+        df = self.data_service.get_resource_frame()
+        rows = self.data_service.select_rows(list(regions), list(constellations), list(systems), search_query)
+        if rows is not None:
+            df = df.iloc[rows]
+        if resources:
+            df = df[df['Resource'].isin(list(resources))]
+
+        df = df.copy()
+        df['Mining Units'] = self.data_service.get_units_for_rows(df.index)
+        # Prices are looked up by resource code rather than by name
+        price_vector = self.data_service.universe.price_vector(self._price_mapping(prices))
+        df["Value/h/unit"] = df["Output/h/unit"] * price_vector[df['Resource'].cat.codes.to_numpy()]
+        df["Total Value/h"] = df["Value/h/unit"] * df["Mining Units"]
+        if df.empty:
+            return df, df
+        df = df.set_index("id")
+        # Only rows with a value need ordering; the unassigned bulk keeps its order after them
+        return df, df.iloc[descending_order(df["Total Value/h"].to_numpy())]
+
+    @staticmethod
+    def income_table(table: pd.DataFrame, tax_rate: float) -> pd.DataFrame:
+        """Rows of an analysis table with units, with gross/net income and hauled volume."""
+        summary = table[table['Mining Units'] > 0].copy()
+        if summary.empty:
+            return summary
+        summary['Gross Daily Income'] = summary['Total Value/h'] * 24
+        summary['Gross Weekly Income'] = summary['Total Value/h'] * 24 * 7
+        summary['Gross Monthly Income'] = summary['Total Value/h'] * 24 * 30
+        tax_multiplier = 1 - (tax_rate / 100)
+        for period in ("Daily", "Weekly", "Monthly"):
+            summary[f'Net {period} Income'] = summary[f'Gross {period} Income'] * tax_multiplier
+        summary['Hourly Volume (m3)'] = summary['Output/h/unit'] * summary['Mining Units'] * RESOURCE_UNIT_VOLUME
+        return summary
+
     def get_resource_distribution(self, resource_name: str) -> Dict[str, int]:
         """Get distribution of a specific resource across regions"""
-        planets = self.data_service.get_all_planets()
-        distribution = {}
-        
-        for planet in planets:
-            for resource in planet.resources:
-                if resource.resource == resource_name:
-                    if planet.region not in distribution:
-                        distribution[planet.region] = 0
-                    distribution[planet.region] += 1
-        
-        return distribution
-    
-    def get_optimal_mining_route(self, starting_system: str, max_jumps: int = 5) -> List[Tuple[Planet, float]]:
-        """Get optimal mining route from a starting system"""
-        # This would require jump distance data which isn't in the dataset
-        # For now, return nearby profitable planets
-        planets = self.data_service.get_all_planets()
-        prices = self.price_service.get_all_prices()
-        
-        # Filter planets in the same constellation as starting system
-        starting_constellation = None
-        for planet in planets:
-            if planet.system == starting_system:
-                starting_constellation = planet.constellation
-                break
-        
-        if not starting_constellation:
+        universe = self.data_service.universe
+        resource_code = universe.encode(RESOURCE, [resource_name])[0]
+        if resource_code < 0:
+            return {}
+
+        region_codes = universe.row_codes(REGION)[universe.resource_code == resource_code]
+        counts = np.bincount(region_codes, minlength=len(universe.dictionaries[REGION]))
+        regions = self._first_seen_order(region_codes)
+
+        return dict(zip(universe.decode(REGION, regions).tolist(), counts[regions].tolist()))
+
+    def get_optimal_mining_route(self, starting_system: str, max_jumps: int = 5, top_n: Optional[int] = None,
+                                 prices: Optional[Mapping[str, float]] = None) -> List[Tuple[Planet, float]]:
+        """Get the most valuable planets within ``max_jumps`` of a starting system.
+
+        Uses the stargate graph when jump data is installed; without it, falls
+        back to the planets in the starting system's constellation.
+        """
+        universe = self.data_service.universe
+        system_code = universe.encode(SYSTEM, [starting_system])[0]
+        if system_code < 0:
             return []
-        
-        # Get planets in the same constellation
-        nearby_planets = [p for p in planets if p.constellation == starting_constellation]
-        
-        # Calculate value and sort
-        planet_values = [(planet, planet.total_value(prices)) for planet in nearby_planets]
-        planet_values.sort(key=lambda x: x[1], reverse=True)
-        
-        return planet_values 
\ No newline at end of file
+
+        hierarchy = universe.hierarchy()
+        graph = self.data_service.get_jump_graph()
+        if graph is not None:
+            nearby = hierarchy.planets_of(SYSTEM, graph.within([system_code], max_jumps))
+        else:
+            nearby = hierarchy.planets_of(CONSTELLATION, hierarchy.parent[SYSTEM][[system_code]])
+
+        # Ties keep universe order
+        values = self._planet_values(prices)[nearby]
+        order = top_n_indices(values, top_n)
+
+        planets = self.data_service.get_planets_at(nearby[order])
+        return list(zip(planets, values[order].tolist()))
@@ -1,33 +1,107 @@
 import pandas as pd
+import numpy as np
 import json
 import os
+import zlib
 from typing import Dict, List, Optional
-from app.models.data_model import Planet, PlanetaryResource, PlanetType, Richness
+from app.memo import next_version
+from app.models.data_model import Planet
+from app.models.jump_graph import JumpGraph
+from app.models.mining_units import clip_units, pack_units, unpack_units
+from app.models.universe import CONSTELLATION, REGION, RESOURCE, SYSTEM, Universe
+from app.services.universe_service import load_jump_graph, load_universe
+
+# Fold the units patch log into the packed vector once it grows past this size
+LOG_COMPACT_BYTES = 64 * 1024
 
 class DataService:
-    def __init__(self, data_path: str, mining_units_path: str = "data/mining_units.json"):
+    """Per-user view of the shared planet universe.
+
+    The universe (regions, systems, planets, resources, outputs) is loaded once per
+    process and shared read-only; this service only holds the user's mining units
+    as a dense vector indexed by universe row id.
+    """
+
+    def __init__(self, data_path: str, mining_units_path: str = "data/mining_units.json",
+                 universe: Optional[Universe] = None):
         self.data_path = data_path
         self.mining_units_path = mining_units_path
+        self.units_path = os.path.splitext(mining_units_path)[0] + ".bin"
+        self.units_log_path = os.path.splitext(mining_units_path)[0] + ".log"
         self.df = None
-        self.planets = {}
+        self.universe: Optional[Universe] = universe
+        self.units: Optional[np.ndarray] = None
+        # Bumped whenever the units vector changes, so derived views can be memoized
+        self.units_version = next_version()
+        # Row ids changed since the last save
+        self._dirty = set()
+        self._planets: Optional[Dict[int, Planet]] = None
         self.resources_set = set()
-        
+
     def load_data(self) -> None:
-        """Load data from Parquet or Excel file and merge with mining units"""
-        parquet_path = self.data_path.replace('.xlsx', '.parquet')
-        
-        if os.path.exists(parquet_path):
-            self.df = pd.read_parquet(parquet_path, engine='pyarrow')
-        elif os.path.exists(self.data_path):
-            self.df = pd.read_excel(self.data_path, engine='openpyxl')
-        else:
-            raise FileNotFoundError(f"Data file not found at {self.data_path} or {parquet_path}")
+        """Attach the shared universe and load this user's mining units"""
+        if self.universe is None:
+            self.universe = load_universe(self.data_path)
+        self.df = self.universe.resource_frame()
+        self.resources_set = set(self.universe.dictionaries[RESOURCE].tolist())
+        self.units = self._load_units()
+        self.units_version = next_version()
+        self._dirty = set()
+        self._planets = None
+
+    def _load_units(self) -> np.ndarray:
+        """Load the units vector, migrating from the legacy key map when needed.
+
+        The file backend then replays the patch log written by incremental saves.
+        """
+        from app.config import settings
+        fingerprint = self.universe.fingerprint
+        if settings.DATA_BACKEND == "sql":
+            from app.services.mining_units_service_sql import SQLMiningUnitsService
+            service = SQLMiningUnitsService()
+            units = self._unpack(service.load_vector(fingerprint))
+            if units is None:
+                # Missing or written for another universe: rebuild it from the key table once
+                units = self.universe.units_vector(service.load_units_map())
+                service.save_vector(fingerprint, pack_units(units, fingerprint))
+            return units
+        packed = None
+        if os.path.exists(self.units_path):
+            with open(self.units_path, 'rb') as f:
+                packed = f.read()
+        units = self._unpack(packed)
+        if units is None:
+            units = self.universe.units_vector(self._load_mining_units())
+        self._replay_units_log(units)
+        return units
+
+    def _unpack(self, packed: Optional[bytes]) -> Optional[np.ndarray]:
+        """Packed units vector for the current universe, or None if missing/stale/corrupt."""
+        if not packed:
+            return None
+        try:
+            return unpack_units(packed, self.universe.fingerprint)
+        except (ValueError, zlib.error):
+            return None
+
+    def _replay_units_log(self, units: np.ndarray) -> None:
+        """Apply the ``{key: units}`` patches appended since the last compaction, in order."""
+        if not os.path.exists(self.units_log_path):
+            return
+        with open(self.units_log_path, 'r') as f:
+            for line in f:
+                try:
+                    patch = json.loads(line)
+                except json.JSONDecodeError:
+                    # A save interrupted mid-write leaves a torn last line
+                    break
+                rows = self.universe.row_ids(patch.keys())
+                found = rows >= 0
+                values = np.fromiter(patch.values(), dtype=np.int64, count=len(patch))
+                units[rows[found]] = clip_units(values[found])
 
-        mining_units = self._load_mining_units()
-        self._process_data(mining_units)
-        
     def _load_mining_units(self) -> Dict[str, int]:
-        """Load mining units. Uses SQL backend if enabled, otherwise JSON file."""
+        """Load the legacy units map. Uses SQL backend if enabled, otherwise JSON file."""
         from app.config import settings
         if settings.DATA_BACKEND == "sql":
             from app.services.mining_units_service_sql import SQLMiningUnitsService
@@ -40,114 +114,212 @@ class DataService:
                 return {}
         return {}
 
-    def save_mining_units(self) -> None:
-        """Save mining units. Uses SQL backend if enabled, otherwise JSON file."""
-        mining_units = {}
-        for planet in self.planets.values():
-            for resource in planet.resources:
-                if resource.mining_units > 0:
-                    key = f"{resource.planet_id}_{resource.resource}"
-                    mining_units[key] = resource.mining_units
+    def save_mining_units(self, compact: bool = False) -> None:
+        """Persist the mining units changed since the last save.
 
+        SQL writes the changed keys in one batched upsert and patches the packed
+        vector in the same transaction. The file backend appends them to a patch
+        log and folds the log into the packed vector and the legacy JSON map once
+        it exceeds ``LOG_COMPACT_BYTES`` (or when ``compact`` is set).
+        """
+        if not self._dirty and not compact:
+            return
+        rows = np.fromiter(sorted(self._dirty), dtype=np.int64, count=len(self._dirty))
+        delta = dict(zip(self.universe.keys[rows].tolist(), self.units[rows].tolist()))
         from app.config import settings
         if settings.DATA_BACKEND == "sql":
             from app.services.mining_units_service_sql import SQLMiningUnitsService
-            SQLMiningUnitsService().save_units_map(mining_units)
-            return
-        os.makedirs(os.path.dirname(self.mining_units_path), exist_ok=True)
-        with open(self.mining_units_path, 'w') as f:
-            json.dump(mining_units, f, indent=4)
-
-    def _process_data(self, mining_units: Dict[str, int]) -> None:
-        """Process the dataframe into Planet and PlanetaryResource objects"""
-        for _, row in self.df.iterrows():
-            planet_id = int(row['Planet ID'])
-            resource = row['Resource']
-            
-            # Add to resource set
-            self.resources_set.add(resource)
-            
-            key = f"{planet_id}_{resource}"
-            num_units = mining_units.get(key, 0)
-
-            # Create planetary resource
-            planetary_resource = PlanetaryResource(
-                planet_id=planet_id,
-                region=row['Region'],
-                constellation=row['Constellation'],
-                system=row['System'],
-                planet_name=row['Planet Name'],
-                planet_type=PlanetType(row['Planet Type']),
-                resource=resource,
-                richness=Richness(row['Richness']),
-                output=float(row['Output']),
-                mining_units=num_units
-            )
-            
-            # Add to planet or create new planet
-            if planet_id not in self.planets:
-                self.planets[planet_id] = Planet(
-                    planet_id=planet_id,
-                    region=row['Region'],
-                    constellation=row['Constellation'],
-                    system=row['System'],
-                    name=row['Planet Name'],
-                    planet_type=PlanetType(row['Planet Type'])
-                )
-            
-            self.planets[planet_id].add_resource(planetary_resource)
-    
+            SQLMiningUnitsService().save_units_delta(delta, self.universe.fingerprint, rows)
+        else:
+            os.makedirs(os.path.dirname(self.mining_units_path), exist_ok=True)
+            if delta:
+                with open(self.units_log_path, 'a') as f:
+                    f.write(json.dumps(delta, separators=(',', ':')) + "\n")
+            if compact or (os.path.exists(self.units_log_path)
+                           and os.path.getsize(self.units_log_path) >= LOG_COMPACT_BYTES):
+                self._compact_units()
+        self._dirty.clear()
+
+    def _compact_units(self) -> None:
+        """Rewrite the packed vector and legacy JSON map, then drop the patch log.
+
+        Patches hold absolute values, so replaying a log that survived a crash
+        after the rewrite is harmless.
+        """
+        _write_atomic(self.units_path, pack_units(self.units, self.universe.fingerprint))
+        _write_atomic(self.mining_units_path, json.dumps(self.mining_units, indent=4).encode())
+        if os.path.exists(self.units_log_path):
+            os.remove(self.units_log_path)
+
+    @property
+    def mining_units(self) -> Dict[str, int]:
+        """Legacy ``{planet_id}_{resource}`` map of the non-zero mining units."""
+        return self.universe.units_map(self.units)
+
+    @property
+    def planets(self) -> Dict[int, Planet]:
+        """Planet objects with this user's mining units, materialized on first use."""
+        if self._planets is None:
+            self._planets = self.universe.build_planets(self.units)
+        return self._planets
+
     def get_all_planets(self) -> List[Planet]:
         """Return list of all planets"""
         return list(self.planets.values())
-    
+
+    def get_planets_at(self, planet_indices) -> List[Planet]:
+        """Planet objects for the given universe planet indices, in that order.
+
+        Only the requested planets are materialized unless all of them already are.
+        """
+        if self._planets is not None:
+            return [self._planets[planet_id] for planet_id in self.universe.planet_ids[planet_indices].tolist()]
+        return list(self.universe.build_planets(self.units, planet_indices).values())
+
     def get_all_resources(self) -> List[str]:
         """Returns a list of all unique resource names."""
-        if self.df is not None:
-            return self.df['Resource'].unique().tolist()
+        if self.universe is not None:
+            return self.universe.dictionaries[RESOURCE].tolist()
         return []
 
+    def get_resource_frame(self) -> pd.DataFrame:
+        """Shared static table with one row per planet/resource (no per-user columns).
+
+        Its index is the universe row id.
+        """
+        return self.universe.resource_frame()
+
+    def get_units_vector(self) -> np.ndarray:
+        """Mining units aligned with the universe rows (read it; write via ``update_mining_units``)."""
+        return self.units
+
+    def get_scoped_units_vector(self, rows) -> np.ndarray:
+        """Copy of the units vector with every row outside ``rows`` (universe row ids) set to 0."""
+        rows = np.asarray(rows, dtype=np.int64)
+        units = np.zeros_like(self.units)
+        units[rows] = self.units[rows]
+        return units
+
+    def get_row_values(self, prices: Dict[str, float]) -> np.ndarray:
+        """Hourly value of every universe row (output x price x mining units)."""
+        universe = self.universe
+        return universe.output * universe.price_vector(prices)[universe.resource_code] * self.units
+
+    def search_rows(self, query: str) -> np.ndarray:
+        """Sorted universe row ids whose System, Constellation or Region contains ``query``."""
+        return self.universe.search_index().rows(query, self.universe)
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[str]:
+        """Best matching system/constellation names for a partially typed query."""
+        return [name for _, name in self.universe.search_index().autocomplete(query, self.universe, limit)]
+
+    def get_units_for_rows(self, rows) -> np.ndarray:
+        """Mining units for the given universe row ids."""
+        return self.units[np.asarray(rows, dtype=np.int64)]
+
+    def get_mining_units(self, resource_ids) -> pd.Series:
+        """Mining units for the given ``{planet_id}_{resource}`` ids (0 when unset)."""
+        rows = self.universe.row_ids(resource_ids)
+        units = np.where(rows >= 0, self.units[rows], 0)
+        return pd.Series(units, index=getattr(resource_ids, 'index', None), dtype=int)
+
     def get_active_mining_systems(self):
         """Returns a list of systems with active mining units."""
-        if self.df is None or 'Mining Units' not in self.df.columns:
+        if self.universe is None:
             return []
-        
-        active_systems_df = self.df[self.df['Mining Units'] > 0]
-        return active_systems_df['System'].unique().tolist()
+        rows = np.flatnonzero(self.units)
+        codes = pd.unique(self.universe.row_codes(SYSTEM)[rows])
+        return self.universe.decode(SYSTEM, codes).tolist()
 
     def update_dataframe_mining_units(self):
         """
-        Refreshes the 'Mining Units' column in the internal DataFrame
-        based on the current values in the planet objects. This is crucial
-        for other parts of the app to see changes without a full cache clear.
+        Drops the cached planet objects so the next ``planets`` access reflects
+        the current mining units vector.
         """
-        if self.df is None or not hasattr(self, '_all_planets') or not self._all_planets:
-            return
-        
-        mining_units_map = {
-            f"{resource.planet_id}_{resource.resource}": resource.mining_units
-            for planet in self.get_all_planets() for resource in planet.resources
-        }
-        
-        self.df['Mining Units'] = self.df['id'].map(mining_units_map).fillna(0)
-
-    def update_mining_units(self, resource_id, new_units):
-        """Updates the mining units for a specific resource."""
-        if self.df is not None:
-            pass # Placeholder for the new method
-    
+        self._planets = None
+
+    def update_mining_units(self, resource_id, new_units) -> bool:
+        """Updates the mining units for a specific resource. Returns True if it changed."""
+        row = self.universe.row_id(resource_id)
+        if row < 0:
+            return False
+        new_units = int(clip_units(np.array([int(new_units)]))[0])
+        if self.units[row] == new_units:
+            return False
+        self.units[row] = new_units
+        self.units_version = next_version()
+        self._dirty.add(row)
+        if self._planets is not None:
+            planet_index = self.universe.row_planet[row]
+            planet = self._planets[int(self.universe.planet_ids[planet_index])]
+            planet.resources[row - self.universe.planet_offsets[planet_index]].mining_units = new_units
+        return True
+
+    def set_units_vector(self, units: np.ndarray) -> bool:
+        """Replace the whole units vector (e.g. with an optimized plan). Returns True if it changed."""
+        units = clip_units(np.asarray(units))
+        rows = np.flatnonzero(units != self.units)
+        if len(rows) == 0:
+            return False
+        self.units[rows] = units[rows]
+        self.units_version = next_version()
+        self._dirty.update(rows.tolist())
+        self._planets = None
+        return True
+
+    def get_jump_graph(self) -> Optional[JumpGraph]:
+        """Stargate graph over the universe's systems, or None if no jump data is installed."""
+        return load_jump_graph(self.data_path, self.universe)
+
     def get_regions(self) -> List[str]:
         """Get list of all regions"""
-        return sorted(self.df['Region'].unique().tolist())
-    
+        return self.universe.dictionaries[REGION].tolist()
+
+    def _child_names(self, parent_dim: str, parents: Optional[List[str]], child_dim: str) -> List[str]:
+        """Sorted names of ``child_dim`` under the union of ``parents`` (all if none given)."""
+        universe = self.universe
+        if not parents:
+            return universe.dictionaries[child_dim].tolist()
+        codes = universe.hierarchy().children_of(parent_dim, universe.encode(parent_dim, parents))
+        # Dictionaries are sorted, so sorted codes decode to sorted names
+        return universe.decode(child_dim, codes).tolist()
+
     def get_constellations(self, regions: Optional[List[str]] = None) -> List[str]:
         """Get list of constellations, optionally filtered by a list of regions"""
-        if regions:
-            return sorted(self.df[self.df['Region'].isin(regions)]['Constellation'].unique().tolist())
-        return sorted(self.df['Constellation'].unique().tolist())
-    
+        return self._child_names(REGION, regions, CONSTELLATION)
+
     def get_systems(self, constellations: Optional[List[str]] = None) -> List[str]:
         """Get list of systems, optionally filtered by a list of constellations"""
-        if constellations:
-            return sorted(self.df[self.df['Constellation'].isin(constellations)]['System'].unique().tolist())
-        return sorted(self.df['System'].unique().tolist()) 
\ No newline at end of file
+        return self._child_names(CONSTELLATION, constellations, SYSTEM)
+
+    def select_rows(self, regions: Optional[List[str]] = None,
+                    constellations: Optional[List[str]] = None,
+                    systems: Optional[List[str]] = None,
+                    search_query: Optional[str] = None) -> Optional[np.ndarray]:
+        """Sorted universe row ids matching every non-empty region/constellation/system
+        selection and the name search.
+
+        Returns None when no geographic filter or search is set.
+        """
+        universe = self.universe
+        selection = universe.hierarchy().select(
+            universe.encode(REGION, regions) if regions else None,
+            universe.encode(CONSTELLATION, constellations) if constellations else None,
+            universe.encode(SYSTEM, systems) if systems else None,
+        )
+        rows = None
+        if selection is not None:
+            level, codes = selection
+            rows = universe.hierarchy().rows_of(level, codes)
+        if search_query:
+            hits = self.search_rows(search_query)
+            rows = hits if rows is None else np.intersect1d(rows, hits, assume_unique=True)
+        return rows
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
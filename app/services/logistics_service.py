@@ -0,0 +1,316 @@
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from app.models.haul_routes import plan_tours, tour_jumps
+from app.models.jump_graph import UNREACHABLE
+from app.models.mining_units import RESOURCE_UNIT_VOLUME
+from app.models.universe import CONSTELLATION, PLANET, SYSTEM
+
+# Rough jumps between systems sharing a constellation / a region / neither,
+# used when no stargate data is installed (or two systems are not connected)
+ESTIMATED_JUMPS = (2, 6, 12)
+# Planets are visited every base period x 2^k, with k at most this
+MAX_INTERVAL_EXPONENT = 6
+
+
+@dataclass
+class HaulStop:
+    system: str
+    planets: List[str]
+    volume: float
+
+
+@dataclass
+class HaulTour:
+    """One round trip from the home system within the ship's cargo capacity."""
+
+    stops: List[HaulStop]
+    volume: float
+    jumps: int
+
+
+@dataclass
+class HaulTrip:
+    """Tours flown at ``hour`` into the repeating collection cycle."""
+
+    hour: float
+    tours: List[HaulTour]
+
+
+@dataclass
+class HaulPlan:
+    home_system: str
+    base_hours: float
+    # Planet name -> hours between its collections
+    visit_hours: Dict[str, float] = field(default_factory=dict)
+    trips: List[HaulTrip] = field(default_factory=list)
+    # True when jumps are estimated from the region/constellation hierarchy
+    estimated_jumps: bool = False
+
+    @property
+    def cycle_hours(self) -> float:
+        return self.base_hours * len(self.trips)
+
+    @property
+    def total_jumps(self) -> int:
+        """Jumps flown over one full cycle."""
+        return sum(tour.jumps for trip in self.trips for tour in trip.tours)
+
+
+@dataclass
+class StorageSimulation:
+    """Per-planet volumes (m3) and ISK over a simulated horizon.
+
+    Storages start empty. Volume still in storage at the end of the horizon is
+    neither collected nor lost.
+    """
+
+    horizon_hours: float
+    planets: List[str]
+    collected: np.ndarray
+    lost: np.ndarray
+    stored: np.ndarray
+    collected_value: np.ndarray
+    lost_value: np.ndarray
+    tax_rate: float
+
+    @property
+    def produced(self) -> np.ndarray:
+        return self.collected + self.lost + self.stored
+
+    @property
+    def net_income(self) -> float:
+        """Net ISK of everything collected over the horizon."""
+        return float(self.collected_value.sum()) * (1 - self.tax_rate / 100)
+
+    @property
+    def net_daily_income(self) -> float:
+        return self.net_income / self.horizon_hours * 24 if self.horizon_hours > 0 else 0.0
+
+
+class LogisticsService:
+    """Collection schedules for the planets the user mines.
+
+    Every planet is collected on a power-of-two multiple of a base period that
+    is short enough for its storage never to fill; planets of one system share
+    a phase where possible and phases are spread to level the cargo per trip.
+    Each trip is then split into capacitated tours from the home system with
+    the savings heuristic and shortened with 2-opt within a time budget.
+    """
+
+    def __init__(self, data_service):
+        self.data_service = data_service
+
+    def planet_volumes(self, units: Optional[np.ndarray] = None):
+        """Universe planet indices with active units and their hourly volume (m3).
+
+        ``units`` defaults to the user's layout; pass a scoped copy (see
+        ``DataService.get_scoped_units_vector``) to plan for a selection only.
+        """
+        universe = self.data_service.universe
+        units = self.data_service.get_units_vector() if units is None else np.asarray(units)
+        rows = np.flatnonzero(units)
+        volume = np.bincount(universe.row_planet[rows], weights=universe.output[rows] * units[rows] * RESOURCE_UNIT_VOLUME,
+                             minlength=universe.n_planets)
+        planets = np.flatnonzero(volume > 0)
+        return planets, volume[planets]
+
+    def _estimated_jumps(self, systems: np.ndarray) -> np.ndarray:
+        hierarchy = self.data_service.universe.hierarchy()
+        constellation = hierarchy.parent[SYSTEM][systems]
+        region = hierarchy.parent[CONSTELLATION][constellation]
+        same_constellation, same_region, other = ESTIMATED_JUMPS
+        table = np.where(region[:, None] == region[None, :], same_region, other)
+        table = np.where(constellation[:, None] == constellation[None, :], same_constellation, table)
+        return np.where(systems[:, None] == systems[None, :], 0, table)
+
+    def _jump_table(self, systems: np.ndarray):
+        """Pairwise jumps between ``systems`` and whether any of them are estimates."""
+        graph = self.data_service.get_jump_graph()
+        estimate = self._estimated_jumps(systems)
+        if graph is None:
+            return estimate, True
+        table = graph.distance_table(systems).astype(np.int64)
+        unreachable = table == UNREACHABLE
+        table[unreachable] = estimate[unreachable]
+        return table, bool(unreachable.any())
+
+    def plan_hauls(self, storage_capacity: float, cargo_capacity: float, haul_hours: float = 24.0,
+                   home_system: Optional[str] = None, time_budget: float = 2.0,
+                   units: Optional[np.ndarray] = None) -> HaulPlan:
+        """Collection schedule and visit order over one cycle of the planets with ``units``.
+
+        Trips run every ``haul_hours`` at most (sooner if some planet fills
+        faster). ``time_budget`` seconds bound the tour improvement.
+        """
+        if storage_capacity <= 0 or cargo_capacity <= 0:
+            raise ValueError("Storage and cargo capacity must be positive")
+        deadline = time.perf_counter() + time_budget
+        universe = self.data_service.universe
+        planets, volume = self.planet_volumes(units)
+        planet_systems = universe.planet_codes(SYSTEM)[planets]
+        if home_system is not None:
+            home = int(universe.encode(SYSTEM, [home_system])[0])
+            if home < 0:
+                raise ValueError(f"Unknown system: {home_system}")
+        elif len(planets):
+            # The system producing the most volume
+            home = int(np.argmax(np.bincount(planet_systems, weights=volume)))
+        else:
+            return HaulPlan(home_system="", base_hours=float(haul_hours))
+
+        fill_hours = storage_capacity / volume
+        base = float(min(haul_hours, fill_hours.min()))
+        exponent = np.minimum(np.floor(np.log2(fill_hours / base) + 1e-9), MAX_INTERVAL_EXPONENT).astype(np.int64)
+        period = 2 ** exponent
+        pickup = volume * period * base
+        phase = self._assign_phases(planet_systems, period, pickup)
+
+        systems = np.unique(np.append(planet_systems, home))
+        jumps, estimated = self._jump_table(systems)
+        node_system = np.searchsorted(systems, planet_systems)
+        home_node = int(np.searchsorted(systems, home))
+        names = universe.decode(PLANET, universe.planet_codes(PLANET)[planets]).tolist()
+
+        plan = HaulPlan(
+            home_system=universe.decode(SYSTEM, [home])[0],
+            base_hours=base,
+            visit_hours=dict(zip(names, (period * base).tolist())),
+            estimated_jumps=estimated,
+        )
+        for trip in range(int(period.max())):
+            members = np.flatnonzero(trip % period == phase)
+            stops = self._pickups(members, node_system, pickup, names, cargo_capacity)
+            nodes = np.array([home_node] + [node for node, _, _ in stops], dtype=np.int64)
+            dist = jumps[np.ix_(nodes, nodes)]
+            loads = np.array([0.0] + [load for _, _, load in stops])
+            tours = []
+            for tour in plan_tours(dist, loads, cargo_capacity, deadline):
+                tour_stops = [HaulStop(system=universe.decode(SYSTEM, [systems[stops[i - 1][0]]])[0],
+                                       planets=stops[i - 1][1], volume=float(loads[i])) for i in tour]
+                tours.append(HaulTour(stops=tour_stops, volume=float(loads[tour].sum()), jumps=tour_jumps(tour, dist)))
+            plan.trips.append(HaulTrip(hour=trip * base, tours=tours))
+        return plan
+
+    @staticmethod
+    def _assign_phases(planet_systems: np.ndarray, period: np.ndarray, pickup: np.ndarray) -> np.ndarray:
+        """Phase (trip offset within its period) per planet, one per system and period.
+
+        Heaviest groups go first, each to the phase whose busiest trip carries least.
+        """
+        phase = np.zeros(len(period), dtype=np.int64)
+        trip_load = np.zeros(int(period.max()) if len(period) else 0)
+        groups: Dict[tuple, List[int]] = {}
+        for index, key in enumerate(zip(planet_systems.tolist(), period.tolist())):
+            groups.setdefault(key, []).append(index)
+        ordered = sorted(groups.items(), key=lambda item: -pickup[item[1]].sum())
+        for (_, group_period), members in ordered:
+            loads = [trip_load[offset::group_period].max() for offset in range(group_period)]
+            offset = int(np.argmin(loads))
+            phase[members] = offset
+            trip_load[offset::group_period] += pickup[members].sum()
+        return phase
+
+    @staticmethod
+    def _pickups(members: np.ndarray, node_system: np.ndarray, pickup: np.ndarray, names: List[str],
+                 cargo_capacity: float) -> List[tuple]:
+        """``(system node, planet names, volume)`` stops of one trip, each fitting the cargo hold.
+
+        Planets of a system share a stop while they fit; a planet holding more
+        than one load is split over several stops.
+        """
+        stops = []
+        for node in np.unique(node_system[members]).tolist():
+            current, load = [], 0.0
+            for planet in members[node_system[members] == node].tolist():
+                remaining = float(pickup[planet])
+                pieces = max(1, math.ceil(remaining / cargo_capacity - 1e-9))
+                if pieces > 1:
+                    for _ in range(pieces):
+                        part = min(remaining, cargo_capacity)
+                        stops.append((node, [names[planet]], part))
+                        remaining -= part
+                    continue
+                if load + remaining > cargo_capacity:
+                    stops.append((node, current, load))
+                    current, load = [], 0.0
+                current.append(names[planet])
+                load += remaining
+            if current:
+                stops.append((node, current, load))
+        return stops
+
+    # --- Storage simulation ---
+    def simulate_storage(self, storage_capacity: float, horizon_hours: float, prices: Mapping[str, float],
+                         interval_hours: Optional[float] = None, plan: Optional[HaulPlan] = None,
+                         tax_rate: float = 0.0, units: Optional[np.ndarray] = None) -> StorageSimulation:
+        """Volume collected and lost to full storages of the planets with ``units`` under a collection policy.
+
+        The policy is either a fixed ``interval_hours`` for every planet or a
+        ``plan`` repeated over the horizon (planets it does not visit are never
+        collected). Production is constant between collections, so each
+        interval is settled in closed form: a storage that would exceed
+        ``storage_capacity`` loses the excess.
+        """
+        if (interval_hours is None) == (plan is None):
+            raise ValueError("Pass exactly one of interval_hours or plan")
+        universe = self.data_service.universe
+        units = self.data_service.get_units_vector() if units is None else np.asarray(units)
+        planets, volume = self.planet_volumes(units)
+        names = universe.decode(PLANET, universe.planet_codes(PLANET)[planets]).tolist()
+        row_values = universe.output * universe.price_vector(prices)[universe.resource_code] * units
+        value = np.bincount(universe.row_planet, weights=row_values, minlength=universe.n_planets)[planets]
+        # ISK per m3 of each planet's (fixed) resource mix
+        value_per_volume = np.divide(value, volume, out=np.zeros_like(volume), where=volume > 0)
+
+        event_planet, event_time = self._collection_times(names, horizon_hours, interval_hours, plan)
+        # The end of the horizon closes every planet's last interval
+        event_planet = np.concatenate([event_planet, np.arange(len(planets))])
+        event_time = np.concatenate([event_time, np.full(len(planets), float(horizon_hours))])
+        final = np.r_[np.zeros(len(event_planet) - len(planets), dtype=bool), np.ones(len(planets), dtype=bool)]
+        order = np.lexsort((final, event_time, event_planet))
+        event_planet, event_time, final = event_planet[order], event_time[order], final[order]
+
+        first = np.r_[True, event_planet[1:] != event_planet[:-1]]
+        previous = np.where(first, 0.0, np.r_[0.0, event_time[:-1]])
+        produced = volume[event_planet] * (event_time - previous)
+        kept = np.minimum(produced, storage_capacity)
+        lost = produced - kept
+        n = len(planets)
+        collected = np.bincount(event_planet[~final], weights=kept[~final], minlength=n)
+        return StorageSimulation(
+            horizon_hours=float(horizon_hours),
+            planets=names,
+            collected=collected,
+            lost=np.bincount(event_planet, weights=lost, minlength=n),
+            stored=np.bincount(event_planet[final], weights=kept[final], minlength=n),
+            collected_value=collected * value_per_volume,
+            lost_value=np.bincount(event_planet, weights=lost, minlength=n) * value_per_volume,
+            tax_rate=tax_rate,
+        )
+
+    @staticmethod
+    def _collection_times(names: List[str], horizon_hours: float, interval_hours: Optional[float],
+                          plan: Optional[HaulPlan]):
+        """``(planet position, hour)`` of every collection in ``(0, horizon_hours]``."""
+        if interval_hours is not None:
+            if interval_hours <= 0:
+                raise ValueError("Collection interval must be positive")
+            times = np.arange(1, int(horizon_hours // interval_hours) + 1) * float(interval_hours)
+            return np.repeat(np.arange(len(names)), len(times)), np.tile(times, len(names))
+
+        position = {name: index for index, name in enumerate(names)}
+        visits = {(position[name], trip.hour) for trip in plan.trips for tour in trip.tours
+                  for stop in tour.stops for name in stop.planets if name in position}
+        if not visits or plan.cycle_hours <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        visit_planet, visit_hour = (np.array(column) for column in zip(*sorted(visits)))
+        cycles = np.arange(int(horizon_hours // plan.cycle_hours) + 1) * plan.cycle_hours
+        times = (visit_hour[:, None] + cycles[None, :]).ravel()
+        planet = np.repeat(visit_planet, len(cycles))
+        keep = (times > 0) & (times <= horizon_hours)
+        return planet[keep], times[keep]
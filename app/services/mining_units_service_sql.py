@@ -1,9 +1,12 @@
-from typing import Dict
+import zlib
+from typing import Dict, Optional
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import delete, select
 
-from app.db import session_scope, get_engine
-from app.models.sql_models import Base, MiningUnit
+from app.db import bulk_upsert, session_scope, get_engine
+from app.models.mining_units import clip_units, pack_units, unpack_units
+from app.models.sql_models import Base, MiningUnit, MiningUnitVector
 
 
 class SQLMiningUnitsService:
@@ -17,12 +20,65 @@ class SQLMiningUnitsService:
             return {r.resource_key: int(r.units) for r in rows}
 
     def save_units_map(self, mapping: Dict[str, int]) -> None:
+        rows = [{"resource_key": key, "units": int(units)} for key, units in mapping.items()]
         with session_scope() as s:
-            for key, units in mapping.items():
-                row = s.execute(select(MiningUnit).where(MiningUnit.resource_key == key)).scalar_one_or_none()
-                if row:
-                    row.units = int(units)
-                else:
-                    s.add(MiningUnit(resource_key=key, units=int(units)))
+            bulk_upsert(s, MiningUnit, rows, ["resource_key"])
 
+    def save_units_delta(self, mapping: Dict[str, int], fingerprint: Optional[str] = None,
+                         row_ids: Optional[np.ndarray] = None) -> None:
+        """Upsert only the changed keys, in one batched statement.
+
+        With ``fingerprint`` and the universe ``row_ids`` of the keys (in mapping
+        order), the packed vector of that universe is patched in the same
+        transaction. Vectors of other universes no longer reflect the key table
+        and are dropped; the next load there rebuilds them.
+        """
+        if not mapping:
+            return
+        rows = [{"resource_key": key, "units": int(units)} for key, units in mapping.items()]
+        with session_scope() as s:
+            bulk_upsert(s, MiningUnit, rows, ["resource_key"])
+            stale = delete(MiningUnitVector)
+            if fingerprint is not None and row_ids is not None:
+                stale = stale.where(MiningUnitVector.universe_fingerprint != fingerprint)
+                self._patch_vector(s, fingerprint, row_ids, list(mapping.values()))
+            s.execute(stale)
+
+    @staticmethod
+    def _patch_vector(s, fingerprint: str, row_ids: np.ndarray, values: list) -> None:
+        # Locked so concurrent saves of other keys are applied one after the other
+        row = s.execute(
+            select(MiningUnitVector).where(MiningUnitVector.universe_fingerprint == fingerprint).with_for_update()
+        ).scalar_one_or_none()
+        if row is None:
+            return
+        try:
+            units = unpack_units(bytes(row.data), fingerprint)
+        except (ValueError, zlib.error):
+            units = None
+        if units is None:
+            # Unreadable: drop it so the next load rebuilds it from the key table
+            s.delete(row)
+            return
+        found = row_ids >= 0
+        units[row_ids[found]] = clip_units(np.asarray(values, dtype=np.int64)[found])
+        row.data = pack_units(units, fingerprint)
+
+    def load_vector(self, fingerprint: str) -> Optional[bytes]:
+        """Packed units vector stored for the given universe fingerprint, if any."""
+        with session_scope() as s:
+            row = s.execute(
+                select(MiningUnitVector).where(MiningUnitVector.universe_fingerprint == fingerprint)
+            ).scalar_one_or_none()
+            return bytes(row.data) if row else None
+
+    def save_vector(self, fingerprint: str, data: bytes) -> None:
+        with session_scope() as s:
+            row = s.execute(
+                select(MiningUnitVector).where(MiningUnitVector.universe_fingerprint == fingerprint)
+            ).scalar_one_or_none()
+            if row:
+                row.data = data
+            else:
+                s.add(MiningUnitVector(universe_fingerprint=fingerprint, data=data))
 
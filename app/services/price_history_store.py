@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+STORE_VERSION = 1
+# Once more part files than this exist they are merged into one
+COMPACT_PARTS = 16
+HISTORY_SCHEMA = pa.schema([
+    ('source', pa.dictionary(pa.int32(), pa.string())),
+    ('resource', pa.string()),
+    ('buy', pa.float64()),
+    ('sell', pa.float64()),
+    ('average', pa.float64()),
+    ('date', pa.timestamp('ns')),
+])
+PRICE_COLUMNS = ['buy', 'sell', 'average']
+_DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PriceHistoryStore:
+    """Consolidated Parquet copy of a user's ``price_imports`` CSVs.
+
+    Every dated CSV (``YYYY-MM-DD`` in its name, with resource/buy/sell/average
+    columns) is parsed once into a part file; ``refresh`` only re-reads CSVs whose
+    size/mtime and content hash changed, and drops rows of deleted CSVs. Parts are
+    merged into one file sorted by resource and date once there are more than
+    ``COMPACT_PARTS``, so reads scan a few files with row-group pruning.
+
+    One store is shared by all sessions of a user: maintenance and reads hold the
+    store's lock, so a scan never sees a part file that is being replaced.
+    """
+
+    def __init__(self, imports_dir: str, store_dir: str):
+        self.imports_dir = imports_dir
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, "manifest.json")
+        # Reentrant: refresh compacts while holding it
+        self._lock = threading.RLock()
+        # CSV file name -> {size, mtime_ns, sha1, date, part}; part is None for skipped CSVs
+        self.sources: Dict[str, dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if manifest.get('version') != STORE_VERSION:
+            return {}
+        # Only trust entries whose part file is still there
+        return {name: entry for name, entry in manifest.get('sources', {}).items()
+                if entry.get('part') is None or os.path.exists(os.path.join(self.store_dir, entry['part']))}
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': STORE_VERSION, 'sources': self.sources}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- Maintenance ---
+    def refresh(self) -> bool:
+        """Bring the store in line with the imports directory. Returns True if it changed."""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        current = {}
+        if os.path.isdir(self.imports_dir):
+            for filename in os.listdir(self.imports_dir):
+                if filename.endswith(".csv") and _DATE_PATTERN.search(filename):
+                    current[filename] = os.stat(os.path.join(self.imports_dir, filename))
+
+        # Sources whose rows must leave the store -> the part file holding them
+        stale = {name: entry.get('part') for name, entry in self.sources.items() if name not in current}
+        for name in stale:
+            del self.sources[name]
+        added: Dict[str, pa.Table] = {}
+        changed = bool(stale)
+        for filename, stat in current.items():
+            entry = self.sources.get(filename)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                continue
+            path = os.path.join(self.imports_dir, filename)
+            sha1 = _file_sha1(path)
+            if entry and entry['sha1'] == sha1:
+                # Touched but identical
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                changed = True
+                continue
+            if entry:
+                stale[filename] = entry.get('part')
+            table = self._read_csv(filename, path)
+            self.sources[filename] = {
+                'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': sha1,
+                'date': _DATE_PATTERN.search(filename).group(1), 'part': None,
+            }
+            if table is not None and table.num_rows:
+                added[filename] = table
+            changed = True
+        if not changed:
+            return False
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._drop_rows(stale)
+        if added:
+            part = self._write_part(pa.concat_tables(added.values()))
+            for filename in added:
+                self.sources[filename]['part'] = part
+        if len(self._parts()) > COMPACT_PARTS:
+            self.compact()
+        self._save_manifest()
+        return True
+
+    def _read_csv(self, filename: str, path: str) -> Optional[pa.Table]:
+        """History rows of one import CSV, or None if it cannot be used."""
+        try:
+            df = pd.read_csv(path)
+        except Exception:
+            # Silently ignore files that can't be parsed
+            return None
+        if not all(col in df.columns for col in ['resource', *PRICE_COLUMNS]):
+            return None
+        frame = pd.DataFrame({
+            'source': filename,
+            'resource': df['resource'].astype(str),
+            **{col: pd.to_numeric(df[col], errors='coerce') for col in PRICE_COLUMNS},
+            'date': pd.Timestamp(datetime.strptime(_DATE_PATTERN.search(filename).group(1), "%Y-%m-%d")),
+        })
+        return pa.Table.from_pandas(frame, schema=HISTORY_SCHEMA, preserve_index=False)
+
+    def _parts(self) -> List[str]:
+        return sorted({entry['part'] for entry in self.sources.values() if entry.get('part')})
+
+    def _write_part(self, table: pa.Table, sort: bool = False) -> str:
+        if sort:
+            # Sorted by resource, row group statistics let resource filters skip groups
+            table = table.sort_by([('resource', 'ascending'), ('date', 'ascending')])
+        part = f"part-{uuid.uuid4().hex[:16]}.parquet"
+        tmp_path = os.path.join(self.store_dir, part + ".tmp")
+        pq.write_table(table, tmp_path, row_group_size=64 * 1024)
+        os.replace(tmp_path, os.path.join(self.store_dir, part))
+        return part
+
+    def _drop_rows(self, stale: Dict[str, Optional[str]]) -> None:
+        """Rewrite each affected part file without the rows of the stale sources (lock held)."""
+        by_part: Dict[str, List[str]] = {}
+        for name, part in stale.items():
+            if part:
+                by_part.setdefault(part, []).append(name)
+        for part, dropped in by_part.items():
+            path = os.path.join(self.store_dir, part)
+            remaining = [name for name, entry in self.sources.items() if entry.get('part') == part]
+            if remaining:
+                table = pq.read_table(path, filters=[('source', 'not in', dropped)], schema=HISTORY_SCHEMA)
+                new_part = self._write_part(table)
+                for name in remaining:
+                    self.sources[name]['part'] = new_part
+            if os.path.exists(path):
+                os.remove(path)
+
+    def compact(self) -> None:
+        """Merge all part files into one sorted by resource and date."""
+        with self._lock:
+            parts = self._parts()
+            if len(parts) <= 1:
+                return
+            table = ds.dataset([os.path.join(self.store_dir, p) for p in parts], schema=HISTORY_SCHEMA).to_table()
+            merged = self._write_part(table, sort=True)
+            for entry in self.sources.values():
+                if entry.get('part'):
+                    entry['part'] = merged
+            self._save_manifest()
+            for part in parts:
+                os.remove(os.path.join(self.store_dir, part))
+
+    # --- Reads ---
+    def read(self, columns: Optional[Sequence[str]] = None, resources: Optional[Sequence[str]] = None,
+             lower: Optional[pd.Timestamp] = None, upper: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """History rows (resource/buy/sell/average/date by default) sorted by date.
+
+        Resource and ``[lower, upper)`` date filters are pushed into the Parquet scan.
+        """
+        columns = list(columns) if columns is not None else ['resource', *PRICE_COLUMNS, 'date']
+        conditions = []
+        if resources is not None:
+            conditions.append(ds.field('resource').isin(list(resources)))
+        if lower is not None:
+            conditions.append(ds.field('date') >= pa.scalar(pd.Timestamp(lower).as_unit('ns'), type=pa.timestamp('ns')))
+        if upper is not None:
+            conditions.append(ds.field('date') < pa.scalar(pd.Timestamp(upper).as_unit('ns'), type=pa.timestamp('ns')))
+        condition = None
+        for term in conditions:
+            condition = term if condition is None else condition & term
+        with self._lock:
+            parts = self._parts()
+            if not parts:
+                return pd.DataFrame()
+            dataset = ds.dataset([os.path.join(self.store_dir, p) for p in parts], schema=HISTORY_SCHEMA)
+            table = dataset.to_table(columns=columns, filter=condition)
+        df = table.to_pandas()
+        if 'date' in df.columns:
+            df = df.sort_values(by='date', kind='stable', ignore_index=True)
+        return df
@@ -1,15 +1,129 @@
 import pandas as pd
 import json
 import os
-import re
+import threading
 from datetime import datetime
-from typing import Dict, List
-from app.models.price_model import ResourcePrice
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from app.memo import next_version
+from app.models.price_model import ResourcePrice, VersionedPrices
+from app.services.price_history_store import PriceHistoryStore
 
-class PriceService:
+HISTORY_FRAME_COLUMNS = ['resource', 'buy', 'sell', 'average', 'date']
+# Resampling granularity -> pandas frequency; buckets are labelled by their first day
+HISTORY_FREQUENCIES = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}
+
+
+def history_bounds(start=None, end=None) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """Inclusive ``start``/``end`` as a half-open ``[lower, upper)`` range.
+
+    A plain ``date`` as ``end`` covers that whole day.
+    """
+    lower = pd.Timestamp(start) if start is not None else None
+    upper = None
+    if end is not None:
+        step = pd.Timedelta(microseconds=1) if isinstance(end, datetime) else pd.Timedelta(days=1)
+        upper = pd.Timestamp(end) + step
+    return lower, upper
+
+
+def filter_price_history(df: pd.DataFrame, resources: Optional[Sequence[str]] = None, start=None, end=None,
+                         freq: Optional[str] = None) -> pd.DataFrame:
+    """Restrict a price history frame to resources and a date range, optionally
+    averaging it per resource over ``freq`` ('day', 'week' or 'month') buckets."""
+    if df.empty:
+        return df
+    mask = pd.Series(True, index=df.index)
+    if resources is not None:
+        mask &= df['resource'].isin(list(resources))
+    lower, upper = history_bounds(start, end)
+    if lower is not None:
+        mask &= df['date'] >= lower
+    if upper is not None:
+        mask &= df['date'] < upper
+    df = df[mask]
+    if freq:
+        grouper = pd.Grouper(key='date', freq=HISTORY_FREQUENCIES[freq], label='left', closed='left')
+        df = df.groupby(['resource', grouper])[['buy', 'sell', 'average']].mean().reset_index()
+        df = df.dropna(subset=['buy', 'sell', 'average'], how='all')
+    return df.sort_values(by=['date', 'resource'], kind='stable')[HISTORY_FRAME_COLUMNS]
+
+
+class PriceSnapshots:
+    """Copy-on-write current prices shared by all of a user's sessions.
+
+    The default price set is an immutable ``VersionedPrices`` that writes
+    replace atomically (under a lock, from the latest set), so readers never
+    see a half-applied update. Reads here always see the latest default; a
+    session viewing another set (e.g. a historical date, see ``derive``) keeps
+    that set itself and passes its prices to the services that need them.
+    """
+
+    def _init_snapshots(self) -> None:
+        self._current = VersionedPrices(next_version(), MappingProxyType({}))
+        self._write_lock = threading.Lock()
+
+    def _normalize_prices(self, price_dict: Mapping[str, float]) -> Dict[str, float]:
+        """Prices as stored in a set; subclasses normalize resource names."""
+        return dict(price_dict)
+
+    @property
+    def current(self) -> VersionedPrices:
+        """The latest default price set."""
+        return self._current
+
+    def _publish(self, prices: Dict[str, float], merge: bool = False) -> bool:
+        """Make ``prices`` (merged into the latest set if ``merge``) the default set. Returns True if it changed."""
+        prices = self._normalize_prices(prices)
+        with self._write_lock:
+            base = self._current.prices
+            if merge:
+                if all(base.get(name) == price for name, price in prices.items()):
+                    return False
+                prices = {**base, **prices}
+            elif prices == base:
+                return False
+            self._current = VersionedPrices(next_version(), MappingProxyType(prices))
+            return True
+
+    def derive(self, price_dict: Mapping[str, float], source: str) -> VersionedPrices:
+        """A new unpublished set: the latest default with ``price_dict`` on top."""
+        base = self._current
+        prices = {**base.prices, **self._normalize_prices(price_dict)}
+        return VersionedPrices(next_version(), MappingProxyType(prices), source, base.version)
+
+    @property
+    def version(self) -> int:
+        """Version of the latest default set."""
+        return self._current.version
+
+    @property
+    def prices(self) -> Mapping[str, float]:
+        """Read-only view of the default prices."""
+        return self._current.prices
+
+    def get_price(self, resource_name: str) -> float:
+        """Get price for a specific resource"""
+        return self._current.prices.get(resource_name, 0.0)
+
+    def get_all_prices(self) -> Dict[str, float]:
+        """Get all resource prices (a copy)"""
+        return dict(self._current.prices)
+
+    def update_price(self, resource_name: str, price: float) -> None:
+        """Update the default price of one resource"""
+        self._publish({resource_name: price}, merge=True)
+
+    def update_multiple_prices(self, price_dict: Dict[str, float]) -> None:
+        """Update default prices for multiple resources at once"""
+        self._publish(price_dict, merge=True)
+
+
+class PriceService(PriceSnapshots):
     def __init__(self, price_file_path: str = "data/prices.json"):
         self.price_file_path = price_file_path
-        self.prices = {}
+        self._init_snapshots()
+        self._history_stores: Dict[str, PriceHistoryStore] = {}
         self.load_prices()
         
     def load_prices(self) -> None:
@@ -17,31 +131,16 @@ class PriceService:
         if os.path.exists(self.price_file_path):
             try:
                 with open(self.price_file_path, 'r') as f:
-                    self.prices = json.load(f)
+                    prices = json.load(f)
             except json.JSONDecodeError:
-                self.prices = {}
+                prices = {}
+            self._publish(prices)
         
     def save_prices(self) -> None:
-        """Save current prices to JSON file"""
+        """Save the default prices to JSON file"""
         os.makedirs(os.path.dirname(self.price_file_path), exist_ok=True)
         with open(self.price_file_path, 'w') as f:
-            json.dump(self.prices, f, indent=4)
-            
-    def get_price(self, resource_name: str) -> float:
-        """Get price for a specific resource"""
-        return self.prices.get(resource_name, 0.0)
-    
-    def get_all_prices(self) -> Dict[str, float]:
-        """Get all resource prices"""
-        return self.prices
-    
-    def update_price(self, resource_name: str, price: float) -> None:
-        """Update price for a specific resource"""
-        self.prices[resource_name] = price
-    
-    def update_multiple_prices(self, price_dict: Dict[str, float]) -> None:
-        """Update prices for multiple resources at once"""
-        self.prices.update(price_dict)
+            json.dump(dict(self.current.prices), f, indent=4)
     
     def import_prices_from_csv(self, file_path: str) -> None:
         """Import prices from a CSV file"""
@@ -49,49 +148,57 @@ class PriceService:
         try:
             df = pd.read_csv(file_path)
             if 'resource' in df.columns and 'price' in df.columns:
-                for _, row in df.iterrows():
-                    self.prices[row['resource']] = float(row['price'])
+                self.update_multiple_prices(dict(zip(df['resource'].tolist(), df['price'].astype(float).tolist())))
                 self.save_prices()
         except Exception as e:
             print(f"Error importing prices: {e}") 
 
-    def get_price_history(self, username):
+    def _history_store(self, username) -> PriceHistoryStore:
+        """The user's consolidated price history, synced with their price_imports directory."""
+        store = self._history_stores.get(username)
+        if store is None:
+            user_dir = os.path.join("data", "user_data", username)
+            store = PriceHistoryStore(os.path.join(user_dir, "price_imports"), os.path.join(user_dir, "price_history"))
+            # Concurrent sessions must end up sharing one store (and its lock)
+            store = self._history_stores.setdefault(username, store)
+        store.refresh()
+        return store
+
+    def get_price_history(self, username, resources: Optional[Sequence[str]] = None, start=None, end=None,
+                          freq: Optional[str] = None):
         """
-        Scans the user's price_imports directory, loads all CSVs,
-        and returns a consolidated DataFrame with historical price data.
+        Returns the user's historical price data (resource, buy, sell, average, date)
+        from the consolidated store of their price_imports CSVs, restricted to
+        ``resources`` and the ``start``..``end`` range and optionally resampled
+        (see ``filter_price_history``).
         
         It assumes filenames contain dates in YYYY-MM-DD format.
         It assumes CSVs have columns: 'resource', 'buy', 'sell', 'average'.
         """
-        imports_dir = os.path.join("data", "user_data", username, "price_imports")
-        if not os.path.exists(imports_dir):
-            return pd.DataFrame()
-
-        all_price_data = []
-        date_pattern = re.compile(r"(\d{4}-\d{2}-\d{2})")
-
-        for filename in os.listdir(imports_dir):
-            if filename.endswith(".csv"):
-                match = date_pattern.search(filename)
-                if not match:
-                    continue # Skip files without a valid date in the name
-
-                price_date = datetime.strptime(match.group(1), "%Y-%m-%d").date()
-                file_path = os.path.join(imports_dir, filename)
-                
-                try:
-                    df = pd.read_csv(file_path)
-                    # Check for required columns
-                    if all(col in df.columns for col in ['resource', 'buy', 'sell', 'average']):
-                        df['date'] = price_date
-                        all_price_data.append(df)
-                except Exception:
-                    # Silently ignore files that can't be parsed
-                    continue
-        
-        if not all_price_data:
-            return pd.DataFrame()
+        lower, upper = history_bounds(start, end)
+        history_df = self._history_store(username).read(resources=resources, lower=lower, upper=upper)
+        if history_df.empty or not freq:
+            return history_df
+        return filter_price_history(history_df, freq=freq)
+
+    def get_last_prices_before(self, username, when) -> pd.DataFrame:
+        """Latest price history row of every resource dated before ``when`` (all rows of that date)."""
+        lower, _ = history_bounds(when)
+        history_df = self._history_store(username).read(upper=lower)
+        if history_df.empty:
+            return history_df
+        latest = history_df.groupby('resource')['date'].transform('max')
+        return history_df[history_df['date'] == latest].sort_values(by=['date', 'resource'], kind='stable',
+                                                                     ignore_index=True)
+
+    def get_history_resources(self, username) -> List[str]:
+        """Sorted resources that appear in the user's price history."""
+        history_df = self._history_store(username).read(columns=['resource'])
+        return sorted(history_df['resource'].unique()) if not history_df.empty else []
 
-        history_df = pd.concat(all_price_data, ignore_index=True)
-        history_df['date'] = pd.to_datetime(history_df['date'])
-        return history_df.sort_values(by="date") 
\ No newline at end of file
+    def get_history_date_range(self, username) -> Optional[Tuple[datetime, datetime]]:
+        """First and last price history date of the user, or None without history."""
+        history_df = self._history_store(username).read(columns=['date'])
+        if history_df.empty:
+            return None
+        return history_df['date'].min().to_pydatetime(), history_df['date'].max().to_pydatetime()
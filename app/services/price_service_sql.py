@@ -1,20 +1,49 @@
-from typing import Dict, Optional, List
-from datetime import datetime
+from typing import Dict, Optional, List, Tuple
+from datetime import datetime, timezone
 import re
+import time
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, literal_column, select
 
-from app.db import session_scope, get_engine
-from app.models.sql_models import Base, Price, PriceHistory
+from app.db import bulk_insert_frame, bulk_upsert, session_scope, get_engine
+from app.models.price_snapshot import pack_prices, unpack_prices
+from app.models.sql_models import Base, Price, PriceHistory, PriceSnapshot
+from app.services.price_service import (HISTORY_FRAME_COLUMNS, HISTORY_FREQUENCIES, PriceSnapshots,
+                                        filter_price_history, history_bounds)
+import numpy as np
 import pandas as pd
 import os
 
+# CSV rows parsed and written per batch when importing price history
+IMPORT_CHUNK_ROWS = 50_000
+# CSV column -> price_history column
+HISTORY_COLUMNS = {'buy': 'price_buy', 'sell': 'price_sell', 'average': 'price_avg'}
+# CSV columns that can feed the current price, in order of preference
+CURRENT_PRICE_COLUMNS = ('average', 'buy', 'price')
 
-class SQLPriceService:
+
+def _naive_utc(when: datetime) -> datetime:
+    """``when`` as a naive UTC datetime; naive values are taken to be UTC already.
+
+    Snapshot timestamps are keyed this way: TIMESTAMPTZ columns (Postgres) read
+    back tz-aware while CSV dates and SQLite values are naive.
+    """
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class SQLPriceService(PriceSnapshots):
     def __init__(self):
         engine = get_engine()
         Base.metadata.create_all(bind=engine)
-        self._cache: Dict[str, float] = {}
+        # create_all skips indexes of tables that already exist
+        for index in PriceHistory.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        self._init_snapshots()
+        # user_id -> (stamp, {snapshot timestamp: snapshot ids}), and snapshot id -> prices
+        self._snapshot_index: Dict[Optional[int], Tuple[tuple, Dict[datetime, List[int]]]] = {}
+        self._snapshot_prices: Dict[int, Dict[str, float]] = {}
         self.load_prices()
 
     @staticmethod
@@ -47,97 +76,366 @@ class SQLPriceService:
                             pass
                 # reload after potential seed
                 rows = s.execute(select(Price)).scalars().all()
-            self._cache = {self._normalize_resource(r.resource): float(r.price) for r in rows}
+            self._publish({r.resource: r.price for r in rows})
 
     def save_prices(self) -> None:
+        rows = [{"resource": resource, "price": float(price)} for resource, price in self.current.prices.items()]
         with session_scope() as s:
-            for resource, price in self._cache.items():
-                norm = self._normalize_resource(resource)
-                row = s.execute(select(Price).where(Price.resource == norm)).scalar_one_or_none()
-                if row:
-                    row.price = float(price)
-                else:
-                    s.add(Price(resource=norm, price=float(price)))
+            bulk_upsert(s, Price, rows, ["resource"])
 
-    def get_price(self, resource_name: str) -> float:
-        return self._cache.get(self._normalize_resource(resource_name), 0.0)
-
-    def get_all_prices(self) -> Dict[str, float]:
-        return dict(self._cache)
-
-    def update_price(self, resource_name: str, price: float) -> None:
-        self._cache[self._normalize_resource(resource_name)] = float(price)
-
-    def update_multiple_prices(self, price_dict: Dict[str, float]) -> None:
+    def _normalize_prices(self, price_dict) -> Dict[str, float]:
+        prices = {}
         for k, v in price_dict.items():
             norm = self._normalize_resource(k)
-            if not norm:
-                continue
-            self._cache[norm] = float(v)
+            if norm:
+                prices[norm] = float(v)
+        return prices
+
+    def get_price(self, resource_name: str) -> float:
+        return self._current.prices.get(self._normalize_resource(resource_name), 0.0)
 
     # --- History ---
-    def import_prices_dataframe(self, df, user_id: Optional[int] = None, price_date: Optional[datetime] = None) -> None:
-        """Import CSV dataframe (columns: resource,buy,sell,average[,date]). Saves to PriceHistory and updates cache optionally.
+    def import_prices_dataframe(self, df, user_id: Optional[int] = None, price_date: Optional[datetime] = None) -> Dict[str, float]:
+        """Import CSV dataframe (columns: resource,buy,sell,average[,date]) into PriceHistory.
+
+        Returns import stats (see ``import_prices_csv``).
         """
         if df is None or df.empty:
-            return
+            return {'rows': 0, 'skipped': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        chunks = (df.iloc[start:start + IMPORT_CHUNK_ROWS] for start in range(0, len(df), IMPORT_CHUNK_ROWS))
+        return self._import_history_chunks(chunks, user_id, price_date, update_current=False)
+
+    def import_prices_csv(self, source, user_id: Optional[int] = None, price_date: Optional[datetime] = None,
+                          update_current: bool = True, chunksize: int = IMPORT_CHUNK_ROWS) -> Dict[str, float]:
+        """Stream a price CSV (path or file object) into PriceHistory in bounded chunks.
+
+        With ``update_current`` the in-memory current prices take the last average,
+        buy or price value seen per resource (call ``save_prices`` to persist them).
+        Returns ``rows`` written, ``skipped`` rows without a resource, ``seconds`` and
+        ``rows_per_sec``.
+        """
+        chunks = pd.read_csv(source, chunksize=chunksize)
+        return self._import_history_chunks(chunks, user_id, price_date, update_current)
+
+    def _import_history_chunks(self, chunks, user_id: Optional[int], price_date: Optional[datetime],
+                               update_current: bool) -> Dict[str, float]:
+        start = time.perf_counter()
+        written = 0
+        skipped = 0
+        # Rows without their own date share one timestamp for the whole import
+        fallback_date = pd.Timestamp(price_date if price_date is not None else datetime.utcnow())
+        snapshots: Dict[Tuple[Optional[int], datetime], Dict[str, float]] = {}
         with session_scope() as s:
-            for _, row in df.iterrows():
-                resource = self._normalize_resource(row.get('resource'))
-                if not resource:
-                    continue
-                buy = row.get('buy') if 'buy' in df.columns else None
-                sell = row.get('sell') if 'sell' in df.columns else None
-                avg = row.get('average') if 'average' in df.columns else None
-                d = row.get('date') if 'date' in df.columns else price_date
-                try:
-                    d = pd.to_datetime(d) if d is not None else datetime.utcnow()
-                except Exception:
-                    d = datetime.utcnow()
-                s.add(PriceHistory(user_id=user_id, resource=resource, price_buy=buy, price_sell=sell, price_avg=avg, date=d))
+            for chunk in chunks:
+                frame = self._history_frame(chunk, user_id, fallback_date)
+                skipped += len(chunk) - len(frame)
+                written += bulk_insert_frame(s, PriceHistory, frame)
+                self._collect_snapshots(frame, snapshots)
+                if update_current:
+                    self._update_current_prices(chunk, frame)
+            self._write_snapshots(s, snapshots)
+        seconds = time.perf_counter() - start
+        return {'rows': written, 'skipped': skipped, 'seconds': seconds,
+                'rows_per_sec': written / seconds if seconds > 0 else 0.0}
 
-    def get_distinct_history_dates(self, user_id: Optional[int] = None) -> List[datetime]:
+    def _normalized_resources(self, column: pd.Series) -> np.ndarray:
+        """Normalized resource names; each distinct raw name is normalized once."""
+        codes, uniques = pd.factorize(column)
+        # Missing names (code -1) map to the trailing empty string
+        names = np.array([self._normalize_resource(name) for name in uniques] + [""], dtype=object)
+        return names[codes]
+
+    def _history_frame(self, chunk: pd.DataFrame, user_id: Optional[int], fallback_date: pd.Timestamp) -> pd.DataFrame:
+        """Vectorized conversion of one CSV chunk into price_history columns."""
+        if 'resource' not in chunk.columns:
+            return pd.DataFrame(columns=['user_id', 'resource', *HISTORY_COLUMNS.values(), 'date'])
+        resource = self._normalized_resources(chunk['resource'])
+        keep = resource != ""
+        # Keep the chunk's index so callers can line rows back up with the CSV
+        frame = pd.DataFrame({'user_id': user_id, 'resource': resource[keep]}, index=chunk.index[keep])
+        for column, target in HISTORY_COLUMNS.items():
+            if column in chunk.columns:
+                frame[target] = pd.to_numeric(chunk[column], errors='coerce').to_numpy()[keep]
+            else:
+                frame[target] = np.nan
+        if 'date' in chunk.columns:
+            raw = chunk['date'][keep]
+            dates = pd.to_datetime(raw, errors='coerce')
+            # Files mixing date formats: parse the leftovers element-wise
+            retry = dates.isna() & raw.notna()
+            if retry.any():
+                dates[retry] = pd.to_datetime(raw[retry], errors='coerce', format='mixed')
+            frame['date'] = dates.fillna(fallback_date).to_numpy()
+        else:
+            frame['date'] = fallback_date
+        return frame
+
+    def _update_current_prices(self, chunk: pd.DataFrame, frame: pd.DataFrame) -> None:
+        """Take the last average/buy/price value per resource of an imported chunk."""
+        column = next((c for c in CURRENT_PRICE_COLUMNS if c in chunk.columns), None)
+        if column is None or frame.empty:
+            return
+        values = pd.to_numeric(chunk.loc[frame.index, column], errors='coerce').fillna(0.0)
+        self.update_multiple_prices(dict(zip(frame['resource'].tolist(), values.tolist())))
+
+    # --- Snapshots: one packed price vector per (user, history date) ---
+    @staticmethod
+    def _collect_snapshots(frame: pd.DataFrame, snapshots: Dict[Tuple[Optional[int], datetime], Dict[str, float]]) -> None:
+        """Fold price history rows, in order, into ``{(user_id, date): {resource: price}}``."""
+        if frame.empty:
+            return
+        avg = frame['price_avg'].to_numpy(dtype=float)
+        buy = frame['price_buy'].to_numpy(dtype=float)
+        # Same fallback as a history row's price: average, else buy, else 0
+        price = np.where(np.nan_to_num(avg) != 0, avg, np.where(np.nan_to_num(buy) != 0, buy, 0.0))
+        rows = pd.DataFrame({'user_id': frame['user_id'].to_numpy(), 'resource': frame['resource'].to_numpy(),
+                             'price': price, 'date': frame['date'].to_numpy()})
+        for (uid, when), group in rows.groupby(['user_id', 'date'], sort=False, dropna=False):
+            key = (None if pd.isna(uid) else int(uid), _naive_utc(pd.Timestamp(when).to_pydatetime()))
+            snapshots.setdefault(key, {}).update(zip(group['resource'].tolist(), group['price'].tolist()))
+
+    def _write_snapshots(self, s, snapshots: Dict[Tuple[Optional[int], datetime], Dict[str, float]]) -> None:
+        """Store snapshots, merging into any existing snapshot of the same user and date.
+
+        Only the existing rows that were merged are replaced; timestamps are
+        compared as naive UTC and written as UTC.
+        """
+        if not snapshots:
+            return
+        for uid in {uid for uid, _ in snapshots}:
+            dates = [when.replace(tzinfo=timezone.utc) for key_uid, when in snapshots if key_uid == uid]
+            owner = PriceSnapshot.user_id == uid if uid is not None else PriceSnapshot.user_id.is_(None)
+            existing = s.execute(
+                select(PriceSnapshot.id, PriceSnapshot.taken_at, PriceSnapshot.data)
+                .where(owner, PriceSnapshot.taken_at.in_(dates))
+                .order_by(PriceSnapshot.id)
+            ).all()
+            merged = []
+            for snapshot_id, when, data in existing:
+                key = (uid, _naive_utc(when))
+                if key in snapshots:
+                    snapshots[key] = {**unpack_prices(data), **snapshots[key]}
+                    merged.append(snapshot_id)
+            if merged:
+                s.execute(delete(PriceSnapshot).where(PriceSnapshot.id.in_(merged)))
+        s.execute(PriceSnapshot.__table__.insert(), [
+            {'user_id': uid, 'taken_at': when.replace(tzinfo=timezone.utc), 'data': pack_prices(prices)}
+            for (uid, when), prices in snapshots.items()
+        ])
+        self._snapshot_index.clear()
+
+    def rebuild_price_snapshots(self, user_id: Optional[int] = None) -> int:
+        """Recreate the snapshots of ``user_id`` (every user's if not given) from the price
+        history table. Returns the number written."""
         with session_scope() as s:
-            q = select(PriceHistory.date).distinct().order_by(PriceHistory.date)
+            q = delete(PriceSnapshot)
             if user_id:
-                q = q.where(PriceHistory.user_id == user_id)
-            return [r[0] for r in s.execute(q).all()]
+                q = q.where(PriceSnapshot.user_id == user_id)
+            s.execute(q)
+            written = self._snapshots_from_history(s, user_id)
+        self._snapshot_prices.clear()
+        return written
 
-    def load_prices_from_history_date(self, when: datetime, user_id: Optional[int] = None) -> Dict[str, float]:
+    def _snapshots_from_history(self, s, user_id: Optional[int]) -> int:
+        """Write the snapshots of ``user_id``'s (every user's if not given) history rows."""
+        q = (select(PriceHistory.user_id, PriceHistory.resource, PriceHistory.price_avg,
+                    PriceHistory.price_buy, PriceHistory.date)
+             .order_by(PriceHistory.date, PriceHistory.id))
+        if user_id:
+            q = q.where(PriceHistory.user_id == user_id)
+        snapshots: Dict[Tuple[Optional[int], datetime], Dict[str, float]] = {}
+        result = s.execute(q)
+        while True:
+            rows = result.fetchmany(IMPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            frame = pd.DataFrame(rows, columns=['user_id', 'resource', 'price_avg', 'price_buy', 'date'])
+            self._collect_snapshots(frame, snapshots)
+        self._write_snapshots(s, snapshots)
+        return len(snapshots)
+
+    def _snapshots(self, user_id: Optional[int] = None) -> Dict[datetime, List[int]]:
+        """Snapshot ids by (naive UTC) timestamp for ``user_id`` (all users if not given), cached.
+
+        The cached index is checked against the table's stamp first, so imports by
+        other sessions and processes are picked up.
+        """
+        key = user_id or None
+        stamp = self._snapshot_stamp(user_id)
+        cached = self._snapshot_index.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        rows = self._read_snapshot_ids(user_id)
+        if not rows and self._has_history(user_id):
+            # History imported before snapshots existed: back-fill this user's
+            # (merging, so other users and concurrent imports are left alone)
+            with session_scope() as s:
+                self._snapshots_from_history(s, user_id)
+            stamp = self._snapshot_stamp(user_id)
+            rows = self._read_snapshot_ids(user_id)
+        index: Dict[datetime, List[int]] = {}
+        for when, snapshot_id in rows:
+            index.setdefault(_naive_utc(when), []).append(snapshot_id)
+        self._snapshot_index[key] = (stamp, index)
+        return index
+
+    @staticmethod
+    def _snapshot_stamp(user_id: Optional[int]) -> tuple:
+        """Max id and row count of the snapshots; rows are only inserted and deleted, so every write changes one."""
+        q = select(func.max(PriceSnapshot.id), func.count(PriceSnapshot.id))
+        if user_id:
+            q = q.where(PriceSnapshot.user_id == user_id)
         with session_scope() as s:
-            q = select(PriceHistory).where(PriceHistory.date == when)
-            if user_id:
-                q = q.where(PriceHistory.user_id == user_id)
-            rows = s.execute(q).scalars().all()
-            return {self._normalize_resource(r.resource): float(r.price_avg or r.price_buy or 0.0) for r in rows}
+            return tuple(s.execute(q).one())
+
+    @staticmethod
+    def _read_snapshot_ids(user_id: Optional[int]) -> list:
+        q = select(PriceSnapshot.taken_at, PriceSnapshot.id).order_by(PriceSnapshot.taken_at, PriceSnapshot.id)
+        if user_id:
+            q = q.where(PriceSnapshot.user_id == user_id)
+        with session_scope() as s:
+            return s.execute(q).all()
+
+    @staticmethod
+    def _has_history(user_id: Optional[int]) -> bool:
+        q = select(PriceHistory.id).limit(1)
+        if user_id:
+            q = q.where(PriceHistory.user_id == user_id)
+        with session_scope() as s:
+            return s.execute(q).first() is not None
+
+    def get_distinct_history_dates(self, user_id: Optional[int] = None) -> List[datetime]:
+        return list(self._snapshots(user_id))
+
+    def load_prices_from_history_date(self, when: datetime, user_id: Optional[int] = None) -> Dict[str, float]:
+        ids = self._snapshots(user_id).get(_naive_utc(when), [])
+        missing = [snapshot_id for snapshot_id in ids if snapshot_id not in self._snapshot_prices]
+        if missing:
+            with session_scope() as s:
+                rows = s.execute(select(PriceSnapshot.id, PriceSnapshot.data).where(PriceSnapshot.id.in_(missing))).all()
+            self._snapshot_prices.update((snapshot_id, unpack_prices(data)) for snapshot_id, data in rows)
+        prices: Dict[str, float] = {}
+        for snapshot_id in ids:
+            prices.update(self._snapshot_prices.get(snapshot_id, {}))
+        return prices
 
     # For compatibility with file-based service API
-    def get_price_history(self, username: str):
-        """Return pandas DataFrame of price history for given username (or all if not found)."""
+    @staticmethod
+    def _history_user_id(username: str) -> Optional[int]:
         try:
             from app.services.user_service_sql import SQLUserService
-            uid = SQLUserService().get_user_id(username)
+            return SQLUserService().get_user_id(username)
         except Exception:
-            uid = None
+            return None
+
+    @staticmethod
+    def _history_bucket(dialect: str, freq: str):
+        """SQL expression truncating ``date`` to the start of its ``freq`` bucket, if supported.
+
+        Arguments are rendered as SQL literals, not bound parameters: with
+        server-side parameters (pg8000) the select and GROUP BY copies would get
+        different placeholders and Postgres would not see them as one expression.
+        """
+        if freq not in HISTORY_FREQUENCIES:
+            raise ValueError(f"Unknown history frequency: {freq!r}")
+        if dialect == "postgresql":
+            return func.date_trunc(literal_column(f"'{freq}'"), PriceHistory.date)
+        if dialect == "sqlite":
+            if freq == 'day':
+                return func.date(PriceHistory.date)
+            if freq == 'week':
+                # Next Sunday (or today), minus six days: the Monday starting the week
+                return func.date(PriceHistory.date, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+            return func.strftime(literal_column("'%Y-%m-01'"), PriceHistory.date)
+        return None
+
+    def _history_query(self, dialect: str, uid: Optional[int], resources: Optional[List[str]] = None,
+                       start=None, end=None, freq: Optional[str] = None):
+        """Select for ``get_price_history``; the bucket column is None when ``dialect`` cannot resample."""
+        columns = [PriceHistory.resource, PriceHistory.price_buy, PriceHistory.price_sell, PriceHistory.price_avg]
+        bucket = self._history_bucket(dialect, freq) if freq else None
+        if bucket is not None:
+            q = (select(PriceHistory.resource, *[func.avg(c) for c in columns[1:]], bucket)
+                 .group_by(PriceHistory.resource, bucket))
+        else:
+            q = select(*columns, PriceHistory.date)
+        if uid:
+            q = q.where(PriceHistory.user_id == uid)
+        if resources is not None:
+            q = q.where(PriceHistory.resource.in_(list(resources)))
+        lower, upper = history_bounds(start, end)
+        if lower is not None:
+            q = q.where(PriceHistory.date >= lower.to_pydatetime())
+        if upper is not None:
+            q = q.where(PriceHistory.date < upper.to_pydatetime())
+        return q, bucket
+
+    def get_price_history(self, username: str, resources: Optional[List[str]] = None, start=None, end=None,
+                          freq: Optional[str] = None):
+        """Price history of ``username`` (or all users if not found) as a DataFrame.
+
+        Resource list and date range are applied in SQL, as is resampling to 'day',
+        'week' or 'month' averages on Postgres and SQLite. Rows are fetched as plain
+        column tuples, without ORM objects.
+        """
+        uid = self._history_user_id(username)
+        with session_scope() as s:
+            q, bucket = self._history_query(s.get_bind().dialect.name, uid, resources, start, end, freq)
+            df = self._rows_frame(s.execute(q).all())
+        if df.empty:
+            return df
+        if freq and bucket is None:
+            return filter_price_history(df, freq=freq)
+        return df.sort_values(by=['date', 'resource'], kind='stable', ignore_index=True)
+
+    @staticmethod
+    def _rows_frame(rows) -> pd.DataFrame:
+        """History frame from ``(resource, buy, sell, average, date)`` row tuples."""
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame({name: np.array(values) for name, values in zip(HISTORY_FRAME_COLUMNS, zip(*rows))})
+        for name in ('buy', 'sell', 'average'):
+            df[name] = pd.to_numeric(df[name])
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def get_last_prices_before(self, username: str, when) -> pd.DataFrame:
+        """Latest price history row of every resource dated before ``when`` (all rows of that date)."""
+        uid = self._history_user_id(username)
+        lower, _ = history_bounds(when)
+        latest = select(PriceHistory.resource, func.max(PriceHistory.date).label('date')).where(
+            PriceHistory.date < lower.to_pydatetime())
+        if uid:
+            latest = latest.where(PriceHistory.user_id == uid)
+        latest = latest.group_by(PriceHistory.resource).subquery()
+        q = (select(PriceHistory.resource, PriceHistory.price_buy, PriceHistory.price_sell, PriceHistory.price_avg,
+                    PriceHistory.date)
+             .join(latest, (PriceHistory.resource == latest.c.resource) & (PriceHistory.date == latest.c.date)))
+        if uid:
+            q = q.where(PriceHistory.user_id == uid)
+        with session_scope() as s:
+            df = self._rows_frame(s.execute(q).all())
+        if df.empty:
+            return df
+        return df.sort_values(by=['date', 'resource'], kind='stable', ignore_index=True)
+
+    def get_history_resources(self, username: str) -> List[str]:
+        """Sorted resources in the price history of ``username`` (index-only scan)."""
+        uid = self._history_user_id(username)
         with session_scope() as s:
-            q = select(PriceHistory)
+            q = select(PriceHistory.resource).distinct().order_by(PriceHistory.resource)
             if uid:
                 q = q.where(PriceHistory.user_id == uid)
-            rows = s.execute(q).scalars().all()
-            if not rows:
-                return pd.DataFrame()
-            data = [
-                {
-                    'resource': r.resource,
-                    'buy': r.price_buy,
-                    'sell': r.price_sell,
-                    'average': r.price_avg,
-                    'date': pd.to_datetime(r.date)
-                }
-                for r in rows
-            ]
-            df = pd.DataFrame(data)
-            df['date'] = pd.to_datetime(df['date'])
-            return df.sort_values(by='date')
-
+            return list(s.execute(q).scalars().all())
 
+    def get_history_date_range(self, username: str) -> Optional[Tuple[datetime, datetime]]:
+        """First and last price history date of ``username``, or None without history."""
+        uid = self._history_user_id(username)
+        with session_scope() as s:
+            q = select(func.min(PriceHistory.date), func.max(PriceHistory.date))
+            if uid:
+                q = q.where(PriceHistory.user_id == uid)
+            first, last = s.execute(q).one()
+        if first is None:
+            return None
+        return first, last
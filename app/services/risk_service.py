@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.scenario_service import ScenarioService
+
+# Days per simulated month, as in the income summaries
+MONTH_DAYS = 30
+# Paths simulated per batch (and per process when sharded); fixes the random streams
+SHARD_PATHS = 5000
+
+
+def _simulate_shard(seed: np.random.SeedSequence, n_paths: int, start_values: np.ndarray, drift: np.ndarray,
+                    factor: np.ndarray, days: int) -> np.ndarray:
+    """Hourly-rate income summed over ``days`` for ``n_paths`` correlated log-normal price paths."""
+    rng = np.random.default_rng(seed)
+    n_resources = len(start_values)
+    # float32 and in-place steps: the (paths x days x resources) block dominates the run time
+    paths = rng.standard_normal((n_paths * days, factor.shape[1]), dtype=np.float32) @ factor.T.astype(np.float32)
+    paths += drift.astype(np.float32)
+    paths = paths.reshape(n_paths, days, n_resources)
+    np.cumsum(paths, axis=1, out=paths)
+    np.exp(paths, out=paths)
+    # start_values = exposure x current price, so each day's income is a dot product
+    daily = paths.reshape(n_paths * days, n_resources) @ start_values.astype(np.float32)
+    return daily.reshape(n_paths, days).sum(axis=1, dtype=np.float64) * 24
+
+
+@dataclass
+class RiskResult:
+    """Simulated monthly net profit (after tax and POS cost), one entry per path."""
+
+    profits: np.ndarray
+    pos_cost: float
+
+    @property
+    def mean(self) -> float:
+        return float(self.profits.mean()) if len(self.profits) else 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.profits, q)) if len(self.profits) else 0.0
+
+    @property
+    def probability_below_pos_cost(self) -> float:
+        """Share of paths whose net income does not cover the POS cost."""
+        return float((self.profits < 0).mean()) if len(self.profits) else 0.0
+
+
+class RiskService:
+    """Monte Carlo distribution of next month's net profit from historical price volatility.
+
+    Daily log returns of the held resources are estimated from the user's price
+    history (as-of daily prices, so days without a new quote count as
+    unchanged); correlated paths start from current prices and are simulated in
+    fixed-size shards with their own seeds, so results depend only on ``seed``
+    and not on how many worker processes run them.
+    """
+
+    def __init__(self, data_service, price_service):
+        self.data_service = data_service
+        self.price_service = price_service
+        self.scenarios = ScenarioService(data_service, price_service)
+
+    def return_model(self, username, resources: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and covariance of daily log returns of ``resources`` (codes) from history."""
+        _, prices = self.scenarios.history_scenarios(self.price_service.get_price_history(username))
+        prices = prices[:, resources]
+        n = len(resources)
+        if len(prices) < 3 or n == 0:
+            return np.zeros(n), np.zeros((n, n))
+        valid = (prices[1:] > 0) & (prices[:-1] > 0)
+        returns = np.where(valid, np.log(np.where(valid, prices[1:], 1) / np.where(valid, prices[:-1], 1)), 0.0)
+        return returns.mean(axis=0), np.atleast_2d(np.cov(returns, rowvar=False))
+
+    def simulate(self, username, n_paths: int = 20000, tax_rate: float = 0.0, pos_cost: float = 0.0,
+                 seed: int = 0, workers: Optional[int] = None, days: int = MONTH_DAYS,
+                 prices: Optional[Mapping[str, float]] = None, units: Optional[np.ndarray] = None) -> RiskResult:
+        """Net monthly profit over ``n_paths`` simulated price paths.
+
+        Paths start from ``prices`` (default: the current price set) and value
+        ``units`` (default: the user's layout); ``workers`` > 1 spreads the
+        shards over a process pool.
+        """
+        base = self.scenarios.base_prices(prices)
+        exposure = self.scenarios.evaluate(np.zeros((0, len(base))), units=units).sensitivity
+        held = np.flatnonzero(exposure > 0)
+        start_values = exposure[held] * base[held]
+        drift, covariance = self.return_model(username, held)
+        # Symmetric square root; tolerates the singular covariances short histories give
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+        sizes = [min(SHARD_PATHS, n_paths - start) for start in range(0, n_paths, SHARD_PATHS)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [(s, size, start_values, drift, factor, days) for s, size in zip(seeds, sizes)]
+        if workers and workers > 1 and len(args) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                incomes = list(pool.map(_simulate_shard, *zip(*args)))
+        else:
+            incomes = [_simulate_shard(*a) for a in args]
+        income = np.concatenate(incomes) if incomes else np.empty(0)
+        return RiskResult(profits=income * (1 - tax_rate / 100) - pos_cost, pos_cost=pos_cost)
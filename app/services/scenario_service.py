@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.models.universe import REGION, RESOURCE, SYSTEM
+
+
+@dataclass
+class ScenarioResult:
+    """Hourly income of one units layout under K price vectors.
+
+    ``exposure`` rows are the hourly output (output x units) of each planet per
+    resource code, so income is linear in prices and ``sensitivity`` (the summed
+    exposure) is d portfolio income / d price for every resource.
+    """
+
+    resources: np.ndarray
+    portfolio: np.ndarray
+    sensitivity: np.ndarray
+    planets: np.ndarray
+    exposure: np.ndarray
+    # Level -> codes with output, and their (codes x K) totals
+    groups: Dict[str, np.ndarray] = field(default_factory=dict)
+    group_totals: Dict[str, np.ndarray] = field(default_factory=dict)
+    planet_totals: Optional[np.ndarray] = None
+
+
+@dataclass
+class BacktestResult:
+    """Daily income of the current layout at historical prices.
+
+    ``portfolio`` has gross and net columns; ``groups`` holds one net income
+    frame (dates x group names) per level.
+    """
+
+    portfolio: pd.DataFrame
+    groups: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+
+class ScenarioService:
+    """What-if income for many price vectors at once.
+
+    A scenario matrix has one row per scenario and one column per universe
+    resource code. The units layout is reduced once to a planet x resource
+    exposure matrix; every breakdown is then a single matrix product with the
+    scenario matrix instead of a per-scenario pass over the rows.
+    """
+
+    def __init__(self, data_service, price_service):
+        self.data_service = data_service
+        self.price_service = price_service
+
+    # --- Scenario matrices ---
+    def base_prices(self, prices: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """``prices`` (default: the current price set) as a resource-code vector."""
+        if prices is None:
+            prices = self.price_service.get_all_prices()
+        return self.data_service.universe.price_vector(prices)
+
+    def price_matrix(self, price_sets: Sequence[Dict[str, float]]) -> np.ndarray:
+        """Stack ``{resource: price}`` dicts (e.g. saved price sets) into a scenario matrix."""
+        universe = self.data_service.universe
+        if not price_sets:
+            return np.zeros((0, len(universe.dictionaries[RESOURCE])))
+        return np.vstack([universe.price_vector(prices) for prices in price_sets])
+
+    def shock_matrix(self, changes: np.ndarray, base: Optional[np.ndarray] = None) -> np.ndarray:
+        """Scenarios from relative price changes (K x resources, 0.1 = +10%) applied to ``base``."""
+        base = self.base_prices() if base is None else base
+        return base * (1.0 + np.atleast_2d(changes))
+
+    def resource_shocks(self, resource_name: str, changes: Sequence[float],
+                        prices: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """One scenario per relative change of a single resource's price in ``prices`` (default: current)."""
+        universe = self.data_service.universe
+        code = universe.encode(RESOURCE, [resource_name])[0]
+        if code < 0:
+            raise ValueError(f"Unknown resource: {resource_name}")
+        matrix = np.zeros((len(changes), len(universe.dictionaries[RESOURCE])))
+        matrix[:, code] = changes
+        return self.shock_matrix(matrix, self.base_prices(prices))
+
+    # --- Evaluation ---
+    def evaluate(self, scenarios: np.ndarray, units: Optional[np.ndarray] = None,
+                 levels: Sequence[str] = (SYSTEM,), planet_totals: bool = False) -> ScenarioResult:
+        """Hourly income per scenario for the portfolio and every group of ``levels``.
+
+        ``units`` defaults to the user's layout; pass e.g. ``np.ones(n_rows)`` to
+        value the whole universe per unit. Only planets and groups with output are
+        reported. Per-planet totals (planets x K) are opt-in as they can be large.
+        """
+        universe = self.data_service.universe
+        units = self.data_service.get_units_vector() if units is None else np.asarray(units)
+        scenarios = np.atleast_2d(np.asarray(scenarios, dtype=np.float64))
+        n_resources = len(universe.dictionaries[RESOURCE])
+        if scenarios.shape[1] != n_resources:
+            raise ValueError(f"Scenario matrix needs {n_resources} resource columns, got {scenarios.shape[1]}")
+
+        rows = np.flatnonzero(units)
+        weights = universe.output[rows] * units[rows]
+        resource_codes = universe.resource_code[rows]
+        planets, planet_local = np.unique(universe.row_planet[rows], return_inverse=True)
+        exposure = np.bincount(planet_local * n_resources + resource_codes, weights=weights,
+                               minlength=len(planets) * n_resources).reshape(len(planets), n_resources)
+        sensitivity = exposure.sum(axis=0)
+
+        result = ScenarioResult(
+            resources=universe.dictionaries[RESOURCE],
+            portfolio=scenarios @ sensitivity,
+            sensitivity=sensitivity,
+            planets=planets,
+            exposure=exposure,
+        )
+        for level in levels:
+            codes, local = np.unique(universe.planet_codes(level)[planets], return_inverse=True)
+            order = np.argsort(local, kind='stable')
+            starts = np.searchsorted(local[order], np.arange(len(codes)))
+            group_exposure = np.add.reduceat(exposure[order], starts) if len(codes) else exposure[:0]
+            result.groups[level] = codes
+            result.group_totals[level] = group_exposure @ scenarios.T
+        if planet_totals:
+            result.planet_totals = exposure @ scenarios.T
+        return result
+
+    # --- Backtest ---
+    def history_scenarios(self, history: pd.DataFrame, price_column: str = 'average') -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """As-of price matrix (one row per day, one column per resource code) from a history frame.
+
+        Every day carries each resource's latest quote at or before it; days
+        before a resource's first quote price it at 0, like missing prices.
+        Resources unknown to the universe are ignored.
+        """
+        universe = self.data_service.universe
+        n_resources = len(universe.dictionaries[RESOURCE])
+        if history.empty:
+            return pd.DatetimeIndex([]), np.zeros((0, n_resources))
+        history = history.sort_values('date', kind='stable')
+        days = pd.to_datetime(history['date']).dt.normalize().to_numpy()
+        dates = pd.date_range(days.min(), days.max(), freq='D')
+        codes = universe.encode(RESOURCE, history['resource'].astype(str).tolist())
+        prices = pd.to_numeric(history[price_column], errors='coerce').to_numpy(dtype=np.float64)
+        known = (codes >= 0) & ~np.isnan(prices)
+
+        # Later quotes overwrite earlier ones of the same day
+        quotes = np.full((len(dates), n_resources), np.nan)
+        quotes[dates.get_indexer(days[known]), codes[known]] = prices[known]
+        # Forward fill: index of the latest quoted day per cell
+        latest = np.where(np.isnan(quotes), 0, np.arange(len(dates))[:, None])
+        np.maximum.accumulate(latest, axis=0, out=latest)
+        filled = quotes[latest, np.arange(n_resources)]
+        return dates, np.nan_to_num(filled, nan=0.0)
+
+    def backtest(self, username, start=None, end=None, price_column: str = 'average', tax_rate: float = 0.0,
+                 levels: Sequence[str] = (REGION,)) -> BacktestResult:
+        """What the current units layout would have earned per day over the user's price history.
+
+        Quotes from before ``start`` carry into the range: each resource's last
+        earlier quote is dated ``start`` ahead of the forward fill.
+        """
+        universe = self.data_service.universe
+        history = self.price_service.get_price_history(username, start=start, end=end)
+        if start is not None:
+            seed = self.price_service.get_last_prices_before(username, start)
+            if not seed.empty:
+                # Sorted ahead of in-range quotes of the first day, which then overwrite it
+                seed = seed.assign(date=pd.Timestamp(start))
+                history = pd.concat([seed, history], ignore_index=True) if not history.empty else seed
+        dates, scenarios = self.history_scenarios(history, price_column)
+        result = self.evaluate(scenarios, levels=levels)
+        gross = result.portfolio * 24
+        backtest = BacktestResult(portfolio=pd.DataFrame(
+            {'gross': gross, 'net': gross * (1 - tax_rate / 100)}, index=pd.Index(dates, name='date')))
+        for level in levels:
+            backtest.groups[level] = pd.DataFrame(
+                (result.group_totals[level] * 24 * (1 - tax_rate / 100)).T,
+                index=pd.Index(dates, name='date'),
+                columns=universe.decode(level, result.groups[level]).tolist(),
+            )
+        return backtest
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from app.models.jump_graph import JumpGraph
+from app.models.universe import Universe
+
+
+# Bump whenever the snapshot layout or the Universe encoding changes
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PREFIX = "universe-v"
+
+# Stargate adjacency (one connection per line, in either direction) next to the planets data
+JUMPS_FILES = ("system_jumps.parquet", "system_jumps.csv")
+JUMP_COLUMNS = ("from_system", "to_system")
+
+_universes: Dict[str, Universe] = {}
+# Jump graph file path -> (mtime_ns, graph)
+_jump_graphs: Dict[str, Tuple[int, JumpGraph]] = {}
+_lock = threading.Lock()
+
+
+def _source_path(data_path: str) -> str:
+    """Resolve the file the universe is read from (Parquet preferred over Excel)."""
+    parquet_path = data_path.replace('.xlsx', '.parquet')
+    if os.path.exists(parquet_path):
+        return parquet_path
+    if os.path.exists(data_path):
+        return data_path
+    raise FileNotFoundError(f"Data file not found at {data_path} or {parquet_path}")
+
+
+def read_planets_frame(data_path: str) -> pd.DataFrame:
+    """Read the raw planets table from Parquet, falling back to the Excel source."""
+    source = _source_path(data_path)
+    if source.endswith('.parquet'):
+        return pd.read_parquet(source, engine='pyarrow')
+    return pd.read_excel(source, engine='openpyxl')
+
+
+def source_digest(source: str) -> str:
+    """Content hash of the source data file."""
+    digest = hashlib.sha1()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_dir(data_path: str, cache_dir: Optional[str] = None) -> str:
+    """Snapshot location for the current contents of the source data file."""
+    source = _source_path(data_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(source), "cache")
+    name = f"{SNAPSHOT_PREFIX}{SNAPSHOT_VERSION}-{source_digest(source)[:16]}"
+    return os.path.join(cache_dir, name)
+
+
+def build_snapshot(data_path: str, cache_dir: Optional[str] = None) -> str:
+    """Process the source data and write the universe snapshot; returns its directory.
+
+    Older snapshots in the same cache directory are removed.
+    """
+    target = snapshot_dir(data_path, cache_dir)
+    universe = Universe.from_frame(read_planets_frame(data_path))
+    write_snapshot(universe, target)
+    return target
+
+
+def write_snapshot(universe: Universe, target: str) -> None:
+    """Write ``universe`` as Arrow IPC files into ``target`` atomically."""
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".universe-", dir=parent)
+    try:
+        for name, table in zip(("rows", "planets"), universe.to_arrow()):
+            with pa.OSFile(os.path.join(staging, f"{name}.arrow"), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.chmod(staging, 0o755)
+        if os.path.isdir(target):
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    for entry in os.listdir(parent):
+        if entry.startswith(SNAPSHOT_PREFIX) and entry != os.path.basename(target):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def load_snapshot(target: str) -> Universe:
+    """Memory-map a snapshot directory; numeric columns are used without copying."""
+    tables = []
+    for name in ("rows", "planets"):
+        source = pa.memory_map(os.path.join(target, f"{name}.arrow"), 'r')
+        tables.append(pa.ipc.open_file(source).read_all())
+    return Universe.from_arrow(*tables)
+
+
+def _load(data_path: str) -> Universe:
+    target = snapshot_dir(data_path)
+    if os.path.isdir(target):
+        try:
+            return load_snapshot(target)
+        except (OSError, pa.ArrowException, KeyError, ValueError):
+            pass  # Corrupt or incompatible snapshot: rebuild below
+    universe = Universe.from_frame(read_planets_frame(data_path))
+    try:
+        write_snapshot(universe, target)
+    except OSError:
+        pass  # Read-only deployments just skip the cache
+    return universe
+
+
+def load_universe(data_path: str) -> Universe:
+    """Return the process-wide read-only Universe for ``data_path``.
+
+    The dataset is static, so it is loaded once and shared by every user session;
+    per-user state (mining units, prices) lives in the services on top of it.
+    The processed universe is cached as a memory-mapped snapshot keyed by the
+    source file hash, so cold starts skip parsing and processing.
+    """
+    key = os.path.abspath(data_path)
+    universe = _universes.get(key)
+    if universe is not None:
+        return universe
+    with _lock:
+        universe = _universes.get(key)
+        if universe is None:
+            universe = _load(data_path)
+            # Build the lookup indexes up front so the first sidebar render is cheap
+            universe.hierarchy()
+            universe.search_index()
+            _universes[key] = universe
+    return universe
+
+
+def load_jump_graph(data_path: str, universe: Universe) -> Optional[JumpGraph]:
+    """Return the shared stargate graph for the dataset, or None without a jumps file.
+
+    The file lives next to the planets data and holds ``from_system``/``to_system``
+    name pairs; it is re-read when its modification time changes.
+    """
+    directory = os.path.dirname(os.path.abspath(data_path))
+    path = next((os.path.join(directory, name) for name in JUMPS_FILES
+                 if os.path.exists(os.path.join(directory, name))), None)
+    if path is None:
+        return None
+    mtime = os.stat(path).st_mtime_ns
+    cached = _jump_graphs.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        cached = _jump_graphs.get(path)
+        if cached is None or cached[0] != mtime:
+            if path.endswith('.parquet'):
+                jumps = pd.read_parquet(path, columns=list(JUMP_COLUMNS))
+            else:
+                jumps = pd.read_csv(path, usecols=list(JUMP_COLUMNS), dtype=str)
+            graph = JumpGraph.from_names(universe, jumps[JUMP_COLUMNS[0]].astype(str), jumps[JUMP_COLUMNS[1]].astype(str))
+            cached = (mtime, graph)
+            _jump_graphs[path] = cached
+    return cached[1]
+
+
+def shared_state() -> List[object]:
+    """The loaded universes and jump graphs, which every user session shares."""
+    with _lock:
+        return [*_universes.values(), *(graph for _, graph in _jump_graphs.values())]
+
+
+def clear_universe_cache() -> None:
+    """Drop all loaded universes (e.g. after the source data file changed)."""
+    with _lock:
+        _universes.clear()
+        _jump_graphs.clear()
+
+
+if __name__ == "__main__":
+    # Build step, e.g. during the container build:
+    #   python -m app.services.universe_service data/eve_planets.parquet
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "eve_planets.parquet")
+    print(build_snapshot(path))
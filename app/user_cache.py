@@ -0,0 +1,239 @@
+import itertools
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Containers larger than this are sized from a sample of their items
+SAMPLE_ITEMS = 256
+# Code objects are shared by everyone and never charged
+_SKIPPED = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def resident_bytes(value: Any, shared: Iterable[Any] = ()) -> int:
+    """Approximate memory held by ``value``, not counting what ``shared`` objects reach.
+
+    Walks arrays, frames, builtin containers and ``app`` objects; other objects
+    (connections, locks, ...) count only their own size. Large containers are
+    extrapolated from their first ``SAMPLE_ITEMS`` items.
+    """
+    seen = set()
+    _walk(list(shared), seen, lambda _: None)
+    total = 0
+
+    def add(n: int) -> None:
+        nonlocal total
+        total += n
+
+    _walk([value], seen, add)
+    return total
+
+
+def _walk(stack: list, seen: set, add: Callable[[int], None]) -> None:
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIPPED):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            add(obj.nbytes if obj.base is None or id(obj.base) not in seen else 0)
+        elif isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = (obj.memory_usage(deep=False) if isinstance(obj, pd.Index)
+                     else obj.memory_usage(index=True, deep=False))
+            add(int(usage.sum() if isinstance(usage, pd.Series) else usage))
+        elif isinstance(obj, (dict, list, tuple, set, frozenset)):
+            add(sys.getsizeof(obj))
+            parts = list(itertools.chain.from_iterable(obj.items()) if isinstance(obj, dict)
+                         else obj) if len(obj) <= SAMPLE_ITEMS else None
+            if parts is not None:
+                stack.extend(parts)
+                continue
+            sample = itertools.islice(obj.items() if isinstance(obj, dict) else obj, SAMPLE_ITEMS)
+            sampled = [0]
+            _walk(list(itertools.chain.from_iterable(sample) if isinstance(obj, dict) else sample),
+                  seen, lambda n: sampled.__setitem__(0, sampled[0] + n))
+            add(sampled[0] * len(obj) // SAMPLE_ITEMS)
+        else:
+            add(sys.getsizeof(obj))
+            if type(obj).__module__.startswith('app.') and hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    last_access: float
+    bytes: int = 0
+    measured_at: float = float('-inf')
+
+
+class UserStateCache:
+    """Per-user state (services) kept resident between reruns, within limits.
+
+    Entries are evicted least recently used first when there are more than
+    ``max_users``, when the measured total exceeds ``memory_budget`` bytes, or
+    after ``idle_seconds`` without a request. The user being served is never
+    evicted. Evicted state is handed to ``release`` (to flush unsaved changes)
+    and rebuilt by the caller's loader on the user's next request.
+    """
+
+    # Sizes are re-measured on access at most this often (a walk takes ~10-20 ms)
+    MEASURE_SECONDS = 5.0
+
+    def __init__(self, max_users: Optional[int] = None, idle_seconds: Optional[float] = None,
+                 memory_budget: Optional[int] = None, release: Optional[Callable[[Any], None]] = None,
+                 shared: Callable[[], Iterable[Any]] = tuple, clock: Callable[[], float] = time.monotonic):
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self.memory_budget = memory_budget
+        self.release = release
+        # Process-wide objects (e.g. the universe) that are not charged to any user
+        self.shared = shared
+        self.clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        # Usernames being loaded -> Future resolved once the entry is in place
+        self._loading: Dict[str, Future] = {}
+        # Evicted usernames whose release is still running -> Future resolved when it is done
+        self._releasing: Dict[str, Future] = {}
+        self._evicted = set()
+        self.hits = 0
+        self.loads = 0
+        self.rehydrations = 0
+        self.evictions: Dict[str, int] = {'lru': 0, 'idle': 0, 'memory': 0}
+
+    def __contains__(self, username: str) -> bool:
+        with self._lock:
+            return username in self._entries
+
+    def get(self, username: str, load: Callable[[], Any]) -> Any:
+        """The user's state, loaded with ``load()`` if it is not resident.
+
+        Loading, measuring and releasing run outside the cache lock, so a cold
+        user does not stall other users' requests; concurrent requests of the
+        same user wait for one shared load.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(username)
+                if entry is not None:
+                    self.hits += 1
+                    break
+                pending = self._loading.get(username)
+                owner = pending is None
+                if owner:
+                    pending = self._loading[username] = Future()
+                    releasing = self._releasing.get(username)
+            if not owner:
+                # Another request is loading this user; retry once it is resident
+                pending.result()
+                continue
+            try:
+                if releasing is not None:
+                    # Reload only after an eviction of this user has flushed its changes
+                    releasing.result()
+                value = load()
+            except BaseException as e:
+                with self._lock:
+                    del self._loading[username]
+                pending.set_exception(e)
+                raise
+            with self._lock:
+                entry = self._entries[username] = _Entry(value, self.clock())
+                del self._loading[username]
+                self.loads += 1
+                if username in self._evicted:
+                    self._evicted.discard(username)
+                    self.rehydrations += 1
+            pending.set_result(None)
+            break
+
+        now = self.clock()
+        # State grows while requests are served, so sizes are refreshed on access
+        if now - entry.measured_at >= self.MEASURE_SECONDS:
+            entry.bytes = self._measure(entry.value)
+            entry.measured_at = now
+        with self._lock:
+            entry.last_access = now
+            if username in self._entries:
+                self._entries.move_to_end(username)
+            victims = self._select_victims(username, now)
+        self._release(victims)
+        return entry.value
+
+    def evict(self, username: str, reason: str = 'lru') -> bool:
+        """Drop a user's state, releasing it first. Returns True if it was resident."""
+        with self._lock:
+            victims = self._pop(username, reason)
+        self._release(victims)
+        return bool(victims)
+
+    def _pop(self, username: str, reason: str) -> List[Tuple[str, _Entry]]:
+        entry = self._entries.pop(username, None)
+        if entry is None:
+            return []
+        self._evicted.add(username)
+        self.evictions[reason] = self.evictions.get(reason, 0) + 1
+        self._releasing.setdefault(username, Future())
+        return [(username, entry)]
+
+    def _release(self, victims: List[Tuple[str, _Entry]]) -> None:
+        # Called without the lock held: releasing flushes to disk or the database
+        for username, entry in victims:
+            try:
+                if self.release is not None:
+                    self.release(entry.value)
+            finally:
+                with self._lock:
+                    done = self._releasing.pop(username, None)
+                if done is not None:
+                    done.set_result(None)
+
+    def _measure(self, value: Any) -> int:
+        try:
+            return resident_bytes(value, self.shared())
+        except RuntimeError:
+            # A concurrent rerun changed a container mid-walk; keep going without a size
+            return 0
+
+    def _select_victims(self, current: str, now: float) -> List[Tuple[str, _Entry]]:
+        """Remove the entries over the limits (oldest first, never ``current``); the caller releases them."""
+        victims = []
+        if self.idle_seconds is not None:
+            for name in [name for name in self._entries if name != current]:
+                if now - self._entries[name].last_access > self.idle_seconds:
+                    victims += self._pop(name, 'idle')
+        others = [name for name in self._entries if name != current]
+        while others and self.max_users is not None and len(self._entries) > self.max_users:
+            victims += self._pop(others.pop(0), 'lru')
+        while others and self.memory_budget is not None and self.resident_bytes > self.memory_budget:
+            victims += self._pop(others.pop(0), 'memory')
+        return victims
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.bytes for entry in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Resident users and bytes, hit/load counts, evictions by reason and per-user sizes."""
+        with self._lock:
+            now = self.clock()
+            return {
+                'users': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'memory_budget': self.memory_budget,
+                'hits': self.hits,
+                'loads': self.loads,
+                'rehydrations': self.rehydrations,
+                'evictions': dict(self.evictions),
+                'per_user': {name: {'bytes': entry.bytes, 'idle_seconds': now - entry.last_access}
+                             for name, entry in self._entries.items()},
+            }
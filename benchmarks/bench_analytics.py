@@ -0,0 +1,99 @@
+"""Benchmark AnalyticsService against the per-Planet object loops it replaced.
+
+The legacy implementations iterate ``Planet`` objects and call
+``planet.total_value(prices)``; the service uses segment sums over the universe
+arrays and incrementally maintained leaderboards. Results are asserted
+identical. Run from the project root:
+
+    python benchmarks/bench_analytics.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.analytics_service import AnalyticsService
+from app.services.data_service import DataService
+from app.services.price_service import PriceService
+
+
+def legacy_top(planets, prices, attribute, top_n):
+    values = {}
+    for planet in planets:
+        key = getattr(planet, attribute)
+        values[key] = values.get(key, 0) + planet.total_value(prices)
+    ranked = sorted(values.items(), key=lambda x: x[1], reverse=True)
+    return ranked[:top_n]
+
+
+def legacy_planets(planets, prices, top_n):
+    ranked = sorted(((p, p.total_value(prices)) for p in planets), key=lambda x: x[1], reverse=True)
+    return ranked[:top_n]
+
+
+def legacy_distribution(planets, resource_name):
+    distribution = {}
+    for planet in planets:
+        for resource in planet.resources:
+            if resource.resource == resource_name:
+                distribution[planet.region] = distribution.get(planet.region, 0) + 1
+    return distribution
+
+
+def timed(fn, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    # A dense random layout so every planet has a value
+    data_service.units[:] = np.random.default_rng(0).integers(0, 4, data_service.universe.n_rows)
+    price_service = PriceService(os.path.join("data", "prices.json"))
+    analytics = AnalyticsService(data_service, price_service)
+    planets = data_service.get_all_planets()
+    prices = price_service.get_all_prices()
+    resource = data_service.get_all_resources()[0]
+
+    cases = [
+        ("top planets", lambda: [(p.planet_id, v) for p, v in legacy_planets(planets, prices, 10)],
+         lambda: [(p.planet_id, v) for p, v in analytics.get_most_profitable_planets(10)]),
+        ("top systems", lambda: legacy_top(planets, prices, 'system', 10),
+         lambda: analytics.get_most_profitable_systems(10)),
+        ("top constellations", lambda: legacy_top(planets, prices, 'constellation', 10),
+         lambda: analytics.get_most_profitable_constellations(10)),
+        ("top regions", lambda: legacy_top(planets, prices, 'region', 10),
+         lambda: analytics.get_most_profitable_regions(10)),
+        ("resource distribution", lambda: legacy_distribution(planets, resource),
+         lambda: analytics.get_resource_distribution(resource)),
+    ]
+    for label, legacy, engine in cases:
+        expected, legacy_ms = timed(legacy)
+        actual, engine_ms = timed(engine)
+        assert expected == actual, label
+        print(f"{label:>22}: objects {legacy_ms:9.2f} ms  arrays {engine_ms:8.2f} ms  x{legacy_ms / engine_ms:.0f}")
+    _, rollup_ms = timed(analytics.get_value_rollup)
+    print(f"{'full roll-up (3 levels)':>22}: arrays {rollup_ms:8.2f} ms")
+
+    # One mining-unit cell changes between rankings: incremental update vs a cold service
+    rng = np.random.default_rng(1)
+    keys = data_service.universe.keys
+
+    def edit_and_rank(service):
+        data_service.update_mining_units(keys[rng.integers(len(keys))], int(rng.integers(0, 6)))
+        return service.get_most_profitable_systems(10)
+
+    _, warm_ms = timed(lambda: edit_and_rank(analytics), repeat=20)
+    _, cold_ms = timed(lambda: edit_and_rank(AnalyticsService(data_service, price_service)), repeat=20)
+    assert analytics.get_most_profitable_systems(10) == AnalyticsService(data_service, price_service).get_most_profitable_systems(10)
+    print(f"{'unit edit + top systems':>22}: rebuild {cold_ms:9.2f} ms  incremental {warm_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
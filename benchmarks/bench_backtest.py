@@ -0,0 +1,89 @@
+"""Benchmark the portfolio backtest against a per-date valuation loop.
+
+Three years of daily quotes (with gaps) are generated for every resource. The
+loop keeps a running "latest price" dict, builds the price vector of each day
+and values the layout; the backtest as-of joins the history into one
+dates x resources matrix and values all days with one matrix product.
+Daily incomes are asserted equal. Run from the project root:
+
+    python benchmarks/bench_backtest.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.universe import REGION, RESOURCE
+from app.services.data_service import DataService
+from app.services.scenario_service import ScenarioService
+
+
+class HistoryPrices:
+    """Stand-in price service serving a generated history frame."""
+
+    def __init__(self, history):
+        self.history = history
+
+    def get_all_prices(self):
+        return {}
+
+    def get_price_history(self, username, resources=None, start=None, end=None, freq=None):
+        return self.history
+
+
+def generated_history(resources, days, rng):
+    dates = pd.date_range("2023-01-01", periods=days, freq="D")
+    frames = []
+    for resource in resources:
+        quoted = dates[rng.random(days) < 0.8]
+        frames.append(pd.DataFrame({
+            'resource': resource,
+            'buy': rng.uniform(100, 2000, len(quoted)),
+            'sell': rng.uniform(100, 2000, len(quoted)),
+            'average': rng.uniform(100, 2000, len(quoted)),
+            'date': quoted + pd.Timedelta(hours=12),
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values(['date', 'resource'], ignore_index=True)
+
+
+def per_date_loop(universe, units, history):
+    latest = {}
+    by_day = dict(list(history.groupby(history['date'].dt.normalize())))
+    days = pd.date_range(min(by_day), max(by_day), freq='D')
+    incomes = []
+    for day in days:
+        if day in by_day:
+            latest.update(zip(by_day[day]['resource'], by_day[day]['average']))
+        prices = universe.price_vector(latest)
+        incomes.append(float((universe.output * prices[universe.resource_code] * units).sum()) * 24)
+    return np.array(incomes)
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    rng = np.random.default_rng(0)
+    data_service.units[rng.choice(universe.n_rows, 800, replace=False)] = rng.integers(1, 10, 800)
+    history = generated_history(universe.dictionaries[RESOURCE].tolist(), 3 * 365, rng)
+    service = ScenarioService(data_service, HistoryPrices(history))
+
+    start = time.perf_counter()
+    expected = per_date_loop(universe, data_service.units, history)
+    loop_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    result = service.backtest("bench", tax_rate=8.0)
+    backtest_ms = (time.perf_counter() - start) * 1000
+
+    assert np.allclose(result.portfolio['gross'].to_numpy(), expected, rtol=1e-9)
+    assert np.allclose(result.groups[REGION].sum(axis=1).to_numpy(), expected * 0.92, rtol=1e-9)
+    print(f"{len(history)} quotes over {len(expected)} days: per-date loop {loop_ms:8.1f} ms  "
+          f"backtest {backtest_ms:6.1f} ms  x{loop_ms / backtest_ms:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark the haul route planner on a few hundred active planets.
+
+A synthetic stargate map is used (see bench_jump_graph.py) as no jump data
+ships with the repository. The plan is checked for feasibility (every planet
+collected before its storage fills, every tour within the cargo hold) and
+compared with collecting every planet on every trip in nearest-neighbour
+order. Run from the project root:
+
+    python benchmarks/bench_haul_routes.py
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.jump_graph import JumpGraph
+from app.models.universe import PLANET, REGION, SYSTEM
+from app.services.data_service import DataService
+from app.services.logistics_service import LogisticsService
+from bench_jump_graph import synthetic_edges
+
+STORAGE_CAPACITY = 920
+CARGO_CAPACITY = 10000
+
+
+def nearest_neighbour_jumps(service, plan, jumps_of):
+    """Jumps per cycle when every planet is visited on every trip, nearest system first."""
+    planets, volume = service.planet_volumes()
+    universe = service.data_service.universe
+    systems = universe.planet_codes(SYSTEM)[planets]
+    home = universe.encode(SYSTEM, [plan.home_system])[0]
+    total = 0
+    for _ in plan.trips:
+        remaining = dict(Counter(systems.tolist()))
+        load = {s: volume[systems == s].sum() * plan.base_hours for s in remaining}
+        position, hold = home, 0.0
+        while remaining:
+            target = min(remaining, key=lambda s: jumps_of(position, s))
+            if hold + load[target] > CARGO_CAPACITY:
+                total += jumps_of(position, home)
+                position, hold = home, 0.0
+            total += jumps_of(position, target)
+            position, hold = target, hold + load[target]
+            del remaining[target]
+        total += jumps_of(position, home)
+    return total
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    rng = np.random.default_rng(0)
+    graph = JumpGraph.from_edges(*synthetic_edges(universe, rng))
+    data_service.get_jump_graph = lambda: graph
+    service = LogisticsService(data_service)
+
+    # Active planets spread over two regions, a few units each
+    regions = universe.encode(REGION, universe.dictionaries[REGION].tolist()[:2])
+    candidates = np.flatnonzero(np.isin(universe.row_codes(REGION), regions))
+    for n_rows in (100, 300, 600):
+        data_service.units[:] = 0
+        data_service.units[rng.choice(candidates, n_rows, replace=False)] = rng.integers(1, 8, n_rows)
+        start = time.perf_counter()
+        plan = service.plan_hauls(STORAGE_CAPACITY, CARGO_CAPACITY, haul_hours=48, time_budget=2.0)
+        plan_ms = (time.perf_counter() - start) * 1000
+
+        planets, volume = service.planet_volumes()
+        names = universe.decode(PLANET, universe.planet_codes(PLANET)[planets]).tolist()
+        collected = Counter()
+        for trip in plan.trips:
+            for tour in trip.tours:
+                assert tour.volume <= CARGO_CAPACITY + 1e-6
+                for stop in tour.stops:
+                    collected.update(set(stop.planets))
+        for name, hourly in zip(names, volume):
+            interval = plan.visit_hours[name]
+            assert interval * hourly <= STORAGE_CAPACITY + 1e-6, name
+            assert collected[name] == round(plan.cycle_hours / interval), name
+
+        baseline = nearest_neighbour_jumps(service, plan, lambda a, b: graph.distance(a, b))
+        print(f"{len(planets):>4} planets: plan {plan_ms:7.1f} ms  cycle {plan.cycle_hours:6.1f} h "
+              f"({len(plan.trips)} trips)  jumps {plan.total_jumps:>5}  every-planet-every-trip {baseline:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark the geographic hierarchy index against full-frame scans.
+
+Compares the pre-index DataService lookups (``isin`` / ``unique`` / ``sorted``
+over the whole planets table) and the master-table region/constellation/system
+filter with the precomputed index. Run from the project root:
+
+    python benchmarks/bench_hierarchy.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data_service import DataService
+from app.services.universe_service import read_planets_frame
+
+
+def timed(fn, repeat=50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    data_path = os.path.join("data", "eve_planets.parquet")
+    service = DataService(data_path, mining_units_path=os.devnull)
+    service.load_data()
+    raw = read_planets_frame(data_path)
+    master = service.get_resource_frame()
+
+    rng = np.random.default_rng(0)
+    regions = sorted(rng.choice(service.get_regions(), size=3, replace=False).tolist())
+    constellations = service.get_constellations(regions)[:8]
+    systems = service.get_systems(constellations)[:10]
+
+    cases = [
+        ("get_regions",
+         lambda: sorted(raw['Region'].unique().tolist()),
+         service.get_regions),
+        ("get_constellations(3 regions)",
+         lambda: sorted(raw[raw['Region'].isin(regions)]['Constellation'].unique().tolist()),
+         lambda: service.get_constellations(regions)),
+        ("get_systems(8 constellations)",
+         lambda: sorted(raw[raw['Constellation'].isin(constellations)]['System'].unique().tolist()),
+         lambda: service.get_systems(constellations)),
+        ("filter rows (region+const+system)",
+         lambda: master.index[master['Region'].isin(regions) & master['Constellation'].isin(constellations)
+                              & master['System'].isin(systems)].to_numpy(),
+         lambda: service.select_rows(regions, constellations, systems)),
+    ]
+    for label, legacy, indexed in cases:
+        expected, legacy_ms = timed(legacy)
+        actual, indexed_ms = timed(indexed)
+        assert list(expected) == list(actual), label
+        print(f"{label:>36}: scan {legacy_ms:8.3f} ms  index {indexed_ms:8.3f} ms  x{legacy_ms / indexed_ms:.0f}")
+
+
+if __name__ == "__main__":
+    main()
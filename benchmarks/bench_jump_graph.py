@@ -0,0 +1,95 @@
+"""Benchmark jump-graph queries against a dict-of-lists BFS.
+
+No stargate data ships with the repository, so a synthetic map is generated:
+each constellation's systems form a ring and neighbouring constellations are
+linked by a few random gates. Distances are asserted equal to a plain Python
+BFS, and the radius route query is timed over the whole map. Run from the
+project root:
+
+    python benchmarks/bench_jump_graph.py
+"""
+import os
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.jump_graph import UNREACHABLE, JumpGraph
+from app.models.universe import CONSTELLATION, SYSTEM
+from app.services.analytics_service import AnalyticsService
+from app.services.data_service import DataService
+from app.services.price_service import PriceService
+
+
+def synthetic_edges(universe, rng):
+    hierarchy = universe.hierarchy()
+    constellation_of = hierarchy.parent[SYSTEM]
+    sources, targets = [], []
+    for constellation in range(len(universe.dictionaries[CONSTELLATION])):
+        systems = np.flatnonzero(constellation_of == constellation)
+        if len(systems) > 1:
+            sources.extend(systems.tolist())
+            targets.extend(np.roll(systems, 1).tolist())
+    n_systems = len(universe.dictionaries[SYSTEM])
+    gates = rng.integers(0, n_systems, (n_systems // 2, 2))
+    sources.extend(gates[:, 0].tolist())
+    targets.extend(gates[:, 1].tolist())
+    return n_systems, np.array(sources), np.array(targets)
+
+
+def python_bfs(adjacency, source, n_systems):
+    dist = [UNREACHABLE] * n_systems
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        system = queue.popleft()
+        for neighbor in adjacency[system]:
+            if dist[neighbor] == UNREACHABLE:
+                dist[neighbor] = dist[system] + 1
+                queue.append(neighbor)
+    return dist
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    rng = np.random.default_rng(0)
+    n_systems, sources, targets = synthetic_edges(universe, rng)
+
+    graph, build_ms = timed(lambda: JumpGraph.from_edges(n_systems, sources, targets), repeat=5)
+    adjacency = [graph.neighbors(s).tolist() for s in range(n_systems)]
+    print(f"graph: {n_systems} systems, {graph.n_edges} gates, CSR build {build_ms:.1f} ms")
+
+    starts = rng.choice(n_systems, 20, replace=False).tolist()
+    expected, python_ms = timed(lambda: [python_bfs(adjacency, s, n_systems) for s in starts], repeat=1)
+    fresh = JumpGraph(graph.indptr, graph.indices)
+    actual, csr_ms = timed(lambda: [fresh.distances([s]) for s in starts], repeat=1)
+    _, cached_ms = timed(lambda: [fresh.distances([s]) for s in starts])
+    assert all(list(a) == e for a, e in zip(actual, expected))
+    print(f"20 BFS: python {python_ms:8.2f} ms  csr {csr_ms:8.2f} ms  cached {cached_ms:8.3f} ms")
+
+    data_service.units[:] = rng.integers(0, 3, universe.n_rows)
+    data_service.get_jump_graph = lambda: graph
+    analytics = AnalyticsService(data_service, PriceService(os.path.join("data", "prices.json")))
+    analytics.price_service.update_multiple_prices({name: float(rng.uniform(100, 2000))
+                                                    for name in universe.dictionaries["Resource"].tolist()})
+    start_system = universe.decode(SYSTEM, [starts[0]])[0]
+    for max_jumps in (3, 6, 10):
+        route, route_ms = timed(lambda: analytics.get_optimal_mining_route(start_system, max_jumps, top_n=20), repeat=5)
+        reachable = len(graph.within([starts[0]], max_jumps))
+        print(f"route within {max_jumps:>2} jumps ({reachable:>4} systems): {route_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
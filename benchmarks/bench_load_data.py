@@ -0,0 +1,107 @@
+"""Benchmark the columnar planet loader against the legacy iterrows() loop.
+
+Run from the project root:
+
+    python benchmarks/bench_load_data.py [--scale 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.data_model import Planet, PlanetaryResource, PlanetType, Richness
+from app.models.universe import Universe
+
+
+def legacy_process(df, mining_units):
+    """The pre-columnar DataService._process_data loop, kept for comparison."""
+    planets = {}
+    for _, row in df.iterrows():
+        planet_id = int(row['Planet ID'])
+        resource = row['Resource']
+        num_units = mining_units.get(f"{planet_id}_{resource}", 0)
+        planetary_resource = PlanetaryResource(
+            planet_id=planet_id,
+            region=row['Region'],
+            constellation=row['Constellation'],
+            system=row['System'],
+            planet_name=row['Planet Name'],
+            planet_type=PlanetType(row['Planet Type']),
+            resource=resource,
+            richness=Richness(row['Richness']),
+            output=float(row['Output']),
+            mining_units=num_units
+        )
+        if planet_id not in planets:
+            planets[planet_id] = Planet(
+                planet_id=planet_id,
+                region=row['Region'],
+                constellation=row['Constellation'],
+                system=row['System'],
+                name=row['Planet Name'],
+                planet_type=PlanetType(row['Planet Type'])
+            )
+        planets[planet_id].add_resource(planetary_resource)
+    return planets
+
+
+def columnar_process(df, mining_units):
+    universe = Universe.from_frame(df)
+    return universe.build_planets(universe.units_vector(mining_units))
+
+
+def synthetic_frame(df, scale):
+    """Tile the dataset ``scale`` times with fresh planet ids."""
+    id_span = int(df['Planet ID'].max()) + 1
+    parts = []
+    for i in range(scale):
+        part = df.copy()
+        part['Planet ID'] = part['Planet ID'] + i * id_span
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def sample_units(df, n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.choice(len(df), size=min(n, len(df)), replace=False)]
+    return {f"{int(p)}_{r}": int(rng.integers(1, 10)) for p, r in zip(rows['Planet ID'], rows['Resource'])}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(df, label, check):
+    units = sample_units(df)
+    new_planets, new_time = timed(columnar_process, df, units)
+    line = f"{label:>10}: {len(df):>9,} rows  columnar {new_time:7.3f}s"
+    if check:
+        old_planets, old_time = timed(legacy_process, df, units)
+        assert list(old_planets) == list(new_planets)
+        assert all(old_planets[k] == new_planets[k] for k in old_planets)
+        line += f"  iterrows {old_time:7.3f}s  speedup x{old_time / new_time:.1f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=os.path.join("data", "eve_planets.parquet"))
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--skip-legacy-scaled", action="store_true",
+                        help="Do not run the slow iterrows loop on the synthetic dataset")
+    args = parser.parse_args()
+
+    df = pd.read_parquet(args.data, engine='pyarrow')
+    run(df, "shipped", check=True)
+    run(synthetic_frame(df, args.scale), f"x{args.scale}", check=not args.skip_legacy_scaled)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark memoized analysis/income tables against rebuilding them on every rerun.
+
+Simulates a session of Streamlit reruns where most interactions (tab switches,
+expanders, unrelated widgets) change none of the inputs, and a few edit a
+mining unit, a price or a filter. Memoized tables are asserted equal to fresh
+builds after every step. Run from the project root:
+
+    python benchmarks/bench_memo.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.memo import VersionedMemo
+from app.models.universe import REGION
+from app.services.analytics_service import AnalyticsService
+from app.services.data_service import DataService
+from app.services.price_service import PriceService
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    price_service = PriceService(os.path.join("data", "prices.json"))
+    price_service.price_file_path = os.devnull
+    analytics = AnalyticsService(data_service, price_service)
+    rng = np.random.default_rng(0)
+    data_service.set_units_vector(np.where(rng.random(universe.n_rows) < 0.004, rng.integers(1, 6, universe.n_rows), 0))
+    regions = universe.dictionaries[REGION].tolist()
+    resources = sorted(price_service.get_all_prices())
+    tax_rate = 8.0
+
+    # One in ten reruns changes an input
+    steps = []
+    for step in range(300):
+        event = rng.integers(30) if step % 10 == 0 else None
+        steps.append(event)
+
+    def rerun(memo, filters, check):
+        stamps = (universe.fingerprint, data_service.units_version, price_service.version, filters)
+        df, df_display = (memo.get('analysis', stamps, lambda: analytics.analysis_table(*filters))
+                          if memo else analytics.analysis_table(*filters))
+        summary = (memo.get('summary', (stamps, tax_rate), lambda: analytics.income_table(df, tax_rate))
+                   if memo else analytics.income_table(df, tax_rate))
+        if check:
+            fresh, fresh_display = analytics.analysis_table(*filters)
+            pd.testing.assert_frame_equal(df, fresh)
+            pd.testing.assert_frame_equal(df_display, fresh_display)
+            pd.testing.assert_frame_equal(summary, analytics.income_table(fresh, tax_rate))
+
+    for label, memo in (("rebuild every rerun", None), ("versioned memo", VersionedMemo())):
+        state = np.random.default_rng(1)
+        filters = ((), (), (), "", ())
+        elapsed = 0.0
+        for event in steps:
+            if event is not None:
+                if event < 10:
+                    row = int(state.integers(universe.n_rows))
+                    data_service.update_mining_units(universe.keys[row], int(state.integers(0, 6)))
+                elif event < 20:
+                    name = resources[int(state.integers(len(resources)))]
+                    price_service.update_price(name, float(state.uniform(100, 2000)))
+                else:
+                    picked = tuple(sorted(state.choice(regions, int(state.integers(0, 3)), replace=False).tolist()))
+                    filters = (picked, (), (), "", ())
+            start = time.perf_counter()
+            rerun(memo, filters, check=False)
+            elapsed += time.perf_counter() - start
+            if memo is not None and event is not None:
+                rerun(memo, filters, check=True)
+        print(f"{label:>20}: {elapsed * 1000 / len(steps):7.2f} ms per rerun")
+        if memo is not None:
+            print(f"{'':>20}  {memo.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark price history import: per-row ORM adds vs the streaming importer.
+
+Generates a synthetic year of daily market dumps (resource,buy,sell,average,date)
+and imports it into a temporary SQLite database, reporting rows/s and, with
+``--memory``, peak Python memory (tracemalloc). Run from the project root:
+
+    python benchmarks/bench_price_import.py --days 365 --memory
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from sqlalchemy import delete, func, select
+
+from app.db import session_scope
+from app.models.sql_models import PriceHistory
+from app.services.price_service_sql import SQLPriceService
+
+
+def legacy_import(service, df, user_id=None, price_date=None):
+    """The pre-streaming import_prices_dataframe."""
+    with session_scope() as s:
+        for _, row in df.iterrows():
+            resource = service._normalize_resource(row.get('resource'))
+            if not resource:
+                continue
+            buy = row.get('buy') if 'buy' in df.columns else None
+            sell = row.get('sell') if 'sell' in df.columns else None
+            avg = row.get('average') if 'average' in df.columns else None
+            d = row.get('date') if 'date' in df.columns else price_date
+            try:
+                d = pd.to_datetime(d) if d is not None else datetime.utcnow()
+            except Exception:
+                d = datetime.utcnow()
+            s.add(PriceHistory(user_id=user_id, resource=resource, price_buy=buy, price_sell=sell, price_avg=avg, date=d))
+
+
+def write_csv(path, days, resources):
+    rng = np.random.default_rng(0)
+    names = [f"Resource {i}" for i in range(resources)]
+    dates = pd.date_range("2024-01-01", periods=days, freq="D").strftime("%Y-%m-%d")
+    df = pd.DataFrame({
+        "resource": np.tile(names, days),
+        "buy": rng.uniform(100, 2000, days * resources).round(2),
+        "sell": rng.uniform(100, 2000, days * resources).round(2),
+        "average": rng.uniform(100, 2000, days * resources).round(2),
+        "date": np.repeat(dates, resources),
+    })
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def reset():
+    with session_scope() as s:
+        s.execute(delete(PriceHistory))
+
+
+def measure(fn, memory):
+    reset()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    with session_scope() as s:
+        count = s.execute(select(func.count()).select_from(PriceHistory)).scalar_one()
+    peak = None
+    if memory:
+        # Separate pass: tracemalloc slows allocation-heavy code down considerably
+        reset()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--resources", type=int, default=150)
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the slow per-row import")
+    parser.add_argument("--memory", action="store_true", help="also report peak Python memory")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "history.csv")
+    n = write_csv(path, args.days, args.resources)
+    service = SQLPriceService()
+
+    cases = [("streaming", lambda: service.import_prices_csv(path, update_current=False))]
+    if not args.skip_legacy:
+        cases.insert(0, ("per-row ORM", lambda: legacy_import(service, pd.read_csv(path))))
+    for label, fn in cases:
+        count, elapsed, peak_mb = measure(fn, args.memory)
+        assert count == n, (label, count, n)
+        memory = f"  peak {peak_mb:7.1f} MiB" if peak_mb is not None else ""
+        print(f"{label:>12}: {n:>8} rows  {elapsed:7.2f} s  {n / elapsed:>9,.0f} rows/s{memory}")
+
+
+if __name__ == "__main__":
+    main()
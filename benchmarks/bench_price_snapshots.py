@@ -0,0 +1,107 @@
+"""Benchmark per-session copy-on-write price sets against reloading prices on every rerun.
+
+The baseline is the old sidebar: every rerun re-reads the default prices from
+disk, and a selected CSV price set is re-read and written into the shared
+dict. With snapshots the default set stays cached until a write and the CSV
+set is derived once per session and kept in its state. A concurrency check
+then runs sessions holding different sets in threads while another thread
+keeps writing new defaults: every read must see one complete set, and
+sessions holding a derived set their own. Run from the project root:
+
+    python benchmarks/bench_price_snapshots.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.price_service import PriceService
+
+RERUNS = 2000
+
+
+def main():
+    root = tempfile.mkdtemp()
+    try:
+        price_path = os.path.join(root, "prices.json")
+        shutil.copy(os.path.join("data", "prices.json"), price_path)
+        with open(price_path) as f:
+            default = json.load(f)
+        csv_path = os.path.join(root, "prices_2024-07-31.csv")
+        pd.DataFrame({'resource': list(default), 'price': [p * 1.1 for p in default.values()]}).to_csv(csv_path, index=False)
+        service = PriceService(price_path)
+
+        # Alternate between default and CSV views, as two browser tabs would
+        sources = [None if i % 2 else "file:prices_2024-07-31.csv" for i in range(RERUNS)]
+
+        def load_csv():
+            df = pd.read_csv(csv_path)
+            return pd.Series(df.price.values, index=df.resource).to_dict()
+
+        start = time.perf_counter()
+        for source in sources:
+            if source is None:
+                service.load_prices()
+            else:
+                service.update_multiple_prices(load_csv())
+            legacy = service.get_all_prices()
+        legacy_ms = (time.perf_counter() - start) * 1000 / RERUNS
+        service.load_prices()
+
+        session_state = {}
+        start = time.perf_counter()
+        for i, source in enumerate(sources):
+            session = i % 2
+            snapshot = session_state.get(session)
+            if source is None:
+                snapshot = service.current
+            elif snapshot is None or snapshot.source != source or snapshot.base_version != service.current.version:
+                snapshot = service.derive(load_csv(), source)
+            session_state[session] = snapshot
+            view = dict(snapshot.prices)
+        snapshot_ms = (time.perf_counter() - start) * 1000 / RERUNS
+        assert view == legacy == default and session_state[0].prices == {**default, **load_csv()}
+        print(f"reload per rerun {legacy_ms:.3f} ms  session snapshots {snapshot_ms:.3f} ms  x{legacy_ms / snapshot_ms:.0f}")
+
+        # Writers publish sets where every price equals the set's generation
+        resources = list(default)
+        service.update_multiple_prices({name: 0.0 for name in resources})
+        stop = threading.Event()
+        torn = []
+
+        def reader(holds_derived):
+            snapshot = service.derive({name: -1.0 for name in resources}, "history") if holds_derived else None
+            while not stop.is_set():
+                values = set((snapshot.prices if holds_derived else service.get_all_prices()).values())
+                # A session holding a derived set must keep seeing it, whatever the writer does
+                if len(values) != 1 or holds_derived and values != {-1.0}:
+                    torn.append(values)
+
+        def writer():
+            for generation in range(1, 2000):
+                service.update_multiple_prices({name: float(generation) for name in resources})
+
+        readers = [threading.Thread(target=reader, args=(i % 2 == 0,)) for i in range(4)]
+        for thread in readers:
+            thread.start()
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        writer_thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        assert not torn, f"{len(torn)} torn reads"
+        print(f"concurrent reads while writing: no torn or foreign reads, default now v{service.current.version}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark the Monte Carlo profit simulation.
+
+Uses generated price history (see bench_backtest.py). Checks that results are
+identical with and without process-pool sharding for a fixed seed and that
+the simulated mean income matches the log-normal expectation, then times
+tens of thousands of monthly paths. Run from the project root:
+
+    python benchmarks/bench_risk.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.universe import RESOURCE
+from app.services.data_service import DataService
+from app.services.risk_service import MONTH_DAYS, RiskService
+from bench_backtest import HistoryPrices, generated_history
+
+
+class PricedHistory(HistoryPrices):
+    def __init__(self, history, prices):
+        super().__init__(history)
+        self.prices = prices
+
+    def get_all_prices(self):
+        return self.prices
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    rng = np.random.default_rng(0)
+    data_service.units[rng.choice(universe.n_rows, 800, replace=False)] = rng.integers(1, 10, 800)
+    resources = universe.dictionaries[RESOURCE].tolist()
+    history = generated_history(resources, 365, rng)
+    # A random walk is a more realistic history than independent daily draws
+    history['average'] = history.groupby('resource')['average'].transform(
+        lambda s: 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, len(s)))))
+    prices = {name: float(rng.uniform(100, 2000)) for name in resources}
+    service = RiskService(data_service, PricedHistory(history, prices))
+
+    single = service.simulate("bench", n_paths=20000, tax_rate=8, pos_cost=1.5e9, seed=42)
+    sharded = service.simulate("bench", n_paths=20000, tax_rate=8, pos_cost=1.5e9, seed=42, workers=4)
+    assert np.array_equal(single.profits, sharded.profits)
+
+    exposure = service.scenarios.evaluate(np.zeros((0, len(resources)))).sensitivity
+    held = np.flatnonzero(exposure > 0)
+    drift, covariance = service.return_model("bench", held)
+    days = np.arange(1, MONTH_DAYS + 1)[:, None]
+    start_values = exposure[held] * service.scenarios.base_prices()[held]
+    expected = (np.exp(days * (drift + np.diag(covariance) / 2)) @ start_values).sum() * 24 * 0.92 - 1.5e9
+    assert abs(single.mean - expected) < 0.01 * abs(expected + 1.5e9), (single.mean, expected)
+
+    for n_paths, workers in ((20000, None), (100000, None), (100000, 4)):
+        start = time.perf_counter()
+        result = service.simulate("bench", n_paths=n_paths, tax_rate=8, pos_cost=1.5e9, seed=1, workers=workers)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{n_paths:>6} paths, {len(held)} resources, workers={workers}: {elapsed:7.1f} ms  "
+              f"P(below POS) {result.probability_below_pos_cost:.3f}  p5 {result.percentile(5):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark batched price scenarios against re-running the valuation per scenario.
+
+The per-scenario baseline prices every row and sums planets/systems once per
+price vector, as repeated AnalyticsService refreshes would; the scenario engine
+evaluates all vectors with one matrix product. Totals are asserted equal (to
+floating point tolerance). Run from the project root:
+
+    python benchmarks/bench_scenarios.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.universe import RESOURCE, SYSTEM
+from app.services.data_service import DataService
+from app.services.price_service import PriceService
+from app.services.scenario_service import ScenarioService
+
+
+def per_scenario(universe, units, scenarios):
+    systems = universe.planet_codes(SYSTEM)
+    portfolio = np.empty(len(scenarios))
+    system_totals = np.empty((len(universe.dictionaries[SYSTEM]), len(scenarios)))
+    for k, prices in enumerate(scenarios):
+        row_values = universe.output * prices[universe.resource_code] * units
+        planet_values = np.bincount(universe.row_planet, weights=row_values, minlength=universe.n_planets)
+        system_values = np.bincount(systems, weights=planet_values, minlength=len(universe.dictionaries[SYSTEM]))
+        portfolio[k] = planet_values.sum()
+        system_totals[:, k] = system_values
+    return portfolio, system_totals
+
+
+def main():
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), mining_units_path=os.devnull)
+    data_service.load_data()
+    universe = data_service.universe
+    rng = np.random.default_rng(0)
+    # A sparse layout like a real user's: a few hundred resources with units
+    data_service.units[rng.choice(universe.n_rows, 600, replace=False)] = rng.integers(1, 6, 600)
+    service = ScenarioService(data_service, PriceService(os.path.join("data", "prices.json")))
+    n_resources = len(universe.dictionaries[RESOURCE])
+    base = rng.uniform(100, 2000, n_resources)
+
+    for label, units, k in (("user layout", None, 5000), ("full universe", np.ones(universe.n_rows), 1000)):
+        scenarios = service.shock_matrix(rng.normal(0, 0.2, (k, n_resources)), base=base)
+        start = time.perf_counter()
+        result = service.evaluate(scenarios, units=units)
+        batched_ms = (time.perf_counter() - start) * 1000
+
+        layout = data_service.units if units is None else units
+        legacy_k = 50
+        start = time.perf_counter()
+        portfolio, system_totals = per_scenario(universe, layout, scenarios[:legacy_k])
+        legacy_ms = (time.perf_counter() - start) * 1000 * k / legacy_k
+
+        assert np.allclose(result.portfolio[:legacy_k], portfolio, rtol=1e-9)
+        assert np.allclose(result.group_totals[SYSTEM][:, :legacy_k], system_totals[result.groups[SYSTEM]], rtol=1e-9)
+        print(f"{label:>14} ({k} scenarios): per-scenario ~{legacy_ms:9.1f} ms  batched {batched_ms:7.1f} ms"
+              f"  x{legacy_ms / batched_ms:.0f}")
+
+
+if __name__ == "__main__":
+    main()
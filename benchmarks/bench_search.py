@@ -0,0 +1,47 @@
+"""Benchmark the name search index against ``str.contains`` scans.
+
+Compares the pre-index search box filter (case-insensitive ``str.contains`` over
+the System, Constellation and Region columns of the master table) with the
+n-gram/prefix index. Run from the project root:
+
+    python benchmarks/bench_search.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.data_service import DataService
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    data_path = os.path.join("data", "eve_planets.parquet")
+    service = DataService(data_path, mining_units_path=os.devnull)
+    service.load_data()
+    master = service.get_resource_frame()
+
+    def scan(query):
+        mask = (master['System'].astype(str).str.contains(query, case=False, regex=False)
+                | master['Constellation'].astype(str).str.contains(query, case=False, regex=False)
+                | master['Region'].astype(str).str.contains(query, case=False, regex=False))
+        return master.index[mask].to_numpy()
+
+    for query in ("a", "je", "jit", "Amarr", "the forge", "x-7", "zzzz"):
+        expected, scan_ms = timed(lambda: scan(query))
+        actual, index_ms = timed(lambda: service.search_rows(query))
+        assert list(expected) == list(actual), query
+        print(f"{query!r:>12}: {len(actual):>7} rows  scan {scan_ms:8.3f} ms  index {index_ms:8.3f} ms"
+              f"  x{scan_ms / index_ms:.0f}")
+    print("autocomplete('je'):", service.autocomplete("je"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark the per-user state cache: resident memory, evictions and rehydration.
+
+Simulates a day of logins by many users, each editing a few mining units and
+browsing rankings, against an unbounded cache (every user stays resident, as
+with a bare ``st.cache_resource``) and a budgeted one. Rehydrated users are
+asserted to see the units they had before eviction. Run from the project root:
+
+    python benchmarks/bench_user_cache.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.analytics_service import AnalyticsService
+from app.services.data_service import DataService
+from app.services.price_service import PriceService
+from app.services.universe_service import shared_state
+from app.user_cache import UserStateCache
+
+USERS = 40
+REQUESTS = 400
+
+
+def load_services(root, username):
+    user_root = os.path.join(root, username)
+    os.makedirs(user_root, exist_ok=True)
+    data_service = DataService(os.path.join("data", "eve_planets.parquet"), os.path.join(user_root, "mining_units.json"))
+    data_service.load_data()
+    price_service = PriceService(os.path.join("data", "prices.json"))
+    return data_service, price_service, AnalyticsService(data_service, price_service)
+
+
+def main():
+    # Load the shared universe before timing
+    load_services(tempfile.mkdtemp(), "warmup")
+    clock = [0.0]
+    for label, limits in (("unbounded", {}),
+                          ("budgeted", {'max_users': 16, 'idle_seconds': 1800, 'memory_budget': 256 * 2**20})):
+        root = tempfile.mkdtemp()
+        cache = UserStateCache(release=lambda services: services[0].save_mining_units(), shared=shared_state,
+                               clock=lambda: clock[0], **limits)
+        rng = np.random.default_rng(0)
+        expected = {}
+        load_seconds = []
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            clock[0] += rng.exponential(60)
+            # A few regulars and a long tail of occasional users
+            username = f"user{min(int(rng.zipf(1.5)), USERS) - 1}"
+            resident = username in cache
+            load_start = time.perf_counter()
+            data_service, _, analytics = cache.get(username, lambda: load_services(root, username))
+            if not resident:
+                load_seconds.append(time.perf_counter() - load_start)
+            if username in expected:
+                assert np.array_equal(data_service.units, expected[username])
+            rows = rng.choice(data_service.universe.n_rows, 5, replace=False)
+            for row in rows.tolist():
+                data_service.update_mining_units(data_service.universe.keys[row], int(rng.integers(1, 6)))
+            analytics.get_most_profitable_planets(10)
+            data_service.planets
+            expected[username] = data_service.units.copy()
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        print(f"{label:>10}: {stats['users']:3d} resident, {stats['resident_bytes'] / 2**20:7.1f} MB, "
+              f"{stats['loads']} loads ({stats['rehydrations']} rehydrations, "
+              f"{np.mean(load_seconds) * 1000:.1f} ms each), evictions {stats['evictions']}, "
+              f"{elapsed * 1000 / REQUESTS:.1f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,16 @@ CREATE TABLE IF NOT EXISTS price_history (
 );
 CREATE INDEX IF NOT EXISTS ix_price_history_date ON price_history(date);
 CREATE INDEX IF NOT EXISTS ix_price_history_resource ON price_history(resource);
+CREATE INDEX IF NOT EXISTS ix_price_history_user_resource_date ON price_history(user_id, resource, date);
+
+-- One packed price vector per imported date (see app/models/price_snapshot.py)
+CREATE TABLE IF NOT EXISTS price_snapshots (
+  id SERIAL PRIMARY KEY,
+  user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+  taken_at TIMESTAMPTZ NOT NULL,
+  data BYTEA NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_price_snapshots_user_taken_at ON price_snapshots(user_id, taken_at);
 
 CREATE TABLE IF NOT EXISTS mining_units (
   id SERIAL PRIMARY KEY,
@@ -40,6 +50,14 @@ CREATE TABLE IF NOT EXISTS mining_units (
   units INTEGER NOT NULL DEFAULT 0
 );
 
+-- Packed int16 units vector aligned to the universe row ids (see app/models/mining_units.py)
+CREATE TABLE IF NOT EXISTS mining_unit_vectors (
+  id SERIAL PRIMARY KEY,
+  universe_fingerprint VARCHAR(40) NOT NULL UNIQUE,
+  data BYTEA NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Optional seed example (uncomment to prefill a couple of resources)
 -- INSERT INTO prices(resource, price) VALUES
 --   ('Base Metals', 10),
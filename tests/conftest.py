@@ -0,0 +1,65 @@
+"""Shared fixtures: a small synthetic universe and a file-backed DataService over it."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.universe import Universe
+from app.services.data_service import DataService
+
+RESOURCES = ["Base Metals", "Heavy Water", "Lustering Alloy", "Glossy Compound"]
+TYPES = ["Temperate", "Barren", "Oceanic", "Gas", "Ice", "Lava", "Storm", "Plasma"]
+RICHNESS = ["Poor", "Medium", "Rich", "Perfect"]
+
+
+def toy_planets_frame(seed: int = 7) -> pd.DataFrame:
+    """2 regions x 2 constellations x 2 systems x 3 planets, 2-4 resources each."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    planet_id = 40000000
+    for region in ("Aridia", "Derelik"):
+        for c in range(2):
+            constellation = f"{region} C{c}"
+            for s in range(2):
+                system = f"{constellation} S{s}"
+                for p in range(3):
+                    planet_id += 1
+                    planet_type = TYPES[int(rng.integers(len(TYPES)))]
+                    for resource in rng.choice(RESOURCES, size=int(rng.integers(2, 5)), replace=False):
+                        rows.append({
+                            'Planet ID': planet_id, 'Region': region, 'Constellation': constellation,
+                            'System': system, 'Planet Name': f"{system} {'I' * (p + 1)}",
+                            'Planet Type': planet_type, 'Resource': str(resource),
+                            'Richness': RICHNESS[int(rng.integers(len(RICHNESS)))],
+                            'Output': float(np.round(rng.uniform(1, 60), 2)),
+                        })
+    return pd.DataFrame(rows)
+
+
+TOY_PRICES = {"Base Metals": 300.0, "Heavy Water": 40.0, "Lustering Alloy": 1200.0, "Glossy Compound": 800.0}
+
+
+class StaticPrices:
+    """Price service stand-in with a fixed default set."""
+
+    def __init__(self, prices=None):
+        self.prices = dict(TOY_PRICES if prices is None else prices)
+
+    def get_all_prices(self):
+        return dict(self.prices)
+
+
+@pytest.fixture
+def universe():
+    return Universe.from_frame(toy_planets_frame())
+
+
+@pytest.fixture
+def data_service(universe, tmp_path):
+    service = DataService(str(tmp_path / "planets.parquet"), str(tmp_path / "mining_units.json"), universe=universe)
+    service.load_data()
+    return service
@@ -0,0 +1,62 @@
+"""Greedy and exact unit allocation against brute force on tiny scopes.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from app.models.allocation import EXACT_MAX_CELLS, exact_allocation, greedy_allocation
+
+
+def _brute_force(values, volumes, starts, budget, max_per_planet, volume_cap):
+    """Best total value over every assignment of 0..max_per_planet units per row."""
+    planet = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+    best = 0.0
+    for units in itertools.product(range(max_per_planet + 1), repeat=len(values)):
+        units = np.array(units)
+        if units.sum() > budget:
+            continue
+        per_planet = np.bincount(planet, weights=units, minlength=len(starts))
+        used = np.bincount(planet, weights=units * volumes, minlength=len(starts))
+        if (per_planet <= max_per_planet).all() and (used <= volume_cap + 1e-9).all():
+            best = max(best, float(units @ values))
+    return best
+
+
+def _check(units, values, volumes, starts, budget, max_per_planet, volume_cap):
+    planet = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(values))))
+    assert units.min() >= 0 and units.sum() <= budget
+    assert (np.bincount(planet, weights=units, minlength=len(starts)) <= max_per_planet).all()
+    assert (np.bincount(planet, weights=units * volumes, minlength=len(starts)) <= volume_cap + 1e-9).all()
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_exact_matches_brute_force_and_bounds_greedy(seed):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.uniform(-1, 10, 5), 1)
+    volumes = np.round(rng.uniform(0.5, 3, 5), 1)
+    starts = np.array([0, 2, 3])
+    budget, max_per_planet, volume_cap = int(rng.integers(1, 6)), 3, float(rng.uniform(2, 6))
+
+    expected = _brute_force(values, volumes, starts, budget, max_per_planet, volume_cap)
+    exact = exact_allocation(values, volumes, starts, budget, max_per_planet, volume_cap)
+    greedy = greedy_allocation(values, volumes, starts, budget, max_per_planet, volume_cap)
+    for units in (exact, greedy):
+        _check(units, values, volumes, starts, budget, max_per_planet, volume_cap)
+    assert np.isclose(exact @ values, expected)
+    assert greedy @ values <= expected + 1e-9
+
+    # Without a binding volume cap the greedy solver is optimal too
+    greedy = greedy_allocation(values, volumes, starts, budget, max_per_planet, np.inf)
+    assert np.isclose(greedy @ values, _brute_force(values, volumes, starts, budget, max_per_planet, np.inf))
+
+
+def test_exact_refuses_oversized_tables():
+    starts = np.arange(100)
+    values = np.ones(100)
+    with pytest.raises(ValueError):
+        exact_allocation(values, np.zeros(100), starts, EXACT_MAX_CELLS // 100, 1, np.inf)
@@ -0,0 +1,100 @@
+"""AnalyticsService rankings against plain-Python sums over the toy universe.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import sys
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from app.models.universe import CONSTELLATION, REGION, SYSTEM
+from app.services.analytics_service import AnalyticsService
+from conftest import StaticPrices
+
+
+def _reference_totals(universe, units, prices, level):
+    """Hourly value per name of ``level``, summed row by row."""
+    names = universe.decode(level, universe.row_codes(level)).tolist()
+    resources = universe.decode("Resource", universe.resource_code).tolist()
+    totals = defaultdict(float)
+    for row in range(universe.n_rows):
+        totals[names[row]] += float(universe.output[row]) * prices.get(resources[row], 0.0) * int(units[row])
+    return totals
+
+
+def _assign(data_service, rng, n):
+    for row in rng.choice(data_service.universe.n_rows, size=n, replace=False).tolist():
+        data_service.update_mining_units(data_service.universe.keys[row], int(rng.integers(0, 6)))
+
+
+def test_rollups_and_rankings_match_row_sums(data_service):
+    prices = StaticPrices()
+    analytics = AnalyticsService(data_service, prices)
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        _assign(data_service, rng, 10)
+        prices.prices["Heavy Water"] *= 1.5
+        rollup = analytics.get_value_rollup()
+        for level in (SYSTEM, CONSTELLATION, REGION):
+            expected = _reference_totals(data_service.universe, data_service.units, prices.prices, level)
+            assert rollup[level].keys() == expected.keys()
+            for name, value in expected.items():
+                assert np.isclose(rollup[level][name], value)
+        top = analytics.get_most_profitable_systems(3)
+        expected = _reference_totals(data_service.universe, data_service.units, prices.prices, SYSTEM)
+        assert np.allclose([value for _, value in top], sorted(expected.values(), reverse=True)[:3])
+
+
+def test_concurrent_sessions_keep_caches_consistent(data_service):
+    prices = StaticPrices()
+    analytics = AnalyticsService(data_service, prices)
+    errors = []
+
+    def session(seed):
+        rng = np.random.default_rng(seed)
+        try:
+            for _ in range(40):
+                _assign(data_service, rng, 2)
+                analytics.get_most_profitable_systems(5)
+                analytics.get_most_profitable_planets(5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(seed,)) for seed in range(4)]
+    # Switch threads often so unsynchronized cache updates would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
+
+    # The shared instance ends where a fresh one starts
+    fresh = AnalyticsService(data_service, prices)
+    assert analytics.get_value_rollup() == fresh.get_value_rollup()
+    assert analytics.get_most_profitable_systems(10) == fresh.get_most_profitable_systems(10)
+    assert analytics.get_most_profitable_regions(10) == fresh.get_most_profitable_regions(10)
+
+
+def test_explicit_price_set_overrides_default(data_service):
+    prices = StaticPrices()
+    analytics = AnalyticsService(data_service, prices)
+    _assign(data_service, np.random.default_rng(3), 20)
+    selected = {name: price * 2 for name, price in prices.prices.items()}
+    rollup = analytics.get_value_rollup(selected)
+    expected = _reference_totals(data_service.universe, data_service.units, selected, REGION)
+    for name, value in expected.items():
+        assert np.isclose(rollup[REGION][name], value)
+    table, _ = analytics.analysis_table(prices=selected)
+    assert np.isclose(table["Total Value/h"].sum(), sum(expected.values()))
+    # Other callers still see the default set
+    default = _reference_totals(data_service.universe, data_service.units, prices.prices, REGION)
+    assert analytics.get_value_rollup()[REGION] == analytics.get_value_rollup(prices.prices)[REGION]
+    assert np.isclose(sum(analytics.get_value_rollup()[REGION].values()), sum(default.values()))
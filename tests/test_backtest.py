@@ -0,0 +1,77 @@
+"""Backtests over a date range against the same days of a full-history backtest.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import db
+from app.models.sql_models import Base, PriceHistory
+from app.services.price_service import PriceService
+from app.services.price_service_sql import SQLPriceService
+from app.services.scenario_service import ScenarioService
+
+# day of January 2024 -> quotes of that day
+QUOTES = {
+    1: {"Base Metals": 300.0, "Heavy Water": 40.0, "Lustering Alloy": 1200.0},
+    5: {"Base Metals": 330.0},
+    10: {"Heavy Water": 55.0, "Glossy Compound": 800.0},
+    12: {"Lustering Alloy": 900.0},
+}
+
+
+@pytest.fixture
+def file_prices(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    imports_dir = os.path.join("data", "user_data", "user", "price_imports")
+    os.makedirs(imports_dir)
+    for day, prices in QUOTES.items():
+        pd.DataFrame({'resource': list(prices), 'buy': list(prices.values()), 'sell': list(prices.values()),
+                      'average': list(prices.values())}).to_csv(
+            os.path.join(imports_dir, f"prices-2024-01-{day:02d}.csv"), index=False)
+    return PriceService(str(tmp_path / "prices.json"))
+
+
+@pytest.fixture
+def sql_prices(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}", future=True)
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "_SessionLocal", sessionmaker(bind=engine, autoflush=False, future=True))
+    Base.metadata.create_all(bind=engine)
+    with db.session_scope() as s:
+        for day, prices in QUOTES.items():
+            for resource, price in prices.items():
+                s.execute(insert(PriceHistory).values(user_id=1, resource=resource, price_buy=price,
+                                                      price_sell=price, price_avg=price,
+                                                      date=datetime(2024, 1, day, 12)))
+    service = SQLPriceService.__new__(SQLPriceService)
+    service._init_snapshots()
+    return service
+
+
+@pytest.mark.parametrize("prices_fixture", ["file_prices", "sql_prices"])
+def test_range_starts_from_the_last_earlier_quotes(data_service, prices_fixture, request):
+    price_service = request.getfixturevalue(prices_fixture)
+    for row, key in enumerate(data_service.universe.keys):
+        data_service.update_mining_units(key, row % 3 + 1)
+    scenarios = ScenarioService(data_service, price_service)
+
+    full = scenarios.backtest("user")
+    ranged = scenarios.backtest("user", start=date(2024, 1, 3), end=date(2024, 1, 11))
+    # Days 3 and 4 price every resource at its day-1 quote instead of 0
+    assert ranged.portfolio.index[0] == pd.Timestamp(2024, 1, 3)
+    assert ranged.portfolio.index[-1] == pd.Timestamp(2024, 1, 10)
+    expected = full.portfolio.loc[ranged.portfolio.index]
+    assert np.allclose(ranged.portfolio.to_numpy(), expected.to_numpy())
+
+    seed = price_service.get_last_prices_before("user", date(2024, 1, 11))
+    assert dict(zip(seed['resource'], seed['average'])) == {
+        "Base Metals": 330.0, "Heavy Water": 55.0, "Lustering Alloy": 1200.0, "Glossy Compound": 800.0}
@@ -0,0 +1,86 @@
+"""Savings tours, 2-opt and haul plans against brute force on small instances.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import itertools
+import time
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.models.haul_routes import plan_tours, savings_tours, tour_jumps, two_opt
+from app.services.logistics_service import LogisticsService
+
+
+def _instance(seed, n):
+    """Manhattan jumps between random grid points (node 0 is home) and random loads."""
+    rng = np.random.default_rng(seed)
+    points = rng.integers(0, 10, (n, 2))
+    dist = np.abs(points[:, None, :] - points[None, :, :]).sum(axis=2)
+    loads = np.round(rng.uniform(1, 10, n), 1)
+    loads[0] = 0
+    return dist, loads
+
+
+def _best_round_trip(nodes, dist):
+    return min(tour_jumps(order, dist) for order in itertools.permutations(nodes))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_savings_tours_cover_nodes_within_capacity(seed):
+    dist, loads = _instance(seed, 8)
+    capacity = float(loads.max()) * 2
+    tours = savings_tours(dist, loads, capacity)
+    assert sorted(node for tour in tours for node in tour) == list(range(1, 8))
+    assert all(loads[tour].sum() <= capacity for tour in tours)
+    # Merges only happen on non-negative savings, so no worse than one trip per node
+    assert sum(tour_jumps(tour, dist) for tour in tours) <= sum(2 * dist[0, 1:])
+    # An unbounded hold takes everything in one trip
+    assert len(savings_tours(dist, loads, np.inf)) == 1
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_two_opt_reaches_a_local_optimum(seed):
+    dist, loads = _instance(seed, 7)
+    start = list(np.random.default_rng(seed).permutation(np.arange(1, 7)))
+    tour = two_opt(list(start), dist, time.perf_counter() + 10)
+    assert sorted(tour) == sorted(start)
+    jumps = tour_jumps(tour, dist)
+    assert _best_round_trip(range(1, 7), dist) <= jumps <= tour_jumps(start, dist)
+    # No single segment reversal shortens it any further
+    for i, j in itertools.combinations(range(len(tour)), 2):
+        reversed_tour = tour[:i] + tour[i:j + 1][::-1] + tour[j + 1:]
+        assert tour_jumps(reversed_tour, dist) >= jumps
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_plan_tours_close_to_optimal_single_trip(seed):
+    dist, loads = _instance(seed, 7)
+    tours = plan_tours(dist, loads, np.inf, time.perf_counter() + 10)
+    best = _best_round_trip(range(1, 7), dist)
+    assert len(tours) == 1 and best <= tour_jumps(tours[0], dist) <= 1.5 * best
+
+
+def test_haul_plan_visits_every_planet_on_schedule(data_service):
+    for row, key in enumerate(data_service.universe.keys):
+        data_service.update_mining_units(key, row % 3)
+    service = LogisticsService(data_service)
+    planets, volume = service.planet_volumes()
+    storage, cargo = 5.0, 8.0
+    plan = service.plan_hauls(storage, cargo, haul_hours=48.0)
+
+    assert plan.estimated_jumps
+    # Trips collecting each planet (a planet over one hold is split into several stops of a trip)
+    visits = Counter(name for trip in plan.trips
+                     for name in {name for tour in trip.tours for stop in tour.stops for name in stop.planets})
+    assert len(plan.visit_hours) == len(planets)
+    for name, hours in plan.visit_hours.items():
+        # Collected often enough never to fill, once per period of the cycle
+        assert visits[name] == round(plan.cycle_hours / hours)
+    assert all(hours <= storage / v + 1e-9 for hours, v in zip(plan.visit_hours.values(), volume))
+    for trip in plan.trips:
+        assert all(tour.volume <= cargo + 1e-9 for tour in trip.tours)
+        assert all(tour.volume == pytest.approx(sum(stop.volume for stop in tour.stops)) for tour in trip.tours)
@@ -0,0 +1,55 @@
+"""Hierarchy index lookups and row selection against scans of the toy universe.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import itertools
+
+from app.models.universe import CONSTELLATION, REGION, SYSTEM
+
+LEVELS = (REGION, CONSTELLATION, SYSTEM)
+
+
+def _names(universe, level):
+    return universe.decode(level, universe.row_codes(level)).tolist()
+
+
+def test_lookups_match_scans(universe):
+    hierarchy = universe.hierarchy()
+    planet_codes = {level: universe.planet_codes(level) for level in LEVELS}
+    row_codes = {level: universe.row_codes(level) for level in LEVELS}
+    for level in LEVELS:
+        n_codes = len(universe.dictionaries[level])
+        for size in (1, 2):
+            for codes in itertools.combinations(range(n_codes), size):
+                expected_planets = [p for p in range(universe.n_planets) if planet_codes[level][p] in codes]
+                expected_rows = [r for r in range(universe.n_rows) if row_codes[level][r] in codes]
+                assert hierarchy.planets_of(level, codes).tolist() == expected_planets
+                assert hierarchy.rows_of(level, codes).tolist() == expected_rows
+                if level != SYSTEM:
+                    child = LEVELS[LEVELS.index(level) + 1]
+                    expected_children = sorted({int(planet_codes[child][p]) for p in expected_planets})
+                    assert hierarchy.children_of(level, codes).tolist() == expected_children
+    # Unknown codes are ignored
+    assert hierarchy.planets_of(SYSTEM, [-1, 10 ** 6]).tolist() == []
+
+
+def test_select_rows_matches_filter(data_service):
+    universe = data_service.universe
+    regions, constellations, systems = (_names(universe, level) for level in LEVELS)
+    cases = [
+        (["Aridia"], [], []),
+        (["Aridia"], ["Derelik C0"], []),
+        (["Derelik"], ["Derelik C1"], ["Derelik C1 S0", "Aridia C0 S1"]),
+        ([], [], ["Aridia C1 S1"]),
+        ([], ["Aridia C0", "Derelik C0"], []),
+    ]
+    for selected_regions, selected_constellations, selected_systems in cases:
+        expected = [row for row in range(universe.n_rows)
+                    if (not selected_regions or regions[row] in selected_regions)
+                    and (not selected_constellations or constellations[row] in selected_constellations)
+                    and (not selected_systems or systems[row] in selected_systems)]
+        rows = data_service.select_rows(selected_regions, selected_constellations, selected_systems)
+        assert rows.tolist() == expected
+    assert data_service.select_rows([], [], []) is None
@@ -0,0 +1,57 @@
+"""Partial-selection ranking and incremental leaderboards against a full sort.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import numpy as np
+import pytest
+
+from app.models.leaderboard import Leaderboard, descending_order, top_n
+
+
+def _reference(values, n=None, tiebreak=None):
+    """Indices by value descending, then tiebreak (or index) ascending."""
+    keys = range(len(values)) if tiebreak is None else tiebreak
+    order = sorted(range(len(values)), key=lambda i: (-values[i], keys[i]))
+    return order if n is None else order[:n]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_top_n_matches_sort(seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct values, so ties cross the cut-off
+    values = rng.integers(0, 6, 200).astype(np.float64)
+    tiebreak = rng.permutation(200)
+    for n in (None, 0, 1, 7, 50, 199, 200, 500):
+        expected = _reference(values.tolist(), n)
+        assert top_n(values, n).tolist() == expected
+        expected = _reference(values.tolist(), n, tiebreak.tolist())
+        assert top_n(values, n, tiebreak).tolist() == expected
+
+
+def test_descending_order_matches_stable_sort():
+    values = np.array([0.0, 3.0, -1.0, 0.0, 3.0, 2.0, np.nan, -1.0, 5.0])
+    expected = sorted(range(len(values)), key=lambda i: -values[i] if values[i] > 0 else 0)
+    order = descending_order(values)
+    assert order[:4].tolist() == expected[:4]
+    assert sorted(order.tolist()) == list(range(len(values)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_leaderboard_updates_match_sort(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 20, 300).astype(np.float64)
+    tiebreak = rng.permutation(300) if seed % 2 else None
+    board = Leaderboard(values, 10, tiebreak)
+    for _ in range(200):
+        changed = rng.choice(300, size=int(rng.integers(1, 6)), replace=False)
+        # Members drop out as often as outsiders rise
+        values[changed] = rng.integers(0, 20, len(changed))
+        board.update(changed)
+        expected = _reference(values.tolist(), None, None if tiebreak is None else tiebreak.tolist())
+        assert board.top(10).tolist() == expected[:10]
+        assert board.top(4).tolist() == expected[:4]
+        assert board.top(25).tolist() == expected[:25]
+    # Most updates are absorbed without a full re-selection
+    assert board.rebuilds < 200
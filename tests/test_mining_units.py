@@ -0,0 +1,64 @@
+"""Packed units vectors and the file backend's patch log against a plain dict.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import numpy as np
+import pytest
+
+from app.models.mining_units import UNITS_DTYPE, UNITS_MAX, pack_units, unpack_units
+from app.services.data_service import DataService
+
+FINGERPRINT = "ab" * 20
+OTHER_FINGERPRINT = "cd" * 20
+
+
+def test_pack_round_trip():
+    rng = np.random.default_rng(0)
+    units = np.zeros(5000, dtype=UNITS_DTYPE)
+    units[rng.choice(5000, 200, replace=False)] = rng.integers(1, UNITS_MAX, 200)
+    units[-1] = UNITS_MAX
+    packed = pack_units(units, FINGERPRINT)
+    restored = unpack_units(packed, FINGERPRINT)
+    assert restored.dtype == UNITS_DTYPE and np.array_equal(restored, units)
+    assert unpack_units(pack_units(units[:0], FINGERPRINT), FINGERPRINT).shape == (0,)
+    # Written for another universe
+    assert unpack_units(packed, OTHER_FINGERPRINT) is None
+
+
+def test_unpack_rejects_damaged_data():
+    packed = pack_units(np.arange(10, dtype=UNITS_DTYPE), FINGERPRINT)
+    with pytest.raises(ValueError):
+        unpack_units(packed[:10], FINGERPRINT)
+    with pytest.raises(ValueError):
+        unpack_units(b"XXXX" + packed[4:], FINGERPRINT)
+    short = pack_units(np.arange(9, dtype=UNITS_DTYPE), FINGERPRINT)
+    # Header of 10 rows over a payload of 9
+    with pytest.raises(ValueError):
+        unpack_units(packed[:30] + short[30:], FINGERPRINT)
+
+
+def _reload(data_service):
+    service = DataService(data_service.data_path, data_service.mining_units_path, universe=data_service.universe)
+    service.load_data()
+    return service
+
+
+def test_patch_log_replay_matches_dict(data_service):
+    universe = data_service.universe
+    rng = np.random.default_rng(5)
+    expected = {}
+    for batch in range(6):
+        for row in rng.choice(universe.n_rows, size=8, replace=False).tolist():
+            value = int(rng.integers(0, 5)) if row % 7 else UNITS_MAX + 10
+            data_service.update_mining_units(universe.keys[row], value)
+            expected[universe.keys[row]] = min(value, UNITS_MAX)
+        data_service.save_mining_units(compact=batch == 2)
+        reloaded = _reload(data_service)
+        assert reloaded.mining_units == {key: units for key, units in expected.items() if units}
+
+    # A save torn mid-line is ignored; the patches before it still apply
+    with open(data_service.units_log_path, 'a') as f:
+        f.write('{"' + universe.keys[0] + '":')
+    assert _reload(data_service).mining_units == {key: units for key, units in expected.items() if units}
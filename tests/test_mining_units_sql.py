@@ -0,0 +1,45 @@
+"""Incremental mining unit saves in the SQL backend.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db
+from app.models.mining_units import pack_units, unpack_units
+from app.services.mining_units_service_sql import SQLMiningUnitsService
+
+FINGERPRINT = "ab" * 20
+OTHER_FINGERPRINT = "cd" * 20
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'units.db'}", future=True)
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "_SessionLocal", sessionmaker(bind=engine, autoflush=False, future=True))
+    return SQLMiningUnitsService()
+
+
+def test_delta_patches_the_packed_vector(service):
+    service.save_vector(FINGERPRINT, pack_units(np.zeros(10, dtype=np.int16), FINGERPRINT))
+    service.save_vector(OTHER_FINGERPRINT, pack_units(np.zeros(3, dtype=np.int16), OTHER_FINGERPRINT))
+
+    # "gone" is not in the current universe (row id -1): key table only
+    service.save_units_delta({"1_a": 5, "9_b": 7, "gone": 3}, FINGERPRINT, np.array([2, 9, -1]))
+
+    expected = np.zeros(10, dtype=np.int16)
+    expected[[2, 9]] = [5, 7]
+    np.testing.assert_array_equal(unpack_units(service.load_vector(FINGERPRINT), FINGERPRINT), expected)
+    # A vector of another universe no longer matches the key table
+    assert service.load_vector(OTHER_FINGERPRINT) is None
+    assert service.load_units_map() == {"1_a": 5, "9_b": 7, "gone": 3}
@@ -0,0 +1,37 @@
+"""Compile the price history queries for the production (Postgres/pg8000) dialect.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy.dialects.postgresql import pg8000
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.price_service_sql import SQLPriceService
+
+
+@pytest.mark.parametrize("freq", ["day", "week", "month"])
+def test_postgres_bucket_groups_by_the_selected_expression(freq):
+    # No database is needed to build the statement, so skip __init__
+    service = SQLPriceService.__new__(SQLPriceService)
+    q, bucket = service._history_query("postgresql", 1, ["Lustering Alloy"], "2024-01-01", "2024-02-01", freq)
+    compiled = q.compile(dialect=pg8000.dialect())
+    sql = str(compiled)
+
+    expression = f"date_trunc('{freq}', price_history.date)"
+    select_part, group_part = sql.split("GROUP BY")
+    assert expression in select_part
+    assert expression in group_part
+    # Only the filters are bound; the bucket is the same literal text in both places
+    assert freq not in compiled.params.values()
+
+
+def test_unknown_frequency_is_rejected():
+    service = SQLPriceService.__new__(SQLPriceService)
+    with pytest.raises(ValueError):
+        service._history_query("postgresql", 1, freq="day'); drop table price_history; --")
@@ -0,0 +1,119 @@
+"""PriceHistoryStore against a plain pandas read of the import CSVs.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import price_history_store
+from app.services.price_history_store import PriceHistoryStore
+
+
+def _write_csv(imports_dir, day, prices):
+    path = os.path.join(imports_dir, f"prices-2024-01-{day:02d}.csv")
+    pd.DataFrame({'resource': list(prices), 'buy': list(prices.values()),
+                  'sell': list(prices.values()), 'average': list(prices.values())}).to_csv(path, index=False)
+    return path
+
+
+def _reference(imports_dir):
+    """Every CSV read with pandas, dated from its file name, sorted by date."""
+    frames = []
+    for filename in sorted(os.listdir(imports_dir)):
+        df = pd.read_csv(os.path.join(imports_dir, filename))
+        df['date'] = pd.Timestamp(filename[len("prices-"):-len(".csv")])
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['resource', 'buy', 'sell', 'average', 'date'])
+    return pd.concat(frames).sort_values(['date', 'resource'], ignore_index=True)
+
+
+def _read(store):
+    return store.read().sort_values(['date', 'resource'], ignore_index=True)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    imports_dir = tmp_path / "price_imports"
+    imports_dir.mkdir()
+    return str(imports_dir), str(tmp_path / "price_history")
+
+
+def test_refresh_tracks_added_changed_and_deleted_csvs(dirs, monkeypatch):
+    monkeypatch.setattr(price_history_store, "COMPACT_PARTS", 2)
+    imports_dir, store_dir = dirs
+    store = PriceHistoryStore(imports_dir, store_dir)
+    assert not store.refresh()
+
+    for day in range(1, 6):
+        _write_csv(imports_dir, day, {"Lustering Alloy": 10.0 + day, "Glossy Compound": 20.0 + day})
+        assert store.refresh()
+    pd.testing.assert_frame_equal(_read(store), _reference(imports_dir), check_dtype=False)
+    # Compaction kept the part count bounded
+    assert len(store._parts()) <= 2
+
+    path = _write_csv(imports_dir, 3, {"Lustering Alloy": 99.0})
+    os.utime(path, ns=(1, 1))
+    os.remove(os.path.join(imports_dir, "prices-2024-01-04.csv"))
+    assert store.refresh()
+    pd.testing.assert_frame_equal(_read(store), _reference(imports_dir), check_dtype=False)
+    assert not store.refresh()
+
+    # A fresh instance picks the store up from its manifest
+    reopened = PriceHistoryStore(imports_dir, store_dir)
+    assert not reopened.refresh()
+    pd.testing.assert_frame_equal(_read(reopened), _reference(imports_dir), check_dtype=False)
+
+
+def test_filters_match_pandas(dirs):
+    imports_dir, store_dir = dirs
+    for day in range(1, 5):
+        _write_csv(imports_dir, day, {"Lustering Alloy": float(day), "Glossy Compound": 2.0 * day})
+    store = PriceHistoryStore(imports_dir, store_dir)
+    store.refresh()
+    lower, upper = pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-04")
+
+    got = store.read(resources=["Glossy Compound"], lower=lower, upper=upper)
+    expected = _reference(imports_dir)
+    expected = expected[(expected['resource'] == "Glossy Compound")
+                        & (expected['date'] >= lower) & (expected['date'] < upper)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected, check_dtype=False)
+
+
+def test_reads_survive_concurrent_compaction(dirs, monkeypatch):
+    monkeypatch.setattr(price_history_store, "COMPACT_PARTS", 1)
+    imports_dir, store_dir = dirs
+    store = PriceHistoryStore(imports_dir, store_dir)
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                store.refresh()
+                store.read(resources=["Lustering Alloy"])
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    try:
+        for day in range(1, 21):
+            _write_csv(imports_dir, day, {"Lustering Alloy": float(day)})
+            store.refresh()
+    finally:
+        done.set()
+        for thread in readers:
+            thread.join()
+    assert errors == []
+    pd.testing.assert_frame_equal(_read(store), _reference(imports_dir), check_dtype=False)
@@ -0,0 +1,130 @@
+"""Price snapshot back-fill and merging in the SQL price service.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import Select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db
+from app.models.price_snapshot import pack_prices, unpack_prices
+from app.models.sql_models import Base, PriceHistory, PriceSnapshot
+from app.services.price_service_sql import SQLPriceService
+
+DAY = datetime(2024, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}", future=True)
+    monkeypatch.setattr(db, "_engine", engine)
+    monkeypatch.setattr(db, "_SessionLocal", sessionmaker(bind=engine, autoflush=False, future=True))
+    Base.metadata.create_all(bind=engine)
+    # Skip load_prices(): no current prices are needed
+    service = SQLPriceService.__new__(SQLPriceService)
+    service._init_snapshots()
+    service._snapshot_index = {}
+    service._snapshot_prices = {}
+    return service
+
+
+def _history(user_id, resource, price, when=DAY):
+    with db.session_scope() as s:
+        s.execute(insert(PriceHistory).values(user_id=user_id, resource=resource, price_avg=price, date=when))
+
+
+def _snapshot_rows():
+    with db.session_scope() as s:
+        return [(uid, unpack_prices(data)) for uid, data in
+                s.execute(select(PriceSnapshot.user_id, PriceSnapshot.data).order_by(PriceSnapshot.id)).all()]
+
+
+def test_backfill_only_touches_the_requesting_user(service):
+    _history(1, "Lustering Alloy", 10.0)
+    _history(2, "Lustering Alloy", 20.0)
+    # User 2 already has a snapshot holding a price that is not in the history table
+    with db.session_scope() as s:
+        s.execute(insert(PriceSnapshot).values(user_id=2, taken_at=DAY, data=pack_prices({"Glossy Compound": 5.0})))
+
+    assert service.get_distinct_history_dates(1) == [DAY]
+    assert service.load_prices_from_history_date(DAY, 1) == {"Lustering Alloy": 10.0}
+    assert sorted(_snapshot_rows(), key=lambda row: row[0]) == [
+        (1, {"Lustering Alloy": 10.0}),
+        (2, {"Glossy Compound": 5.0}),
+    ]
+
+
+def test_rebuild_is_scoped_to_one_user(service):
+    _history(1, "Lustering Alloy", 10.0)
+    with db.session_scope() as s:
+        s.execute(insert(PriceSnapshot).values(user_id=2, taken_at=DAY, data=pack_prices({"Glossy Compound": 5.0})))
+
+    assert service.rebuild_price_snapshots(1) == 1
+    assert sorted(_snapshot_rows(), key=lambda row: row[0]) == [
+        (1, {"Lustering Alloy": 10.0}),
+        (2, {"Glossy Compound": 5.0}),
+    ]
+
+
+class _TimestamptzSession:
+    """Answers the snapshot lookup with tz-aware rows, as pg8000 does for TIMESTAMPTZ."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.deleted = []
+        self.inserted = []
+
+    def execute(self, statement, params=None):
+        if isinstance(statement, Select):
+            return _Result(self.rows)
+        if params is not None:
+            self.inserted.extend(params)
+        else:
+            self.deleted.extend(statement.compile().params.values())
+        return _Result([])
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+def test_merge_matches_tz_aware_timestamps(service):
+    # 14:00+02:00 is the same instant as the naive (UTC) import date
+    aware = DAY.replace(hour=14, tzinfo=timezone(timedelta(hours=2)))
+    other = aware + timedelta(days=1)
+    session = _TimestamptzSession([(7, aware, pack_prices({"Glossy Compound": 5.0})),
+                                   (8, other, pack_prices({"Glossy Compound": 6.0}))])
+
+    service._write_snapshots(session, {(1, DAY): {"Lustering Alloy": 10.0}})
+
+    # Only the merged row is replaced; a row that did not match is kept
+    assert session.deleted == [[7]]
+    [row] = session.inserted
+    assert row["taken_at"] == DAY.replace(tzinfo=timezone.utc)
+    assert unpack_prices(row["data"]) == {"Glossy Compound": 5.0, "Lustering Alloy": 10.0}
+
+
+def test_index_sees_imports_by_another_instance(service):
+    _history(1, "Lustering Alloy", 10.0)
+    assert service.get_distinct_history_dates(1) == [DAY]
+
+    # Another session/process imports a later date
+    later = DAY + timedelta(days=1)
+    with db.session_scope() as s:
+        s.execute(insert(PriceSnapshot).values(user_id=1, taken_at=later, data=pack_prices({"Lustering Alloy": 11.0})))
+
+    assert service.get_distinct_history_dates(1) == [DAY, later]
+    assert service.load_prices_from_history_date(later, 1) == {"Lustering Alloy": 11.0}
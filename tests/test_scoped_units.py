@@ -0,0 +1,45 @@
+"""Scoped What-if, risk and haul volumes against the filtered analysis table.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+import numpy as np
+import pandas as pd
+
+from app.models.universe import REGION
+from app.services.analytics_service import AnalyticsService
+from app.services.logistics_service import LogisticsService
+from app.services.risk_service import RiskService
+from app.services.scenario_service import ScenarioService
+from conftest import StaticPrices
+
+
+class NoHistoryPrices(StaticPrices):
+    """Static prices without any price history."""
+
+    def get_price_history(self, username, start=None, end=None):
+        return pd.DataFrame(columns=['date', 'resource', 'average'])
+
+
+def test_scoped_units_match_filtered_table(data_service):
+    for row, key in enumerate(data_service.universe.keys):
+        data_service.update_mining_units(key, row % 4)
+    prices = NoHistoryPrices()
+    table, _ = AnalyticsService(data_service, prices).analysis_table(regions=["Aridia"])
+    scope_units = data_service.get_scoped_units_vector(data_service.universe.row_ids(table.index))
+    assert scope_units.sum() == table["Mining Units"].sum() < data_service.units.sum()
+    hourly = table["Total Value/h"].sum()
+
+    scenarios = ScenarioService(data_service, prices)
+    result = scenarios.evaluate(scenarios.base_prices(), units=scope_units, levels=())
+    assert np.isclose(result.portfolio[0], hourly)
+
+    # Without history every path keeps today's prices: a month of the scoped income
+    risk = RiskService(data_service, prices).simulate("user", n_paths=10, units=scope_units)
+    assert np.allclose(risk.profits, hourly * 24 * 30, rtol=1e-5)
+
+    universe = data_service.universe
+    planets, volume = LogisticsService(data_service).planet_volumes(scope_units)
+    assert set(universe.decode(REGION, universe.planet_codes(REGION)[planets]).tolist()) == {"Aridia"}
+    assert np.isclose(volume.sum(), AnalyticsService.income_table(table, 0.0)["Hourly Volume (m3)"].sum())
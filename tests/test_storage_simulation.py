@@ -0,0 +1,100 @@
+"""Storage overflow simulation against an hour-by-hour Python simulation.
+
+Run from the project root:
+
+    python -m pytest -q tests
+"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from app.models.mining_units import RESOURCE_UNIT_VOLUME
+from app.models.universe import PLANET, RESOURCE
+from app.services.logistics_service import HaulPlan, HaulStop, HaulTour, HaulTrip, LogisticsService
+from conftest import TOY_PRICES
+
+STEP = 0.25
+
+
+def _reference(volumes, collections, capacity, horizon):
+    """Per planet ``(collected, lost, stored)`` stepping production in ``STEP`` hours."""
+    result = []
+    for volume, times in zip(volumes, collections):
+        times = {round(t / STEP) for t in times if 0 < t <= horizon}
+        stored = collected = lost = 0.0
+        for step in range(1, round(horizon / STEP) + 1):
+            stored += volume * STEP
+            if stored > capacity:
+                lost += stored - capacity
+                stored = capacity
+            if step in times:
+                collected += stored
+                stored = 0.0
+        result.append((collected, lost, stored))
+    return np.array(result).reshape(-1, 3)
+
+
+def _planet_values(universe, units):
+    """Hourly ISK and m3 per planet name, summed row by row."""
+    names = universe.decode(PLANET, universe.planet_codes(PLANET)[universe.row_planet]).tolist()
+    resources = universe.decode(RESOURCE, universe.resource_code).tolist()
+    value, volume = defaultdict(float), defaultdict(float)
+    for row in range(universe.n_rows):
+        value[names[row]] += float(universe.output[row]) * TOY_PRICES[resources[row]] * int(units[row])
+        volume[names[row]] += float(universe.output[row]) * int(units[row]) * RESOURCE_UNIT_VOLUME
+    return value, volume
+
+
+@pytest.fixture
+def service(data_service):
+    for row, key in enumerate(data_service.universe.keys):
+        data_service.update_mining_units(key, (row * 7) % 4)
+    return LogisticsService(data_service)
+
+
+def _check(simulation, volume_by_name, value_by_name, expected):
+    volumes = np.array([volume_by_name[name] for name in simulation.planets])
+    assert np.allclose(simulation.collected, expected[:, 0])
+    assert np.allclose(simulation.lost, expected[:, 1])
+    assert np.allclose(simulation.stored, expected[:, 2])
+    assert np.allclose(simulation.produced, volumes * simulation.horizon_hours)
+    per_volume = np.array([value_by_name[name] for name in simulation.planets]) / volumes
+    assert np.allclose(simulation.collected_value, expected[:, 0] * per_volume)
+    assert np.allclose(simulation.lost_value, expected[:, 1] * per_volume)
+
+
+@pytest.mark.parametrize("interval", [6.0, 17.5, 48.0, 200.0])
+def test_fixed_interval_matches_stepping(service, interval):
+    capacity, horizon = 4.0, 96.0
+    simulation = service.simulate_storage(capacity, horizon, TOY_PRICES, interval_hours=interval, tax_rate=10.0)
+    value, volume = _planet_values(service.data_service.universe, service.data_service.units)
+    times = np.arange(1, int(horizon // interval) + 1) * interval
+    expected = _reference([volume[name] for name in simulation.planets], [times] * len(simulation.planets),
+                          capacity, horizon)
+    _check(simulation, volume, value, expected)
+    assert simulation.net_income == pytest.approx(simulation.collected_value.sum() * 0.9)
+
+
+def _tours(planets):
+    return [HaulTour(stops=[HaulStop(system="", planets=planets, volume=0.0)], volume=0.0, jumps=0)]
+
+
+def test_plan_policy_matches_stepping(service):
+    names = service.simulate_storage(1.0, 1.0, TOY_PRICES, interval_hours=1.0).planets
+    # Three trips of 6 hours: the first half of the planets on trips 0 and 2, the rest on trip 1, one never
+    half = len(names) // 2
+    plan = HaulPlan(home_system="", base_hours=6.0, trips=[
+        HaulTrip(hour=0.0, tours=_tours(names[:half])),
+        HaulTrip(hour=6.0, tours=_tours(names[half:-1])),
+        HaulTrip(hour=12.0, tours=_tours(names[:half])),
+    ])
+    capacity, horizon = 3.0, 75.0
+    simulation = service.simulate_storage(capacity, horizon, TOY_PRICES, plan=plan)
+    value, volume = _planet_values(service.data_service.universe, service.data_service.units)
+    cycles = np.arange(0, horizon + 18, 18.0)
+    collections = [np.concatenate([cycles, cycles + 12]) if i < half else cycles + 6 if i < len(names) - 1
+                   else np.empty(0) for i in range(len(names))]
+    expected = _reference([volume[name] for name in simulation.planets], collections, capacity, horizon)
+    _check(simulation, volume, value, expected)
+    assert simulation.collected[-1] == 0
@@ -1,12 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
+from contextlib import nullcontext
+from app.memo import VersionedMemo
+from app.user_cache import UserStateCache
 from app.services.data_service import DataService
 from app.services.price_service import PriceService
 from app.services.analytics_service import AnalyticsService
+from app.services.scenario_service import ScenarioService
+from app.services.allocation_service import AllocationService
+from app.services.logistics_service import LogisticsService
+from app.services.risk_service import RiskService
 from app.services.user_service import UserService
 from app.services.user_service_sql import SQLUserService
 from app.services.price_service_sql import SQLPriceService
+from app.services.universe_service import shared_state
 from app.config import settings
 from app.path_utils import resource_path
 
@@ -42,6 +51,25 @@ if 'authentication_status' not in st.session_state:
     st.session_state.authentication_status = None
     st.session_state.username = None
 
+
+def release_user_services(services):
+    """Flush a user's unsaved state before the cache drops it."""
+    data_service = services[0]
+    data_service.save_mining_units()
+
+
+@st.cache_resource
+def user_state_cache():
+    """Process-wide cache of per-user services, bounded by user count, idle time and memory."""
+    return UserStateCache(
+        max_users=settings.USER_CACHE_MAX_USERS,
+        idle_seconds=settings.USER_CACHE_IDLE_MINUTES * 60,
+        memory_budget=int(settings.USER_CACHE_MEMORY_MB * 1024 * 1024),
+        release=release_user_services,
+        shared=shared_state,
+    )
+
+
 def login_form():
     # Hero Section for Login
     st.markdown("""
@@ -324,10 +352,26 @@ def main_app():
         st.session_state.user_prefs[pref_key] = value
         save_prefs()
 
+    def keyed_result(name, key):
+        """Session result ``name`` if it was computed from inputs ``key``; results of other inputs are dropped.
+
+        Results are stored as ``(key, result)`` pairs.
+        """
+        entry = st.session_state.get(name)
+        if entry is None:
+            return None
+        if entry[0] != key:
+            del st.session_state[name]
+            return None
+        return entry[1]
+
     # --- Data Loading ---
-    @st.cache_resource(show_spinner=f"Loading data for {username}...")
     def load_user_services(username):
-        """Loads all necessary services for a given user."""
+        """Loads all necessary services for a given user.
+
+        The universe is shared, so (re)loading a user only reads their mining
+        units and prices.
+        """
         # Use resource_path for executable compatibility
         user_data_root = resource_path(os.path.join("data", "user_data", username))
         data_path = resource_path(os.path.join("data", "eve_planets.parquet"))
@@ -349,7 +393,10 @@ def main_app():
         
         return data_service, price_service, analytics_service
 
-    data_service, price_service, analytics_service = load_user_services(username)
+    services = user_state_cache()
+    loading = nullcontext() if username in services else st.spinner(f"Loading data for {username}...")
+    with loading:
+        data_service, price_service, analytics_service = services.get(username, lambda: load_user_services(username))
 
     # --- Sidebar ---
     with st.sidebar:
@@ -378,15 +425,15 @@ def main_app():
                 options=["Current"] + history_dates,
                 format_func=lambda d: d if isinstance(d, str) else d.strftime("%Y-%m-%d %H:%M")
             )
+            price_source = None
             if selected_date != "Current" and selected_date is not None:
+                price_source = f"history:{selected_date.isoformat()}"
+
+            def load_price_set():
                 try:
-                    price_dict = price_service.load_prices_from_history_date(selected_date, uid)
-                    price_service.update_multiple_prices(price_dict)
+                    return price_service.load_prices_from_history_date(selected_date, uid)
                 except Exception as e:
                     st.warning(f"Could not load historical prices: {e}")
-                    price_service.load_prices()
-            else:
-                price_service.load_prices()
         else:
             # Legacy local CSV selection
             imports_dir = os.path.join("data", "user_data", username, "price_imports")
@@ -397,21 +444,29 @@ def main_app():
                 options=price_options,
                 help="Temporarily load a different set of prices for analysis."
             )
-            if selected_price_file != "Default":
+            price_source = f"file:{selected_price_file}" if selected_price_file != "Default" else None
+
+            def load_price_set():
                 try:
                     file_path = os.path.join(imports_dir, selected_price_file)
                     imported_df = pd.read_csv(file_path)
                     if "resource" in imported_df.columns and "price" in imported_df.columns:
-                        price_dict = pd.Series(imported_df.price.values, index=imported_df.resource).to_dict()
-                        price_service.update_multiple_prices(price_dict)
-                    else:
-                        st.warning(f"Invalid format in {selected_price_file}. Using default prices.")
-                        price_service.load_prices()
+                        return pd.Series(imported_df.price.values, index=imported_df.resource).to_dict()
+                    st.warning(f"Invalid format in {selected_price_file}. Using default prices.")
                 except Exception as e:
                     st.error(f"Error loading {selected_price_file}: {e}")
-                    price_service.load_prices()
-            else:
-                price_service.load_prices()
+
+        # Each session keeps the price set it is viewing in its state and passes its prices to
+        # every valuation of the run. The default set is only reloaded by writes; a historical/CSV
+        # set is derived once and reused until the selection or the default set it was based on changes.
+        snapshot = st.session_state.get('price_snapshot')
+        if price_source is None:
+            snapshot = price_service.current
+        elif (snapshot is None or snapshot.source != price_source
+              or snapshot.base_version != price_service.current.version):
+            price_dict = load_price_set()
+            snapshot = price_service.derive(price_dict, price_source) if price_dict is not None else price_service.current
+        st.session_state.price_snapshot = snapshot
 
         # --- Persisted Filters ---
         # Search
@@ -421,6 +476,10 @@ def main_app():
             key='search_query',
             on_change=lambda: set_pref('search_query', st.session_state.get('search_query', ''))
         )
+        if search_query:
+            suggestions = data_service.autocomplete(search_query, limit=5)
+            if suggestions:
+                st.caption("Matches: " + ", ".join(suggestions))
         
         all_resources_list = data_service.get_all_resources()
         selected_resources = st.multiselect(
@@ -493,65 +552,24 @@ def main_app():
         Thank you! o7
         """)
 
-    # --- Master DataFrame Preparation ---
-    master_df_key = f'master_df_{username}'
-    if master_df_key not in st.session_state:
-        all_planets = data_service.get_all_planets()
-        resource_data = []
-        for planet in all_planets:
-            for resource in planet.resources:
-                resource_data.append({
-                    "id": f"{resource.planet_id}_{resource.resource}",
-                    "System": planet.system,
-                    "Constellation": planet.constellation,
-                    "Region": planet.region,
-                    "Planet": planet.name,
-                    "Type": planet.planet_type.value,
-                    "Resource": resource.resource,
-                    "Richness": resource.richness.value,
-                    "Output/h/unit": resource.output,
-                    "obj": resource 
-                })
-        st.session_state[master_df_key] = pd.DataFrame(resource_data)
-
-    master_df = st.session_state[master_df_key]
-
     # --- Main Page ---
     st.title("🪐 EVE Echoes Planetary Mining Optimizer")
 
-    # Filtering logic on the master dataframe
-    filtered_df = master_df
-    if selected_regions:
-        filtered_df = filtered_df[filtered_df['Region'].isin(selected_regions)]
-    if selected_constellations:
-        filtered_df = filtered_df[filtered_df['Constellation'].isin(selected_constellations)]
-    if selected_systems:
-        filtered_df = filtered_df[filtered_df['System'].isin(selected_systems)]
-    if search_query:
-        query = search_query.lower()
-        filtered_df = filtered_df[
-            filtered_df['System'].str.lower().contains(query) |
-            filtered_df['Constellation'].str.lower().contains(query) |
-            filtered_df['Region'].str.lower().contains(query)
-        ]
-    if selected_resources:
-        filtered_df = filtered_df[filtered_df['Resource'].isin(selected_resources)]
-
-    # Prepare data for display
-    # Perform calculations on the filtered dataframe for performance
-    df = filtered_df.copy()
-    
-    # Update mining units from objects, as they can change
-    df['Mining Units'] = df['obj'].apply(lambda r: r.mining_units)
-
-    prices = price_service.get_all_prices()
-    price_map = df['Resource'].map(prices).fillna(0)
-    
-    df["Value/h/unit"] = df["Output/h/unit"] * price_map
-    df["Total Value/h"] = df["Value/h/unit"] * df["Mining Units"]
-    
-    if not df.empty:
-        df = df.set_index("id")
+    # Derived tables are memoized on the versions of their inputs, so reruns that
+    # change none of universe, prices, mining units or filters reuse them.
+    # Cached frames are shared between reruns and must not be modified in place.
+    memo = st.session_state.setdefault(
+        'memo', VersionedMemo(max_bytes=int(settings.SESSION_MEMO_MB * 1024 * 1024)))
+    filters = (tuple(selected_regions), tuple(selected_constellations), tuple(selected_systems),
+               search_query, tuple(selected_resources))
+    stamps = (username, data_service.universe.fingerprint, data_service.units_version,
+              snapshot.version, filters)
+    df, df_display = memo.get('analysis', stamps,
+                              lambda: analytics_service.analysis_table(*filters, prices=snapshot.prices))
+    # Units of the rows in the table only: the summaries, What-if, risk and haul planning share its scope
+    scope_stamps = (username, data_service.universe.fingerprint, data_service.units_version, filters)
+    scope_units = memo.get('scope_units', scope_stamps,
+                           lambda: data_service.get_scoped_units_vector(data_service.universe.row_ids(df.index)))
 
     # Display Analysis Table with Data Editor
     st.info("You can directly edit the 'Mining Units' column below. Click the 'Update Mining Units' button to apply changes.")
@@ -569,7 +587,6 @@ def main_app():
         }
         
         # Sortowanie i przygotowanie kolumn do wyświetlenia
-        df_display = df.sort_values(by="Total Value/h", ascending=False)
         display_cols = ["Region", "Constellation", "System", "Planet", "Type", "Resource", "Richness", "Output/h/unit", "Mining Units", "Value/h/unit", "Total Value/h"]
         
         # Upewnij się, że wszystkie kolumny istnieją przed ich wyświetleniem
@@ -580,7 +597,8 @@ def main_app():
             column_config=column_config,
             use_container_width=True,
             key="data_editor",
-            hide_index=True # Ukryj domyślny indeks numeryczny
+            hide_index=True, # Ukryj domyślny indeks numeryczny
+            disabled=[col for col in final_display_cols if col != "Mining Units"]
         )
 
         _, button_col = st.columns([4, 1])
@@ -600,15 +618,11 @@ def main_app():
                             except (ValueError, TypeError):
                                 new_units = 0 # Domyślnie 0, jeśli dane wejściowe są nieprawidłowe (np. puste)
                             
-                            resource_obj = df.loc[resource_id, 'obj']
-                            
-                            if resource_obj.mining_units != new_units:
-                                resource_obj.mining_units = new_units
+                            if data_service.update_mining_units(resource_id, new_units):
                                 changes_made = True
                     
                     if changes_made:
                         data_service.save_mining_units()
-                        data_service.update_dataframe_mining_units()
                         st.toast("Jednostki wydobywcze zaktualizowane!", icon="✅")
                         st.session_state.data_editor["edited_rows"] = {} # Wyczyść stan edytora
                         st.rerun()
@@ -619,6 +633,44 @@ def main_app():
     else:
         st.info("No data to display for the selected filters.")
 
+    with st.expander("Optimize Mining Unit Placement"):
+        st.caption("Places a budget of units within the selected regions/constellations/systems to maximize net income at current prices.")
+        o_col1, o_col2, o_col3, o_col4 = st.columns(4)
+        # Bounded so the solvers' planet x units tables stay small
+        unit_budget = o_col1.number_input("Total units", min_value=0, max_value=100000, value=100, step=10,
+                                          key='opt_budget')
+        max_per_planet = o_col2.number_input("Max units per planet", min_value=1, max_value=100, value=10, step=1,
+                                             key='opt_max_per_planet')
+        haul_hours = o_col3.number_input("Haul every (hours)", min_value=0.0, value=72.0, step=12.0, key='opt_haul_hours',
+                                         help="Planets may not fill their storage between hauls. 0 ignores storage.")
+        exact_mode = o_col4.checkbox("Exact (small scopes)", key='opt_exact')
+        opt_storage = st.session_state.user_prefs.get('planetary_storage_capacity', 920)
+        opt_tax_rate = st.session_state.user_prefs.get('tax_rate', 8.0)
+        allocation_key = (data_service.universe.fingerprint, snapshot.version, opt_tax_rate, opt_storage,
+                          tuple(selected_regions), tuple(selected_constellations), tuple(selected_systems),
+                          unit_budget, max_per_planet, haul_hours, exact_mode)
+        if st.button("Optimize"):
+            try:
+                st.session_state.allocation_plan = (allocation_key, AllocationService(data_service, price_service).optimize(
+                    int(unit_budget), int(max_per_planet),
+                    selected_regions, selected_constellations, selected_systems,
+                    storage_capacity=opt_storage, haul_hours=haul_hours, tax_rate=opt_tax_rate,
+                    exact=exact_mode, prices=snapshot.prices,
+                ))
+            except ValueError as e:
+                st.error(f"{e}. Narrow the selection or use the greedy mode.")
+        plan = keyed_result('allocation_plan', allocation_key)
+        if plan is not None:
+            plan_df = data_service.get_resource_frame().iloc[plan.rows][["Region", "Constellation", "System", "Planet", "Resource", "Output/h/unit"]].copy()
+            plan_df["Mining Units"] = plan.units[plan.rows]
+            st.metric("Planned Net Daily Income", f"{plan.net_hourly * 24:,.2f} ISK")
+            st.dataframe(plan_df, use_container_width=True, hide_index=True)
+            if st.button("Apply Plan", help="Replaces all current mining units with this plan."):
+                if data_service.set_units_vector(plan.units):
+                    data_service.save_mining_units()
+                del st.session_state.allocation_plan
+                st.rerun()
+
 
     # --- Tabs for other functionalities ---
     tab1, tab2, tab3 = st.tabs(["Summaries", "Price Management", "Data Visualization"])
@@ -640,25 +692,11 @@ def main_app():
         )
 
         # Create a single summary dataframe for all calculations
-        summary_df = df[df['Mining Units'] > 0].copy()
+        tax_rate = st.session_state.user_prefs.get('tax_rate', 8.0)
+        tax_multiplier = 1 - (tax_rate / 100)
+        summary_df = memo.get('summary', (stamps, tax_rate), lambda: analytics_service.income_table(df, tax_rate))
 
         if not summary_df.empty:
-            # --- CALCULATIONS (GROSS) ---
-            summary_df['Gross Daily Income'] = summary_df['Total Value/h'] * 24
-            summary_df['Gross Weekly Income'] = summary_df['Total Value/h'] * 24 * 7
-            summary_df['Gross Monthly Income'] = summary_df['Total Value/h'] * 24 * 30
-            
-            # --- CALCULATIONS (NET) ---
-            tax_rate = st.session_state.user_prefs.get('tax_rate', 8.0)
-            tax_multiplier = 1 - (tax_rate / 100)
-            summary_df['Net Daily Income'] = summary_df['Gross Daily Income'] * tax_multiplier
-            summary_df['Net Weekly Income'] = summary_df['Gross Weekly Income'] * tax_multiplier
-            summary_df['Net Monthly Income'] = summary_df['Gross Monthly Income'] * tax_multiplier
-
-            # Volume
-            RESOURCE_UNIT_VOLUME = 0.01  # m3
-            summary_df['Hourly Volume (m3)'] = summary_df['Output/h/unit'] * summary_df['Mining Units'] * RESOURCE_UNIT_VOLUME
-
             # --- DISPLAY INCOME ---
             st.subheader("Income Summary")
             income_display_cols = ["Region", "Constellation", "System", "Planet", "Resource", "Mining Units", "Net Daily Income"]
@@ -678,6 +716,20 @@ def main_app():
             i_col2.metric("Total Net Weekly Income", f"{total_net_weekly:,.2f} ISK")
             i_col3.metric("Total Net Monthly Income", f"{total_net_monthly:,.2f} ISK")
 
+            with st.expander("What-if: resource price change"):
+                scenario_service = ScenarioService(data_service, price_service)
+                held_resources = sorted(summary_df['Resource'].astype(str).unique().tolist())
+                w_col1, w_col2 = st.columns(2)
+                what_if_resource = w_col1.selectbox("Resource", held_resources, key='what_if_resource')
+                what_if_range = w_col2.slider("Price change (%)", -90, 200, (-50, 50), step=5, key='what_if_range')
+                changes = [pct / 100 for pct in range(what_if_range[0], what_if_range[1] + 1, 5)]
+                shocks = scenario_service.resource_shocks(what_if_resource, changes, snapshot.prices)
+                result = scenario_service.evaluate(shocks, units=scope_units, levels=())
+                st.line_chart(pd.DataFrame({
+                    "Price change (%)": [round(c * 100) for c in changes],
+                    "Net Daily Income": result.portfolio * 24 * tax_multiplier,
+                }).set_index("Price change (%)"))
+
 
             st.divider()
 
@@ -703,6 +755,25 @@ def main_app():
             f_col2.metric("Corporation POS Cost", f"{pos_cost:,.2f} ISK", delta_color="inverse")
             f_col3.metric("Final Monthly Profit", f"{final_monthly_profit:,.2f} ISK")
 
+            with st.expander("Profit Risk (Monte Carlo)"):
+                st.caption("Simulates next month's prices from the volatility and correlations in your price history.")
+                n_paths = st.select_slider("Simulated months", options=[5000, 10000, 20000, 50000], value=20000, key='risk_paths')
+                risk_key = (scope_stamps, snapshot.version, tax_rate, pos_cost, n_paths)
+                if st.button("Run Simulation", key='risk_run'):
+                    st.session_state.risk_result = (risk_key, RiskService(data_service, price_service).simulate(
+                        username, n_paths=n_paths, tax_rate=tax_rate, pos_cost=pos_cost, seed=0,
+                        prices=snapshot.prices, units=scope_units,
+                    ))
+                risk = keyed_result('risk_result', risk_key)
+                if risk is not None:
+                    k_col1, k_col2, k_col3, k_col4 = st.columns(4)
+                    k_col1.metric("P(Income < POS Cost)", f"{risk.probability_below_pos_cost:.1%}")
+                    k_col2.metric("5th Percentile Profit", f"{risk.percentile(5):,.0f} ISK")
+                    k_col3.metric("Median Profit", f"{risk.percentile(50):,.0f} ISK")
+                    k_col4.metric("95th Percentile Profit", f"{risk.percentile(95):,.0f} ISK")
+                    counts, edges = np.histogram(risk.profits, bins=40)
+                    st.bar_chart(pd.DataFrame({"Paths": counts}, index=pd.Index(((edges[:-1] + edges[1:]) / 2).round(0), name="Monthly Profit")))
+
 
             st.divider()
 
@@ -712,7 +783,7 @@ def main_app():
             # --- Planetary Storage Fill Time (per Planet) ---
             st.markdown("#### Planetary Storage")
             if st.session_state.user_prefs['planetary_storage_capacity'] > 0:
-                planet_volume_summary = summary_df.groupby(['System', 'Planet'])['Hourly Volume (m3)'].sum().reset_index()
+                planet_volume_summary = summary_df.groupby(['System', 'Planet'], observed=True)['Hourly Volume (m3)'].sum().reset_index()
                 planet_volume_summary = planet_volume_summary[planet_volume_summary['Hourly Volume (m3)'] > 0]
 
                 if not planet_volume_summary.empty:
@@ -758,6 +829,76 @@ def main_app():
             else:
                 st.info("Set ship cargo capacity to see transport summary.")
 
+            # --- Haul Route Plan ---
+            st.markdown("#### Haul Route Plan")
+            storage_capacity = st.session_state.user_prefs['planetary_storage_capacity']
+            cargo_capacity = st.session_state.user_prefs['ship_cargo_capacity']
+            haul_plan = None
+            if storage_capacity > 0 and cargo_capacity > 0:
+                has_jump_graph = data_service.get_jump_graph() is not None
+                if not has_jump_graph:
+                    st.warning("No stargate data loaded: jumps are estimated from the region/constellation layout. "
+                               "Add data/system_jumps.parquet or data/system_jumps.csv (from_system, to_system) "
+                               "for real jump counts; see the README.")
+                active_systems = sorted(data_service.get_active_mining_systems())
+                h_col1, h_col2 = st.columns(2)
+                haul_interval = h_col1.number_input("Longest time between trips (hours)", min_value=1.0, value=48.0,
+                                                    step=6.0, key='haul_interval')
+                home_choice = h_col2.selectbox("Home system", ["(busiest system)"] + active_systems, key='haul_home')
+                # A plan only holds for the units, scope and settings it was made from
+                haul_key = (scope_stamps, storage_capacity, cargo_capacity, haul_interval, home_choice)
+                if st.button("Plan Haul Routes"):
+                    st.session_state.haul_plan = (haul_key, LogisticsService(data_service).plan_hauls(
+                        storage_capacity, cargo_capacity, haul_hours=haul_interval,
+                        home_system=None if home_choice == "(busiest system)" else home_choice,
+                        units=scope_units,
+                    ))
+                haul_plan = keyed_result('haul_plan', haul_key)
+                if haul_plan is not None and haul_plan.trips:
+                    if haul_plan.estimated_jumps and has_jump_graph:
+                        st.caption("Some systems are not connected in the stargate data: their jumps are estimated.")
+                    r_col1, r_col2, r_col3 = st.columns(3)
+                    r_col1.metric("Trip Every", f"{haul_plan.base_hours:,.1f} h")
+                    r_col2.metric("Cycle Length", f"{haul_plan.cycle_hours:,.1f} h")
+                    r_col3.metric("Jumps per Cycle", f"{haul_plan.total_jumps:,}")
+                    schedule = [
+                        {"Hour": trip.hour, "Tour": tour_index + 1, "Stop": stop_index + 1, "System": stop.system,
+                         "Planets": ", ".join(stop.planets), "Volume (m3)": round(stop.volume, 2), "Tour Jumps": tour.jumps}
+                        for trip in haul_plan.trips for tour_index, tour in enumerate(trip.tours)
+                        for stop_index, stop in enumerate(tour.stops)
+                    ]
+                    st.dataframe(pd.DataFrame(schedule), use_container_width=True, hide_index=True)
+            else:
+                st.info("Set planetary storage and ship cargo capacity to plan haul routes.")
+
+            # --- Storage Simulation ---
+            st.markdown("#### Storage Overflow Simulation")
+            if storage_capacity > 0:
+                s_col1, s_col2, s_col3 = st.columns(3)
+                horizon_days = s_col1.number_input("Horizon (days)", min_value=1, value=7, step=1, key='sim_horizon_days')
+                policies = ["Fixed interval"] + (["Haul route plan"] if haul_plan is not None else [])
+                policy = s_col2.selectbox("Collection policy", policies, key='sim_policy')
+                sim_interval = s_col3.number_input("Collect every (hours)", min_value=1.0, value=24.0, step=6.0,
+                                                   key='sim_interval', disabled=policy != "Fixed interval")
+                simulation = LogisticsService(data_service).simulate_storage(
+                    storage_capacity, horizon_days * 24, snapshot.prices,
+                    interval_hours=sim_interval if policy == "Fixed interval" else None,
+                    plan=haul_plan if policy == "Haul route plan" else None,
+                    tax_rate=st.session_state.user_prefs.get('tax_rate', 8.0), units=scope_units,
+                )
+                m_col1, m_col2, m_col3 = st.columns(3)
+                m_col1.metric("Collected", f"{simulation.collected.sum():,.2f} m³")
+                m_col2.metric("Lost to Overflow", f"{simulation.lost_value.sum():,.2f} ISK",
+                              f"{simulation.lost.sum():,.2f} m³", delta_color="inverse")
+                m_col3.metric("Effective Net Daily Income", f"{simulation.net_daily_income:,.2f} ISK")
+                overflowing = simulation.lost > 0
+                if overflowing.any():
+                    st.dataframe(pd.DataFrame({
+                        "Planet": np.array(simulation.planets, dtype=object)[overflowing],
+                        "Lost (m3)": simulation.lost[overflowing].round(2),
+                        "Lost (ISK)": simulation.lost_value[overflowing].round(2),
+                    }).sort_values("Lost (ISK)", ascending=False), use_container_width=True, hide_index=True)
+
         else:
             st.info("Assign mining units to see income and logistics summaries.")
 
@@ -768,36 +909,28 @@ def main_app():
         st.subheader("Manage Price Files")
 
         # Export Button (unchanged)
-        prices_df = pd.DataFrame(price_service.get_all_prices().items(), columns=["resource", "price"])
+        prices_df = pd.DataFrame(snapshot.prices.items(), columns=["resource", "price"])
         st.download_button(label="Export Current Prices to CSV", data=prices_df.to_csv(index=False).encode('utf-8'), file_name="current_prices.csv", mime="text/csv")
 
         # Import Uploader
         uploaded_file = st.file_uploader("Upload a new price CSV (import into DB; no file stored)", type="csv")
         if uploaded_file is not None:
             try:
-                new_prices_df = pd.read_csv(uploaded_file)
                 if settings.DATA_BACKEND == "sql":
                     try:
                         from app.services.user_service_sql import SQLUserService
                         uid = SQLUserService().get_user_id(username)
                     except Exception:
                         uid = None
-                    # Save history rows (resource,buy,sell,average[,date]) and update current cache from 'average' or 'buy'
+                    # Stream history rows (resource,buy,sell,average[,date]) into the DB; the current
+                    # price cache takes 'average', else 'buy', else 'price'
                     from datetime import datetime
-                    price_service.import_prices_dataframe(new_prices_df, user_id=uid, price_date=datetime.utcnow())
-                    # Update live cache from avg/buy if present, else 'price'
-                    price_dict = {}
-                    if 'average' in new_prices_df.columns:
-                        price_dict = pd.Series(new_prices_df['average'].fillna(0.0).values, index=new_prices_df['resource']).to_dict()
-                    elif 'buy' in new_prices_df.columns:
-                        price_dict = pd.Series(new_prices_df['buy'].fillna(0.0).values, index=new_prices_df['resource']).to_dict()
-                    elif 'price' in new_prices_df.columns:
-                        price_dict = pd.Series(new_prices_df['price'].fillna(0.0).values, index=new_prices_df['resource']).to_dict()
-                    price_service.update_multiple_prices(price_dict)
+                    stats = price_service.import_prices_csv(uploaded_file, user_id=uid, price_date=datetime.utcnow())
                     price_service.save_prices()
-                    st.success("Imported CSV into DB and updated current prices.")
+                    st.success(f"Imported {stats['rows']:,} rows into DB ({stats['rows_per_sec']:,.0f} rows/s) and updated current prices.")
                     st.rerun()
                 else:
+                    new_prices_df = pd.read_csv(uploaded_file)
                     if "resource" in new_prices_df.columns and "price" in new_prices_df.columns:
                         price_dict = pd.Series(new_prices_df.price.values, index=new_prices_df.resource).to_dict()
                         price_service.update_multiple_prices(price_dict)
@@ -835,7 +968,7 @@ def main_app():
 
         # --- Bottom Section: Edit Individual Prices in 3 columns ---
         st.subheader("Edit Individual Prices")
-        all_prices = price_service.get_all_prices()
+        all_prices = dict(snapshot.prices)
         
         if not all_prices:
             st.warning("No prices found. Please import a price file to enable editing.")
@@ -860,7 +993,6 @@ def main_app():
                 if submitted:
                     price_service.update_multiple_prices(updated_prices)
                     price_service.save_prices()
-                    price_service.load_prices()  # Przeładuj ceny z pliku
                     st.success("Prices saved successfully as default!")
                     st.rerun()
 
@@ -872,24 +1004,41 @@ def main_app():
             "and each file contains `resource`, `buy`, `sell`, and `average` columns."
         )
 
-        history_df = price_service.get_price_history(username)
+        all_resources = price_service.get_history_resources(username)
 
-        if history_df.empty:
+        if not all_resources:
             st.warning("No valid historical price files found. Please upload price files in the 'Price Management' tab.")
         else:
-            all_resources = sorted(history_df['resource'].unique())
-            
             selected_resources = st.multiselect(
                 "Select Resources to Display",
                 options=all_resources,
                 default=all_resources[:3] if len(all_resources) > 2 else all_resources
             )
+            first_date, last_date = price_service.get_history_date_range(username)
+            range_col, freq_col = st.columns([2, 1])
+            with range_col:
+                date_range = st.date_input(
+                    "Date range",
+                    value=(first_date.date(), last_date.date()),
+                    min_value=first_date.date(),
+                    max_value=last_date.date(),
+                )
+            with freq_col:
+                granularity = st.selectbox("Granularity", options=["Raw", "Daily", "Weekly", "Monthly"])
+            freq = {"Daily": "day", "Weekly": "week", "Monthly": "month"}.get(granularity)
+            # The range picker yields a single date until the end date is chosen
+            start_date, end_date = (tuple(date_range) + (last_date.date(),))[:2] if date_range else (None, None)
+
+            # Only the selected series are read
+            filtered_history = price_service.get_price_history(
+                username, resources=selected_resources, start=start_date, end=end_date, freq=freq
+            ) if selected_resources else pd.DataFrame()
 
             if not selected_resources:
                 st.info("Please select at least one resource to see the price trends.")
+            elif filtered_history.empty:
+                st.info("No price history in the selected date range.")
             else:
-                filtered_history = history_df[history_df['resource'].isin(selected_resources)]
-
                 # --- Gross Price Charts ---
                 st.subheader("Gross Prices (Before Tax)")
                 chart_data_buy = filtered_history.pivot(index='date', columns='resource', values='buy')
@@ -957,6 +1106,44 @@ def main_app():
                 st.line_chart(net_chart_data_sell)
                 st.line_chart(net_chart_data_avg)
 
+            # --- Portfolio Backtest ---
+            st.divider()
+            st.subheader("Portfolio Backtest")
+            st.caption("Daily income of your current mining units at each historical date's average prices.")
+            if data_service.get_units_vector().any():
+                backtest = ScenarioService(data_service, price_service).backtest(
+                    username, start=start_date, end=end_date,
+                    tax_rate=st.session_state.user_prefs.get('tax_rate', 8.0),
+                )
+                if backtest.portfolio.empty:
+                    st.info("No price history in the selected date range.")
+                else:
+                    st.line_chart(backtest.portfolio.rename(columns={'gross': "Gross Daily Income", 'net': "Net Daily Income"}))
+                    st.markdown("##### Net Daily Income by Region")
+                    st.area_chart(backtest.groups['Region'])
+            else:
+                st.info("Assign mining units to backtest your portfolio.")
+
+    with st.sidebar:
+        with st.expander("Cache Statistics"):
+            stats = memo.stats()
+            st.caption(f"{stats['entries']} cached tables, {stats['resident_bytes'] / 2**20:,.1f} MB"
+                       + (f" of {stats['max_bytes'] / 2**20:,.0f} MB" if stats['max_bytes'] else "")
+                       + f", {stats['evictions']} evicted")
+            for name, counts in stats['names'].items():
+                st.caption(f"{name}: {counts['hits']} hits / {counts['misses']} misses")
+            user_stats = services.stats()
+            budget = user_stats['memory_budget']
+            st.caption(f"{user_stats['users']} resident users, {user_stats['resident_bytes'] / 2**20:,.1f} MB"
+                       + (f" of {budget / 2**20:,.0f} MB" if budget else ""))
+            st.caption(f"{user_stats['hits']} hits / {user_stats['loads']} loads "
+                       f"({user_stats['rehydrations']} after eviction), evictions: "
+                       + ", ".join(f"{reason} {count}" for reason, count in user_stats['evictions'].items()))
+            # Other users' names are not shown, only this user's share
+            own = user_stats['per_user'].get(username)
+            if own is not None:
+                st.caption(f"Your resident state: {own['bytes'] / 2**20:,.1f} MB")
+
 
 
 